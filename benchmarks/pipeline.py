@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do pipeline de geração
+Descrição: Executa cada etapa do GeradorSVGWeb (regiões, limites, geometria,
+CSV, SVG, JSON, detalhamento por equipe, topologia) sobre os dados reais do repositório e sobre uma
+malha sintética em escala nacional, medindo tempo de parede, pico de RSS e
+bytes gravados, e compara com a baseline local do mesmo ambiente (máquina e
+versões), guardada fora do repositório em src/cache/benchmark/baseline.json
+
+Uso: python benchmarks/pipeline.py [--cenarios real sintetico] [--atualizar-baseline]
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import hashlib
+import shutil
+import platform
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ / 'src' / 'python'))
+
+import sintetico
+import detalhamento
+from mapa import GeradorSVGWeb
+from instrumentacao import memoria_processo, reiniciar_pico_rss
+
+PASTA_TRABALHO = RAIZ / 'src' / 'cache' / 'benchmark'
+# Números de máquina não são versionados: cada ambiente guarda a sua baseline localmente
+BASELINE_PADRAO = PASTA_TRABALHO / 'baseline.json'
+VERSAO_BASELINE = 2
+
+# Diferenças abaixo disso (ou da dispersão entre as execuções da etapa) são ruído e não contam como regressão
+PISO_TEMPO_S = 0.1
+PISO_MEMORIA_MB = 5.0
+
+
+# Etapas medidas: recebem o gerador e o contexto compartilhado; devolvem o arquivo gravado (ou None)
+
+def etapa_regioes(gerador, contexto):
+    gerador.dados_regioes = {}
+    gerador.carregar_dados_regioes()
+
+
+def etapa_bounds(gerador, contexto):
+    gerador.calcular_bounds()
+
+
+def etapa_geometria(gerador, contexto):
+    gerador.carregar_geometria(usar_cache=False)
+
+
+def etapa_geometria_cache(gerador, contexto):
+    gerador.carregar_geometria()
+
+
+def etapa_modelo_svg(gerador, contexto):
+    gerador.modelo_svg = None
+    gerador.construir_modelo_svg()
+
+
+def etapa_csv(gerador, contexto):
+    # Leitura a frio: descarta o cache por arquivo dos relatórios
+    shutil.rmtree(gerador.relatorios_cache_path, ignore_errors=True)
+    contexto['dados_csv'] = gerador.carregar_dados_csv_indicador(contexto['indicador'])
+
+
+def etapa_csv_cache(gerador, contexto):
+    contexto['dados_csv'] = gerador.carregar_dados_csv_indicador(contexto['indicador'])
+
+
+def etapa_svg_campos(gerador, contexto):
+    # Parte variável do SVG: classificação e campos (cor, pontuação, tooltip) de cada município
+    gerador.valores_municipios(contexto['indicador'], gerador.construir_modelo_svg().municipios,
+                               contexto['dados_csv'])
+
+
+def etapa_svg_texto(gerador, contexto):
+    # SVG completo em memória, como o servidor devolve
+    contexto['svg'] = gerador.renderizar_svg_modelo(contexto['indicador'], contexto['dados_csv'])
+
+
+def etapa_salvar_svg(gerador, contexto):
+    return gerador.salvar_svg_stream([contexto['svg']], f"{contexto['indicador']}_texto.svg")
+
+
+def etapa_svg_modelo(gerador, contexto):
+    fragmentos = gerador.fragmentos_svg_modelo(contexto['indicador'], contexto['dados_csv'])
+    return gerador.salvar_svg_stream(fragmentos, f"{contexto['indicador']}_mapa.svg")
+
+
+def etapa_json_web(gerador, contexto):
+    return gerador.gerar_dados_json_web(contexto['indicador'], contexto['dados_csv'])
+
+
+def etapa_payload_web(gerador, contexto):
+    return gerador.gerar_payload_web(contexto['indicador'], contexto['dados_csv'])
+
+
+def etapa_equipes(gerador, contexto):
+    # Grava todos os arquivos por município (sem o atalho dos arquivos idênticos)
+    pasta = gerador.pasta_equipes(contexto['indicador'])
+    shutil.rmtree(pasta, ignore_errors=True)
+    indice = gerador.indice_equipes(contexto['indicador'], contexto['dados_csv'])
+    detalhamento.gravar_fragmentos(indice, pasta, gerador.opcoes_json())
+
+
+def etapa_topologia(gerador, contexto):
+    return gerador.gerar_topologia(forcar=True)
+
+
+ETAPAS = [
+    ('carregar_dados_regioes', etapa_regioes),
+    ('calcular_bounds', etapa_bounds),
+    ('construir_geometria', etapa_geometria),
+    ('carregar_geometria_cache', etapa_geometria_cache),
+    ('construir_modelo_svg', etapa_modelo_svg),
+    ('carregar_dados_csv_indicador', etapa_csv),
+    ('carregar_dados_csv_cache', etapa_csv_cache),
+    ('valores_municipios', etapa_svg_campos),
+    ('renderizar_svg_modelo', etapa_svg_texto),
+    ('salvar_svg_stream', etapa_salvar_svg),
+    ('salvar_svg_modelo', etapa_svg_modelo),
+    ('gerar_dados_json_web', etapa_json_web),
+    ('gerar_payload_web', etapa_payload_web),
+    ('gerar_equipes', etapa_equipes),
+    ('gerar_topologia', etapa_topologia)
+]
+
+
+def medir(etapa, gerador, contexto, repeticoes, tempo_max):
+    """Executa a etapa até `repeticoes` vezes (ou até somar `tempo_max` segundos) e mede a melhor execução"""
+    gc.collect()
+    reiniciar_pico_rss()
+    rss_inicio, _ = memoria_processo()
+
+    tempos = []
+    saida = None
+    while len(tempos) < repeticoes:
+        inicio = time.perf_counter()
+        saida = etapa(gerador, contexto)
+        tempos.append(time.perf_counter() - inicio)
+        if sum(tempos) >= tempo_max:
+            break
+
+    _, pico = memoria_processo()
+    return {
+        'tempo_s': round(min(tempos), 6),
+        'tempo_mediano_s': round(sorted(tempos)[len(tempos) // 2], 6),
+        'execucoes': len(tempos),
+        'rss_pico_mb': round(pico, 1) if pico is not None else None,
+        'memoria_mb': round(pico - rss_inicio, 1) if pico is not None and rss_inicio is not None else None,
+        'bytes': os.path.getsize(saida) if saida else None
+    }
+
+
+def redirecionar_saidas(gerador, pasta):
+    """Grava SVG, JSON, topologia e caches do benchmark fora de src/svg e src/data"""
+    pasta.mkdir(parents=True, exist_ok=True)
+    gerador.svg_output_path = pasta
+    gerador.dados_output_path = pasta
+    gerador.cache_path = pasta / 'cache'
+    gerador.relatorios_cache_path = pasta / 'cache' / 'relatorios'
+    gerador.manifesto_path = pasta / 'manifesto.json'
+    gerador.topologia_path = pasta / 'municipios.topo.json'
+    gerador.log = lambda mensagem, tipo="INFO": None
+    return gerador
+
+
+def cenario_real(args):
+    """Dados do repositório (REGIAO/ e os CSV de um indicador)"""
+    gerador = redirecionar_saidas(GeradorSVGWeb(), PASTA_TRABALHO / 'real')
+    return gerador, args.indicador, {'indicador': args.indicador}
+
+
+def cenario_sintetico(args):
+    """Malha sintética com `municipios` municípios e `competencias` competências por município"""
+    pasta = PASTA_TRABALHO / f"sintetico-{args.municipios}x{args.competencias}"
+    print(f"🧪 Preparando dados sintéticos em {pasta} ...")
+    sys.stdout.flush()
+    if sintetico.preparar(pasta, args.municipios, args.competencias):
+        print("   dados sintéticos gerados")
+
+    gerador = redirecionar_saidas(GeradorSVGWeb(), pasta / 'saida')
+    gerador.base_path = pasta
+    gerador.regioes_path = pasta / 'REGIAO'
+    gerador.indicadores_mapeamento = {
+        'sintetico': {'nome': 'Indicador sintético', 'pasta': 'RELATORIOS'}
+    }
+    return gerador, 'sintetico', {'municipios': args.municipios, 'competencias': args.competencias}
+
+
+CENARIOS = {
+    'real': cenario_real,
+    'sintetico': cenario_sintetico
+}
+
+
+def executar_cenario(nome, args):
+    """Mede todas as etapas de um cenário, na ordem do pipeline"""
+    gerador, indicador, parametros = CENARIOS[nome](args)
+    contexto = {'indicador': indicador}
+    etapas = {}
+
+    print(f"\n{'='*60}")
+    print(f"⏱️  Cenário: {nome} {parametros}")
+    print(f"{'='*60}")
+
+    for nome_etapa, etapa in ETAPAS:
+        medicao = medir(etapa, gerador, contexto, args.repeticoes, args.tempo_max)
+        etapas[nome_etapa] = medicao
+        print(f"   {nome_etapa:<30} {medicao['tempo_s'] * 1000:>10.1f} ms")
+        sys.stdout.flush()
+
+    return {'parametros': parametros, 'etapas': etapas}
+
+
+def comparar(resultado, baseline, limite):
+    """Linhas de comparação com a baseline do ambiente e a lista de regressões acima do limite"""
+    linhas = []
+    regressoes = []
+
+    for cenario, dados in resultado['cenarios'].items():
+        base = baseline.get('cenarios', {}).get(cenario)
+        if base is None or base.get('parametros') != dados['parametros']:
+            linhas.append(f"⚠️  {cenario}: sem baseline para {dados['parametros']}")
+            continue
+
+        for etapa, medicao in dados['etapas'].items():
+            referencia = base['etapas'].get(etapa)
+            if referencia is None:
+                continue
+
+            for metrica, piso in (('tempo_s', PISO_TEMPO_S), ('memoria_mb', PISO_MEMORIA_MB), ('bytes', 0)):
+                atual, anterior = medicao.get(metrica), referencia.get(metrica)
+                if atual is None or anterior is None:
+                    continue
+
+                if metrica == 'tempo_s':
+                    piso = max(piso, dispersao(medicao) + dispersao(referencia))
+                variacao = (atual - anterior) / anterior if anterior else 0.0
+                if atual > anterior * (1 + limite) and atual - anterior > piso:
+                    regressoes.append(f"{cenario}/{etapa}/{metrica}: {anterior} -> {atual} ({variacao:+.0%})")
+                if metrica == 'tempo_s':
+                    linhas.append(f"   {cenario:<10} {etapa:<30} {anterior * 1000:>10.1f} -> "
+                                  f"{atual * 1000:>10.1f} ms ({variacao:+.0%})")
+
+    return linhas, regressoes
+
+
+def dispersao(medicao):
+    """Distância entre a execução mediana e a melhor de uma etapa (ruído da própria máquina)"""
+    return max(medicao.get('tempo_mediano_s', medicao['tempo_s']) - medicao['tempo_s'], 0.0)
+
+
+def ambiente():
+    """Máquina e versões em que a medição foi feita"""
+    import numpy
+    import pandas
+    return {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'sistema': platform.system(),
+        'processador': platform.machine(),
+        'cpus': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__
+    }
+
+
+def impressao_ambiente(dados):
+    """Chave da baseline: medições só são comparadas com outras do mesmo ambiente
+    (a versão do kernel, em 'plataforma', fica de fora)"""
+    chave = {campo: valor for campo, valor in dados.items() if campo != 'plataforma'}
+    return hashlib.sha1(json.dumps(chave, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def carregar_baseline(caminho):
+    """Baselines por ambiente gravadas no arquivo (vazio se não existir ou for de outra versão)"""
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(dados, dict) or dados.get('versao') != VERSAO_BASELINE:
+        return {}
+    return dados.get('ambientes', {})
+
+
+def criar_parser():
+    """Argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(description="Benchmark das etapas do pipeline de geração")
+    parser.add_argument('--cenarios', nargs='+', choices=sorted(CENARIOS), default=['real', 'sintetico'],
+                        help="Cenários a medir (padrão: real e sintetico)")
+    parser.add_argument('--indicador', default='esf-idosa',
+                        help="Indicador do cenário real (padrão: esf-idosa)")
+    parser.add_argument('--municipios', type=int, default=5570,
+                        help="Municípios do cenário sintético (padrão: 5570)")
+    parser.add_argument('--competencias', type=int, default=12,
+                        help="Competências por município no cenário sintético (padrão: 12)")
+    parser.add_argument('--repeticoes', type=int, default=5,
+                        help="Execuções por etapa; vale a melhor (padrão: 5)")
+    parser.add_argument('--tempo-max', type=float, default=10.0,
+                        help="Para de repetir uma etapa depois de tantos segundos (padrão: 10)")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PADRAO,
+                        help="Arquivo local com as baselines por ambiente (padrão: src/cache/benchmark/baseline.json)")
+    parser.add_argument('--limite', type=float, default=0.25,
+                        help="Piora relativa tolerada antes de acusar regressão (padrão: 0.25)")
+    parser.add_argument('--atualizar-baseline', action='store_true',
+                        help="Grava os resultados como nova baseline dos cenários medidos")
+    parser.add_argument('--saida', metavar='ARQUIVO',
+                        help="Grava os resultados desta execução em JSON")
+    return parser
+
+
+def main(argv=None):
+    """Mede os cenários, compara com a baseline e sai com código 1 se houver regressão"""
+    args = criar_parser().parse_args(argv)
+
+    print("📏 BENCHMARK DO PIPELINE - INDICADORES DE SAÚDE MS")
+    print(f"Iniciado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+
+    resultado = {
+        'gerado_em': datetime.now().isoformat(),
+        'ambiente': ambiente(),
+        'cenarios': {nome: executar_cenario(nome, args) for nome in args.cenarios}
+    }
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f"\n📄 Resultados gravados em: {args.saida}")
+
+    ambientes = carregar_baseline(args.baseline)
+    impressao = impressao_ambiente(resultado['ambiente'])
+    baseline = ambientes.get(impressao, {})
+
+    if args.atualizar_baseline:
+        # Cenários não medidos nesta execução mantêm a baseline anterior do mesmo ambiente
+        cenarios = {**baseline.get('cenarios', {}), **resultado['cenarios']}
+        ambientes[impressao] = {**resultado, 'cenarios': cenarios}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'versao': VERSAO_BASELINE, 'ambientes': ambientes}, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"\n💾 Baseline do ambiente {impressao} atualizada: {args.baseline}")
+        return True
+
+    if not baseline:
+        print(f"\n⚠️  Sem baseline para este ambiente ({impressao}); grave uma com --atualizar-baseline")
+        return True
+
+    linhas, regressoes = comparar(resultado, baseline, args.limite)
+    print(f"\n{'='*60}")
+    print(f"📊 COMPARAÇÃO COM A BASELINE DO AMBIENTE {impressao} (limite {args.limite:+.0%})")
+    print(f"{'='*60}")
+    for linha in linhas:
+        print(linha)
+
+    if regressoes:
+        print(f"\n❌ {len(regressoes)} regressão(ões):")
+        for regressao in regressoes:
+            print(f"   {regressao}")
+        return False
+
+    print("\n✅ Nenhuma regressão acima do limite")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
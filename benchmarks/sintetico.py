@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dados sintéticos para os benchmarks
+Descrição: Gera uma malha de municípios em grade (fronteiras compartilhadas e
+serrilhadas, alguns com buracos) no formato dos GeoJSON do REGIAO/ e
+relatórios SIAPS no formato dos CSV reais, um por município e competência,
+para medir o pipeline em escala nacional (5.570 municípios)
+"""
+
+import sys
+import json
+import math
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src' / 'python'))
+
+import manifesto
+from municipios import codigo_completo
+from series import MESES
+
+# Retângulo aproximado do Brasil (lng/lat)
+EXTENSAO = (-74.0, -34.0, -34.0, 5.3)
+
+CABECALHO_RELATORIO = (
+    "Ministério da Saúde MS\n"
+    "Secretaria de Atenção Primária à Saúde SAPS\n"
+    "Sistema de Informação para a Atenção Primária à Saúde – SIAPS\n"
+    "Dado gerado em: 1 de janeiro de 2026 - 00:00h\n"
+    "Relatório Qualidade - Visão por Competência\n"
+    "\n"
+    "Dados Sócio Demográficos:\n"
+    "UF: BR\n"
+    "Município: {codigo6} / {nome}\n"
+    "\n"
+    "Filtro:\n"
+    "Indicador: Indicador sintético\n"
+    "Competência selecionada: {competencia}\n"
+    "Tipo de Equipe: eAP, eSF\n"
+    "\n"
+    "CNES;ESTABELECIMENTO;TIPO DO ESTABELECIMENTO;INE;NOME DA EQUIPE;SIGLA DA EQUIPE;"
+    "NUMERADOR;DENOMINADOR;PONTUAÇÃO\n"
+)
+
+RODAPE_RELATORIO = "\nFonte: Sistema de Informação para a Atenção Primária à Saúde - SIAPS\nDado preliminar"
+
+
+def competencias_ate(total, ano=2025, mes=12):
+    """As `total` competências ('JAN/25', ...) terminando em mes/ano, em ordem cronológica"""
+    nomes = {numero: sigla for sigla, numero in MESES.items()}
+    resultado = []
+    for deslocamento in range(total - 1, -1, -1):
+        indice = ano * 12 + (mes - 1) - deslocamento
+        resultado.append(f"{nomes[indice % 12 + 1]}/{(indice // 12) % 100:02d}")
+    return resultado
+
+
+def aresta(inicio, fim, pontos, amplitude, rng):
+    """Pontos intermediários de uma fronteira, deslocados na perpendicular (extremidades fixas)"""
+    t = np.linspace(0, 1, pontos + 2)[1:-1, None]
+    base = inicio + (fim - inicio) * t
+    normal = np.array([-(fim - inicio)[1], (fim - inicio)[0]])
+    normal /= max(np.hypot(*normal), 1e-12)
+    return base + normal * rng.uniform(-amplitude, amplitude, (pontos, 1))
+
+
+def malha(total, pontos_aresta=12, semente=0):
+    """Anéis (lng/lat) de `total` células de uma grade com fronteiras compartilhadas entre vizinhos"""
+    rng = np.random.default_rng(semente)
+    min_x, min_y, max_x, max_y = EXTENSAO
+    colunas = math.ceil(math.sqrt(total * (max_x - min_x) / (max_y - min_y)))
+    linhas = math.ceil(total / colunas)
+    dx, dy = (max_x - min_x) / colunas, (max_y - min_y) / linhas
+
+    cantos = np.stack(np.meshgrid(min_x + dx * np.arange(colunas + 1),
+                                  min_y + dy * np.arange(linhas + 1), indexing='ij'), axis=-1)
+    cantos[1:-1, 1:-1] += rng.uniform(-0.2, 0.2, (colunas - 1, linhas - 1, 2)) * (dx, dy)
+
+    amplitude = 0.08 * min(dx, dy)
+    horizontais = {(i, j): aresta(cantos[i, j], cantos[i + 1, j], pontos_aresta, amplitude, rng)
+                   for i in range(colunas) for j in range(linhas + 1)}
+    verticais = {(i, j): aresta(cantos[i, j], cantos[i, j + 1], pontos_aresta, amplitude, rng)
+                 for i in range(colunas + 1) for j in range(linhas)}
+
+    aneis = []
+    for indice in range(total):
+        i, j = indice % colunas, indice // colunas
+        anel = np.concatenate([
+            cantos[i, j][None], horizontais[i, j],
+            cantos[i + 1, j][None], verticais[i + 1, j],
+            cantos[i + 1, j + 1][None], horizontais[i, j + 1][::-1],
+            cantos[i, j + 1][None], verticais[i, j][::-1],
+            cantos[i, j][None]
+        ])
+        aneis.append((anel, (cantos[i, j] + cantos[i + 1, j + 1]) / 2, min(dx, dy)))
+    return aneis
+
+
+def municipios_sinteticos(total):
+    """(código de 7 dígitos, nome) de cada município sintético"""
+    return [(codigo_completo(f"{110000 + indice:06d}"), f"MUNICIPIO SINTETICO {indice:05d}")
+            for indice in range(total)]
+
+
+def feicao_sintetica(indice, codigo, nome, anel, centro, lado, uf):
+    """Feature GeoJSON de um município sintético; 1 a cada 20 tem um buraco"""
+    aneis = [np.round(anel, 6).tolist()]
+    if indice % 20 == 0:
+        angulos = np.linspace(0, 2 * np.pi, 9)[::-1]
+        buraco = centro + 0.15 * lado * np.column_stack([np.cos(angulos), np.sin(angulos)])
+        aneis.append(np.round(buraco, 6).tolist())
+
+    return {
+        'type': 'Feature',
+        'properties': {
+            'CD_MUN': codigo,
+            'NM_MUN': nome,
+            'CD_RGI': f"{uf:02d}{indice // 20:05d}",
+            'NM_RGI': f"RGI SINTETICA {indice // 20:05d}",
+            'AREA_KM2': round(float(lado * lado * 12321), 3)
+        },
+        'geometry': {'type': 'Polygon', 'coordinates': aneis}
+    }
+
+
+def gerar_regioes(pasta, total, regioes=27, pontos_aresta=12, semente=0):
+    """Grava `regioes` GeoJSON (um por UF sintética) com `total` municípios"""
+    pasta.mkdir(parents=True, exist_ok=True)
+    municipios = municipios_sinteticos(total)
+    celulas = malha(total, pontos_aresta, semente)
+    por_regiao = math.ceil(total / regioes)
+
+    for uf in range(regioes):
+        colecao = {
+            'type': 'FeatureCollection',
+            'features': [
+                feicao_sintetica(indice, *municipios[indice], *celulas[indice], uf + 1)
+                for indice in range(uf * por_regiao, min(total, (uf + 1) * por_regiao))
+            ]
+        }
+        with open(pasta / f"uf{uf + 1:02d}.json", 'w', encoding='utf-8') as f:
+            json.dump(colecao, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def gerar_relatorios(pasta, total, competencias, semente=0):
+    """Grava um relatório SIAPS por município e competência, com 1 a 6 equipes cada"""
+    pasta.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(semente)
+
+    for indice, (codigo, nome) in enumerate(municipios_sinteticos(total)):
+        equipes = int(rng.integers(1, 7))
+        nivel = rng.uniform(10, 90)
+
+        for competencia in competencias:
+            denominadores = rng.integers(50, 800, equipes)
+            pontuacoes = np.clip(nivel + rng.normal(0, 8, equipes), 0, 100)
+            numeradores = np.rint(denominadores * pontuacoes / 100).astype(int)
+
+            linhas = [
+                f'"{2000000 + indice * 7 + e}";"UBS {nome} {e + 1}";"CENTRO DE SAUDE/UNIDADE BASICA";'
+                f'"{indice * 7 + e:010d}";"EQUIPE {e + 1}";"eSF";"{numeradores[e]}";"{denominadores[e]}";'
+                f'"{pontuacoes[e]:.2f}"'.replace('.', ',')
+                for e in range(equipes)
+            ]
+            texto = (CABECALHO_RELATORIO.format(codigo6=codigo[:6], nome=nome, competencia=competencia)
+                     + '\n'.join(linhas) + '\n' + RODAPE_RELATORIO)
+
+            arquivo = pasta / f"{nome} {competencia.replace('/', '-')}.csv"
+            arquivo.write_text(texto, encoding='utf-8')
+
+
+def preparar(pasta, municipios, competencias, pontos_aresta=12, semente=0):
+    """Gera os dados sintéticos em `pasta` (REGIAO/ e RELATORIOS/) se ainda não existirem com esses parâmetros"""
+    parametros = {
+        'municipios': municipios,
+        'competencias': competencias,
+        'pontos_aresta': pontos_aresta,
+        'semente': semente
+    }
+    marcador = pasta / 'parametros.json'
+    try:
+        with open(marcador, 'r', encoding='utf-8') as f:
+            if json.load(f) == parametros:
+                return False
+    except (OSError, ValueError):
+        pass
+
+    # Parâmetros diferentes: descarta o conjunto anterior
+    for subpasta in ('REGIAO', 'RELATORIOS'):
+        shutil.rmtree(pasta / subpasta, ignore_errors=True)
+
+    gerar_regioes(pasta / 'REGIAO', municipios, pontos_aresta=pontos_aresta, semente=semente)
+    gerar_relatorios(pasta / 'RELATORIOS', municipios, competencias_ate(competencias), semente=semente)
+    manifesto.salvar(marcador, parametros)
+    return True
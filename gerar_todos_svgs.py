@@ -2,95 +2,323 @@
 """
 Script para gerar todos os SVGs dos indicadores de saúde
 Automatiza a criação de mapas para visualização web
+
+Executa em lote no mesmo processo: as microrregiões e os limites são
+carregados uma única vez e compartilhados pelos workers. Com --watch o
+processo continua aberto observando as pastas dos indicadores e o REGIAO/,
+e regera só o que mudou, com a geometria já carregada.
 """
 
 import os
 import sys
-import subprocess
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 
-def executar_comando(comando, indicador):
-    """Executa comando e captura saída"""
-    print(f"\n{'='*60}")
-    print(f"🔄 Gerando SVG para: {indicador}")
-    print(f"{'='*60}")
-    
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'python'))
+
+import siaps
+import leitura
+from mapa import GeradorSVGWeb
+from observador import Observador
+from instrumentacao import Instrumentacao, resumir_eventos
+
+# Gerador compartilhado pelos workers (herdado via fork ou usado pelas threads)
+_GERADOR = None
+
+# Regera mesmo indicadores sem alterações (--force)
+_FORCAR = False
+
+# Chave do REGIAO/ no observador do modo --watch (as demais são os códigos dos indicadores)
+_REGIOES = 'REGIAO'
+
+def processar_indicador(indicador):
+    """Processa um indicador no gerador compartilhado e devolve o resumo"""
+    inicio = time.perf_counter()
+    erro = None
+
     try:
-        resultado = subprocess.run(
-            comando, 
-            shell=True, 
-            capture_output=True, 
-            text=True, 
-            cwd=os.path.dirname(os.path.abspath(__file__))
-        )
-        
-        if resultado.returncode == 0:
-            print(f"✅ Sucesso: {indicador}")
-            # Mostra apenas as linhas de log importantes
-            linhas = resultado.stdout.strip().split('\n')
-            for linha in linhas:
-                if any(palavra in linha for palavra in ['INFO:', 'municipios', 'SVG', 'JSON']):
-                    print(f"   {linha}")
-        else:
-            print(f"❌ Erro: {indicador}")
-            print(f"   {resultado.stderr}")
-            
-        return resultado.returncode == 0
-        
+        with _GERADOR.instrumentacao.perfil(indicador):
+            resultado = _GERADOR.processar_indicador_completo(indicador, forcar=_FORCAR)
+        if not resultado:
+            erro = 'Falha no processamento'
     except Exception as e:
-        print(f"❌ Exceção: {indicador} - {e}")
-        return False
+        resultado = None
+        erro = f"{type(e).__name__}: {e}"
+
+    resumo = {
+        'indicador': indicador,
+        'sucesso': bool(resultado and resultado.get('sucesso')),
+        'ignorado': bool(resultado and resultado.get('ignorado')),
+        'erro': erro,
+        'duracao_s': round(time.perf_counter() - inicio, 3)
+    }
+
+    if resultado:
+        resumo.update({
+            'svg_path': resultado['svg_path'],
+            'json_path': resultado['json_path'],
+            'web_path': resultado['web_path'],
+            'equipes_path': resultado.get('equipes_path'),
+            'municipios_processados': resultado['municipios_processados'],
+            'assinatura': resultado['assinatura'],
+            'leitura': resultado.get('leitura'),
+            'etapas': resultado.get('etapas', [])
+        })
+
+    return resumo
+
+def criar_executor(jobs):
+    """Cria o pool de workers, preferindo processos com fork para compartilhar a geometria"""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('fork'))
+
+    # Sem fork (Windows) cada processo recarregaria as regiões: usa threads
+    return ThreadPoolExecutor(max_workers=jobs)
+
+def exibir_resumo(resumo):
+    """Mostra o resultado de um indicador assim que ele termina"""
+    if resumo['ignorado']:
+        print(f"⏭️  Sem alterações: {resumo['indicador']}")
+    elif resumo['sucesso']:
+        print(f"✅ Sucesso: {resumo['indicador']} "
+              f"({resumo['municipios_processados']} municipios, {resumo['duracao_s']:.2f}s)")
+    else:
+        print(f"❌ Erro: {resumo['indicador']} - {resumo['erro']}")
+    sys.stdout.flush()
+
+def executar_lote(indicadores, jobs):
+    """Gera os indicadores em paralelo e devolve os resumos na ordem pedida"""
+    if jobs <= 1:
+        resumos = []
+        for indicador in indicadores:
+            resumo = processar_indicador(indicador)
+            exibir_resumo(resumo)
+            resumos.append(resumo)
+        return resumos
+
+    resumos = {}
+    with criar_executor(jobs) as executor:
+        futuros = {executor.submit(processar_indicador, indicador): indicador for indicador in indicadores}
+
+        for futuro in as_completed(futuros):
+            indicador = futuros[futuro]
+            try:
+                resumo = futuro.result()
+            except Exception as e:
+                # Worker encerrado de forma anormal
+                resumo = {
+                    'indicador': indicador,
+                    'sucesso': False,
+                    'ignorado': False,
+                    'erro': f"{type(e).__name__}: {e}",
+                    'duracao_s': None
+                }
+            exibir_resumo(resumo)
+            resumos[indicador] = resumo
+
+    return [resumos[indicador] for indicador in indicadores]
+
+def observar(indicadores, jobs, espera, intervalo):
+    """Modo --watch: mantém o gerador carregado e regera só os indicadores cujas pastas mudaram
+
+    Uma alteração no REGIAO/ recarrega a geometria e regera todos. O composto é chamado a cada
+    rodada e se pula sozinho quando nenhum payload mudou.
+    """
+    pastas = {
+        indicador: (_GERADOR.base_path / _GERADOR.indicadores_mapeamento[indicador]['pasta'],
+                    (leitura.EXTENSAO_CSV, leitura.EXTENSAO_PLANILHA))
+        for indicador in indicadores
+    }
+    pastas[_REGIOES] = (_GERADOR.regioes_path, ('.json',))
+    observador = Observador(pastas, espera=espera, intervalo=intervalo)
+
+    print(f"\n👀 Observando {len(indicadores)} pasta(s) de indicadores e REGIAO/ "
+          f"(espera de {espera:g}s; Ctrl+C para encerrar)")
+    sys.stdout.flush()
+
+    try:
+        while True:
+            alteradas = observador.aguardar()
+            inicio = time.perf_counter()
+            print(f"\n🔔 {datetime.now().strftime('%H:%M:%S')} Alterações em: {', '.join(sorted(alteradas))}")
+
+            if _REGIOES in alteradas:
+                print("🗺️  REGIAO/ alterado: recarregando a geometria e regerando todos os indicadores")
+                if not _GERADOR.recarregar_regioes():
+                    print("❌ Erro ao carregar dados das regiões; aguardando nova alteração")
+                    continue
+                afetados = list(indicadores)
+            else:
+                afetados = [indicador for indicador in indicadores if indicador in alteradas]
+
+            resumos = executar_lote(afetados, max(1, min(jobs, len(afetados))))
+            _GERADOR.registrar_no_manifesto(resumos)
+            composto = _GERADOR.gerar_composto()
 
-def main():
+            regerados = sum(1 for r in resumos if r['sucesso'] and not r['ignorado'])
+            falhas = sum(1 for r in resumos if not r['sucesso'])
+            if composto and not composto['ignorado']:
+                print(f"🏆 Composto atualizado: {composto['municipios_processados']} municipios")
+            print(f"🔁 {regerados} regerado(s), {len(resumos) - regerados - falhas} sem alterações, "
+                  f"{falhas} falha(s) em {time.perf_counter() - inicio:.2f}s")
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        print("\n⏹️  Observação encerrada.")
+
+    return True
+
+def criar_parser():
+    """Argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(description="Gera os SVGs e JSONs de todos os indicadores")
+    parser.add_argument('indicadores', nargs='*',
+                        help="Indicadores a gerar (padrão: todos)")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="Número de workers em paralelo (padrão: núcleos disponíveis)")
+    parser.add_argument('--agregacao', choices=siaps.METODOS_AGREGACAO, default='ponderada',
+                        help="Agregação das equipes por município (padrão: ponderada)")
+    parser.add_argument('--json-compacto', action='store_true',
+                        help="Grava os JSON sem indentação")
+    parser.add_argument('--force', action='store_true',
+                        help="Regera todos os indicadores, mesmo sem alterações nas entradas")
+    parser.add_argument('--leitores', type=int, default=None, metavar='N',
+                        help="Threads de leitura dos CSV por indicador (padrão: automático)")
+    parser.add_argument('--ingerir', action='store_true',
+                        help="Converte todos os CSV no armazém colunar antes de gerar")
+    parser.add_argument('--resumo', metavar='ARQUIVO',
+                        help="Grava o resumo estruturado por indicador em JSON")
+    parser.add_argument('--eventos', metavar='ARQUIVO',
+                        help="Acrescenta os tempos de cada etapa em JSON-lines")
+    parser.add_argument('--profile', nargs='?', const='src/cache/perfis', metavar='PASTA',
+                        help="Grava cProfile e tracemalloc por indicador (padrão: src/cache/perfis)")
+    parser.add_argument('--watch', action='store_true',
+                        help="Após o lote, observa as pastas e o REGIAO/ e regera só o que mudar")
+    parser.add_argument('--espera', type=float, default=2.0, metavar='S',
+                        help="Modo --watch: segundos sem novas alterações antes de regerar (padrão: 2)")
+    parser.add_argument('--intervalo', type=float, default=0.5, metavar='S',
+                        help="Modo --watch: segundos entre as varreduras das pastas (padrão: 0.5)")
+    return parser
+
+def main(argv=None):
     """Função principal"""
+    global _GERADOR, _FORCAR
+
+    args = criar_parser().parse_args(argv)
+
     print("🗺️  GERADOR DE MAPAS SVG - INDICADORES DE SAÚDE MS")
     print("=" * 60)
     print(f"Iniciado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-    
+
+    _GERADOR = GeradorSVGWeb(metodo_agregacao=args.agregacao)
+    _GERADOR.json_compacto = args.json_compacto
+    _GERADOR.trabalhadores_leitura = args.leitores
+    _GERADOR.instrumentacao = Instrumentacao(args.eventos, args.profile)
+    _FORCAR = args.force
+
     # Lista de todos os indicadores disponíveis
-    indicadores = [
-        # Equipes Multiprofissionais
-        'emulti-acoes',
-        'emulti-media',
-        
-        # Estratégia Saúde da Família
-        'esf-desenvolvimento',
-        'esf-diabetes', 
-        'esf-gestante',
-        'esf-hipertensao',
-        'esf-mais-acesso',
-        'esf-idosa',
-        'esf-cancer-mulher',
-        
-        # Saúde Bucal
-        'sb-primeira-consulta',
-        'sb-escovacao',
-        'sb-preventivos',
-        'sb-exodontias',
-        'sb-tratamento-concluido',
-        'sb-tratamento-atraumatico'
-    ]
-    
-    sucessos = 0
-    falhas = 0
-    
-    for indicador in indicadores:
-        comando = f"python src/python/mapa.py {indicador}"
-        
-        if executar_comando(comando, indicador):
-            sucessos += 1
-        else:
-            falhas += 1
-    
+    indicadores = args.indicadores or list(_GERADOR.indicadores_mapeamento.keys())
+
+    desconhecidos = [i for i in indicadores if i not in _GERADOR.indicadores_mapeamento]
+    if desconhecidos:
+        print(f"❌ Indicador(es) desconhecido(s): {', '.join(desconhecidos)}")
+        return False
+
+    # Carrega a geometria projetada uma única vez para todo o lote
+    # (o armazém colunar é reingerido a partir dos CSV se pedido, senão usa o existente)
+    inicio = time.perf_counter()
+    if not _GERADOR.preparar(ingerir=args.ingerir):
+        print("❌ Erro ao carregar dados das regiões")
+        return False
+    tempo_regioes = time.perf_counter() - inicio
+
+    jobs = args.jobs or min(len(indicadores), os.cpu_count() or 1)
+    jobs = max(1, min(jobs, len(indicadores)))
+
+    print(f"\n{'='*60}")
+    print(f"🔄 Gerando {len(indicadores)} indicador(es) com {jobs} worker(s)")
+    print(f"{'='*60}")
+
+    resumos = executar_lote(indicadores, jobs)
+
+    # Manifesto é atualizado só no processo principal
+    _GERADOR.registrar_no_manifesto(resumos)
+
+    # Composto da APS: matriz municípios x indicadores a partir de todos os payloads publicados
+    with _GERADOR.instrumentacao.etapa('composto') as medida:
+        composto = _GERADOR.gerar_composto(forcar=args.force)
+        medida['linhas'] = composto['municipios_processados'] if composto else 0
+
+    # Eventos da preparação (neste processo) + os de cada indicador (possivelmente em workers)
+    etapas = resumir_eventos(
+        list(_GERADOR.instrumentacao.eventos_indicador(None))
+        + [evento for resumo in resumos for evento in resumo.get('etapas', [])]
+    )
+
+    sucessos = sum(1 for r in resumos if r['sucesso'])
+    ignorados = sum(1 for r in resumos if r['ignorado'])
+    falhas = len(resumos) - sucessos
+    tempo_total = time.perf_counter() - inicio
+
     # Relatório final
     print(f"\n{'='*60}")
     print("📊 RELATÓRIO FINAL")
     print(f"{'='*60}")
-    print(f"✅ Sucessos: {sucessos}")
+    for resumo in resumos:
+        status = "⏭️ " if resumo['ignorado'] else "✅" if resumo['sucesso'] else "❌"
+        duracao = f"{resumo['duracao_s']:.2f}s" if resumo['duracao_s'] is not None else "-"
+        detalhe = f"{resumo['municipios_processados']} municipios" if resumo['sucesso'] else resumo['erro']
+        print(f"{status} {resumo['indicador']:<28} {duracao:>8}  {detalhe}")
+    print(f"{'-'*60}")
+    for resumo in resumos:
+        leitura = resumo.get('leitura')
+        if not leitura:
+            continue
+        if leitura['novos'] or leitura['modificados']:
+            print(f"📥 {resumo['indicador']}: {len(leitura['novos'])} CSV novo(s), "
+                  f"{len(leitura['modificados'])} modificado(s), {leitura['do_cache']} do cache")
+        for falha in leitura['falhas']:
+            print(f"⚠️  {resumo['indicador']}: {falha['arquivo']} - {falha['erro']}")
+        if leitura.get('consolidadas'):
+            print(f"📗 {resumo['indicador']}: planilha consolidada {', '.join(leitura['consolidadas'])}")
+        if leitura.get('substituidos'):
+            print(f"⚠️  {resumo['indicador']}: {len(leitura['substituidos'])} CSV substituído(s) pela planilha consolidada")
+        if leitura.get('prevalecem'):
+            print(f"⚠️  {resumo['indicador']}: CSV mais novos que a planilha - {', '.join(leitura['prevalecem'])}")
+        if leitura.get('faltantes'):
+            print(f"⚠️  {resumo['indicador']}: municípios faltantes - {', '.join(leitura['faltantes'])}")
+    if composto:
+        print(f"🏆 Composto: {len(composto['indicadores'])} indicadores, "
+              f"{composto['municipios_processados']} municipios"
+              f"{' (sem alterações)' if composto['ignorado'] else ''} - {composto['ranking_path']}")
+    print(f"✅ Sucessos: {sucessos} ({ignorados} sem alterações)")
     print(f"❌ Falhas: {falhas}")
     print(f"📊 Total: {len(indicadores)}")
+    print(f"⏱️  Regiões: {tempo_regioes:.2f}s | Total: {tempo_total:.2f}s")
+    for etapa, total in etapas.items():
+        print(f"   {etapa:<14} {total['chamadas']:>3}x {total['duracao_total_ms'] / 1000:>8.2f}s "
+              f"(máx. {total['duracao_max_ms'] / 1000:.2f}s)")
     print(f"🕒 Concluído em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-    
+
+    resumo_execucao = {
+        'sucessos': sucessos,
+        'ignorados': ignorados,
+        'falhas': falhas,
+        'jobs': jobs,
+        'duracao_regioes_s': round(tempo_regioes, 3),
+        'duracao_total_s': round(tempo_total, 3),
+        'etapas': etapas,
+        'composto': {chave: valor for chave, valor in composto.items() if chave != 'assinatura'} if composto else None
+    }
+    _GERADOR.instrumentacao.emitir({'evento': 'resumo', 'momento': datetime.now().isoformat(), **resumo_execucao})
+
+    if args.resumo:
+        with open(args.resumo, 'w', encoding='utf-8') as f:
+            json.dump({**resumo_execucao, 'indicadores': resumos}, f, ensure_ascii=False, indent=2)
+        print(f"📝 Resumo gravado em: {args.resumo}")
+
     if falhas == 0:
         print("\n🎉 Todos os SVGs foram gerados com sucesso!")
         print("📁 Arquivos disponíveis em:")
@@ -101,7 +329,10 @@ def main():
         print("   http://localhost:8080")
     else:
         print(f"\n⚠️  {falhas} indicador(es) falharam. Verifique os logs acima.")
-    
+
+    if args.watch:
+        return observar(indicadores, jobs, args.espera, args.intervalo)
+
     return falhas == 0
 
 if __name__ == "__main__":
@@ -113,4 +344,4 @@ if __name__ == "__main__":
         sys.exit(1)
     except Exception as e:
         print(f"\n❌ Erro inesperado: {e}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
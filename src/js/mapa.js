@@ -2,104 +2,89 @@ document.addEventListener('DOMContentLoaded', function() {
     const mapaContainer = document.getElementById('mapa-container');
     const legendaContainer = document.getElementById('legenda-container');
     const legendaItems = document.querySelector('.legenda-items');
+    const equipesContainer = document.getElementById('equipes-container');
     const backButton = document.getElementById('back-to-filters');
     const containerMain = document.querySelector('.container');
     
     let currentFilters = null;
     let mapaData = null;
     let svgMapaCarregado = false;
+    let topologiasPromise = {};
+    let equipesPromise = {};
+    // Indicadores cujo detalhamento não foi publicado (sem arquivo estático nem servidor): sem novas buscas
+    const equipesIndisponiveis = new Set();
 
-    const ALL_MUNICIPALITIES_MS = [
-        'ÁGUA CLARA', 'ALCINÓPOLIS', 'AMAMBAÍ', 'ANASTÁCIO', 'ANAURILÂNDIA', 'ANGÉLICA', 'ANTÔNIO JOÃO',
-        'APARECIDA DO TABOADO', 'AQUIDAUANA', 'ARAL MOREIRA', 'BANDEIRANTES', 'BATAGUASSU', 'BATAYPORÃ',
-        'BELA VISTA', 'BODOQUENA', 'BONITO', 'BRASILÂNDIA', 'CAARAPÓ', 'CAMAPUÃ', 'CAMPO GRANDE',
-        'CARACOL', 'CASSILÂNDIA', 'CHAPADÃO DO SUL', 'CORGUINHO', 'CORONEL SAPUCAIA', 'CORUMBÁ',
-        'COSTA RICA', 'COXIM', 'DEODÁPOLIS', 'DOIS IRMÃOS DO BURITI', 'DOURADINA', 'DOURADOS',
-        'ELDORADO', 'FÁTIMA DO SUL', 'FIGUEIRÃO', 'GLÓRIA DE DOURADOS', 'GUIA LOPES DA LAGUNA',
-        'IGUATEMI', 'INOCÊNCIA', 'ITAPORÃ', 'ITAQUIRAI', 'IVINHEMA', 'JAPORÃ', 'JARAGUARI', 'JARDIM',
-        'JATEÍ', 'JUTI', 'LADÁRIO', 'LAGUNA CARAPÃ', 'MARACAJU', 'MIRANDA', 'MUNDO NOVO', 'NAVIRAÍ',
-        'NIOAQUE', 'NOVA ALVORADA DO SUL', 'NOVA ANDRADINA', 'NOVO HORIZONTE DO SUL', 'PARAÍSO DAS ÁGUAS',
-        'PARANAÍBA', 'PARANHOS', 'PEDRO GOMES', 'PONTA PORÃ', 'PORTO MURTINHO', 'RIBAS DO RIO PARDO',
-        'RIO BRILHANTE', 'RIO NEGRO', 'RIO VERDE DE MATO GROSSO', 'ROCHEDO', 'SANTA RITA DO PARDO',
-        'SÃO GABRIEL DO OESTE', 'SELVÍRIA', 'SETE QUEDAS', 'SIDROLÂNDIA', 'SONORA', 'TACURU',
-        'TAQUARUSSU', 'TERENOS', 'TRÊS LAGOAS', 'VICENTINA'
-    ];
+    // Gerados por src/python/mapa.py (gerar_topologia / gerar_payload_web)
+    const TOPOLOGIA_PATH = '/src/data/municipios.topo.json';
+    const TOPOLOGIA_PASTA = '/src/data/';
+    const ZOOM_MAXIMO = 40;
+    const SVG_NS = 'http://www.w3.org/2000/svg';
 
     const INDICATOR_PATHS = {
         'emulti-acoes': {
             name: 'Ações Interprofissionais da eMulti',
-            folder: 'EQUIPES MULTIPROFISSIONAIS NA APS/AÇÕES INTERPROFISSIONAIS DA EMULTI',
-            files: Array.from({ length: 39 }, (_, i) => `relatorio-visao-competencia (${i + 1}).csv`)
+            folder: 'EQUIPES MULTIPROFISSIONAIS NA APS/AÇÕES INTERPROFISSIONAIS DA EMULTI'
         },
         'emulti-media': {
             name: 'Média de Atendimento da eMulti por Pessoa',
-            folder: 'EQUIPES MULTIPROFISSIONAIS NA APS/MÉDIA DE ATENDIMENTO DA EMULTI POR PESSOA',
-            files: ALL_MUNICIPALITIES_MS.map(mun => `${mun}.csv`)
+            folder: 'EQUIPES MULTIPROFISSIONAIS NA APS/MÉDIA DE ATENDIMENTO DA EMULTI POR PESSOA'
         },
         'esf-desenvolvimento': {
             name: 'Desenvolvimento Infantil',
-            folder: 'ESTRATÉGIA SAÚDE DA FAMILIA NA APS/DESENVOLVIMENTO INFANTIL',
-            files: ALL_MUNICIPALITIES_MS.map(mun => `${mun}.csv`)
+            folder: 'ESTRATÉGIA SAÚDE DA FAMILIA NA APS/DESENVOLVIMENTO INFANTIL'
         },
         'esf-diabetes': {
             name: 'Cuidado da pessoa com Diabetes',
-            folder: 'ESTRATÉGIA SAÚDE DA FAMILIA NA APS/DIABETES',
-            files: ALL_MUNICIPALITIES_MS.map(mun => `${mun}.csv`)
+            folder: 'ESTRATÉGIA SAÚDE DA FAMILIA NA APS/DIABETES'
         },
         'esf-gestante': {
             name: 'Gestante e Puérpera',
-            folder: 'ESTRATÉGIA SAÚDE DA FAMILIA NA APS/GESTANTE E PUÉRPERA',
-            files: ALL_MUNICIPALITIES_MS.map(mun => `${mun}.csv`)
+            folder: 'ESTRATÉGIA SAÚDE DA FAMILIA NA APS/GESTANTE E PUÉRPERA'
         },
         'esf-hipertensao': {
             name: 'Hipertensão Arterial',
-            folder: 'ESTRATÉGIA SAÚDE DA FAMILIA NA APS/HIPERTENSÃO ARTERIAL',
-            files: ALL_MUNICIPALITIES_MS.map(mun => `${mun}.csv`)
+            folder: 'ESTRATÉGIA SAÚDE DA FAMILIA NA APS/HIPERTENSÃO ARTERIAL'
         },
         'esf-mais-acesso': {
             name: 'Mais Acesso',
-            folder: 'ESTRATÉGIA SAÚDE DA FAMILIA NA APS/MAIS ACESSO',
-            files: ALL_MUNICIPALITIES_MS.map(mun => `${mun}.csv`)
+            folder: 'ESTRATÉGIA SAÚDE DA FAMILIA NA APS/MAIS ACESSO'
         },
         'esf-idosa': {
             name: 'Pessoa Idosa',
-            folder: 'ESTRATÉGIA SAÚDE DA FAMILIA NA APS/PESSOA IDOSA',
-            files: ALL_MUNICIPALITIES_MS.map(mun => `${mun}.csv`)
+            folder: 'ESTRATÉGIA SAÚDE DA FAMILIA NA APS/PESSOA IDOSA'
         },
         'esf-cancer-mulher': {
             name: 'Prevenção do Câncer na Mulher',
-            folder: 'ESTRATÉGIA SAÚDE DA FAMILIA NA APS/PREVENÇÃO DO CÂNCER NA MULHER',
-            files: ALL_MUNICIPALITIES_MS.map(mun => `${mun}.csv`)
+            folder: 'ESTRATÉGIA SAÚDE DA FAMILIA NA APS/PREVENÇÃO DO CÂNCER NA MULHER'
         },
         'sb-primeira-consulta': {
             name: '1ª Consulta Odontológica',
-            folder: 'SAÚDE BUCAL NA APS/1ª CONSULTA ODONTOLÓGICA',
-            files: ALL_MUNICIPALITIES_MS.map(mun => `${mun}.csv`)
+            folder: 'SAÚDE BUCAL NA APS/1ª CONSULTA ODONTOLÓGICA'
         },
         'sb-escovacao': {
             name: 'Escovação Supervisionada',
-            folder: 'SAÚDE BUCAL NA APS/ESCOVAÇÃO SUPERVISIONADA',
-            files: ALL_MUNICIPALITIES_MS.map(mun => `${mun}.csv`)
+            folder: 'SAÚDE BUCAL NA APS/ESCOVAÇÃO SUPERVISIONADA'
         },
         'sb-preventivos': {
             name: 'Procedimentos Odontológicos Preventivos',
-            folder: 'SAÚDE BUCAL NA APS/PROCEDIMENTOS ODONTOLÓGICOS PREVENTIVOS',
-            files: ALL_MUNICIPALITIES_MS.map(mun => `${mun}.csv`)
+            folder: 'SAÚDE BUCAL NA APS/PROCEDIMENTOS ODONTOLÓGICOS PREVENTIVOS'
         },
         'sb-exodontias': {
             name: 'Taxa de Exodontias',
-            folder: 'SAÚDE BUCAL NA APS/TAXA DE EXODONTIAS',
-            files: ALL_MUNICIPALITIES_MS.map(mun => `${mun}.csv`)
+            folder: 'SAÚDE BUCAL NA APS/TAXA DE EXODONTIAS'
         },
         'sb-tratamento-concluido': {
             name: 'Tratamento Odontológico Concluído',
-            folder: 'SAÚDE BUCAL NA APS/TRATAMENTO ODONTOLÓGICO CONCLUIDO',
-            files: ALL_MUNICIPALITIES_MS.map(mun => `${mun}.csv`)
+            folder: 'SAÚDE BUCAL NA APS/TRATAMENTO ODONTOLÓGICO CONCLUIDO'
         },
         'sb-tratamento-atraumatico': {
             name: 'Tratamento Restaurador Atraumático',
-            folder: 'SAÚDE BUCAL NA APS/TRATAMENTO RESTAURADOR ATRAUMATICO',
-            files: ALL_MUNICIPALITIES_MS.map(mun => `${mun}.csv`)
+            folder: 'SAÚDE BUCAL NA APS/TRATAMENTO RESTAURADOR ATRAUMATICO'
+        },
+        // Percentis de todos os indicadores combinados (gerar_composto; ranking em /src/data/ranking.json)
+        'composto': {
+            name: 'Desempenho Geral da APS',
+            folder: null
         }
     };
 
@@ -173,28 +158,23 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
-    async function carregarDadosRegioes() {
-        const regioes = ['baixopantanal', 'centro', 'centrosul', 'leste', 'nordeste', 'norte', 'pantanal', 'sudeste', 'sulfronteira'];
-        const promises = regioes.map(async regiao => {
-            try {
-                const response = await fetch(`/REGIAO/${regiao}.json`);
-                if (!response.ok) throw new Error(`HTTP ${response.status}`);
-                const data = await response.json();
-                return { regiao, data };
-            } catch (error) {
-                console.error(`Erro ao carregar ${regiao}:`, error);
-                return { regiao, data: null };
-            }
-        });
-
-        const resultados = await Promise.all(promises);
-        const regioesDados = {};
-        
-        resultados.forEach(({ regiao, data }) => {
-            if (data) regioesDados[regiao] = data;
-        });
+    function carregarTopologia(caminho = TOPOLOGIA_PATH) {
+        // Uma única requisição por nível de detalhe e sessão, compartilhada entre os indicadores
+        if (!topologiasPromise[caminho]) {
+            topologiasPromise[caminho] = fetch(caminho).then(response => {
+                if (!response.ok) throw new Error(`Topologia não encontrada: ${response.status}`);
+                return response.json();
+            }).catch(error => {
+                delete topologiasPromise[caminho];
+                throw error;
+            });
+        }
+        return topologiasPromise[caminho];
+    }
 
-        return regioesDados;
+    function nivelParaZoom(niveis, zoom) {
+        // Nível mais leve que ainda atende a ampliação (zoom_max nulo = sem limite)
+        return niveis.find(nivel => nivel.zoom_max === null || zoom <= nivel.zoom_max) || niveis[niveis.length - 1];
     }
 
     async function loadIndicatorData(indicatorId) {
@@ -202,76 +182,296 @@ document.addEventListener('DOMContentLoaded', function() {
             throw new Error(`Indicador não encontrado: ${indicatorId}`);
         }
 
-        const indicatorConfig = INDICATOR_PATHS[indicatorId];
-        const promises = indicatorConfig.files.map(async fileName => {
-            try {
-                const filePath = `/${indicatorConfig.folder}/${fileName}`;
-                const response = await fetch(filePath);
-                if (!response.ok) return null;
-                return await response.text();
-            } catch (error) {
-                return null;
-            }
+        // Payload pré-gerado; se ainda não existir, pede ao servidor (src/python/servidor.py)
+        let response = await fetch(`/src/data/${indicatorId}_web.json`);
+        if (!response.ok) response = await fetch(`/api/indicador/${indicatorId}`);
+        if (!response.ok) {
+            throw new Error(`Dados não encontrados para ${indicatorId}: ${response.status}`);
+        }
+
+        const payload = await response.json();
+        return {
+            indicador: indicatorId,
+            nome: payload.nome || INDICATOR_PATHS[indicatorId].name,
+            competencia: payload.competencia,
+            estatisticas: payload.estatisticas,
+            faixas: payload.faixas,
+            // Método (fixo, quantil, jenks) e direção das faixas; unidade exibida após a pontuação
+            classificacao: payload.classificacao,
+            unidade: payload.unidade !== undefined ? payload.unidade : '%',
+            semDados: payload.sem_dados,
+            municipios: payload.pontuacoes,
+            serie: payload.serie,
+            // Agregados pré-calculados por RGI, RGINT, região e estado (somas das equipes)
+            regionais: payload.regionais,
+            // Pasta (relativa a src/data) com um arquivo de equipes por município; null no composto
+            equipes: payload.equipes !== undefined ? payload.equipes : `equipes/${indicatorId}`
+        };
+    }
+
+    function carregarEquipes(dadosIndicador, codigo) {
+        // Um arquivo pequeno por município, buscado só no clique; sem o arquivo estático, pede ao servidor
+        const chave = `${dadosIndicador.indicador}/${codigo}`;
+        if (!equipesPromise[chave]) {
+            equipesPromise[chave] = fetch(`${TOPOLOGIA_PASTA}${dadosIndicador.equipes}/${codigo}.json`)
+                .then(response => response.ok ? response : fetch(`/api/equipes/${chave}`))
+                .then(response => {
+                    if (!response.ok) {
+                        // Município com pontuação sem arquivo nem API: a pasta do indicador não foi publicada
+                        if (response.status === 404) equipesIndisponiveis.add(dadosIndicador.indicador);
+                        throw new Error(`Equipes não encontradas: ${response.status}`);
+                    }
+                    return response.json();
+                })
+                .catch(error => {
+                    delete equipesPromise[chave];
+                    throw error;
+                });
+        }
+        return equipesPromise[chave];
+    }
+
+    function escaparHtml(valor) {
+        return String(valor ?? '').replace(/[&<>"']/g, c => ({
+            '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+        })[c]);
+    }
+
+    function formatarNumero(valor, casas = 1) {
+        return valor === null || valor === undefined ? '–' : valor.toLocaleString('pt-BR', {
+            minimumFractionDigits: 0, maximumFractionDigits: casas
         });
+    }
 
-        const results = await Promise.all(promises);
-        const validResults = results.filter(result => result !== null);
-        
-        if (validResults.length === 0) {
-            throw new Error(`Nenhum arquivo CSV encontrado para ${indicatorId}`);
+    function exibirEquipes(detalhe) {
+        // Equipes da pior para a melhor; efeito = quanto a equipe move a pontuação do município
+        const conteudo = equipesContainer.querySelector('.equipes-conteudo');
+        equipesContainer.querySelector('h2').textContent =
+            `Equipes - ${detalhe.nome} (${formatarNumero(detalhe.pontuacao)}${detalhe.competencia ? ', ' + detalhe.competencia : ''})`;
+
+        const linhas = detalhe.equipes.map(equipe => {
+            const componentes = detalhe.componentes.map((nome, i) =>
+                `<li>${escaparHtml(nome)}: <strong>${formatarNumero(equipe.componentes[i], 2)}</strong></li>`
+            ).join('');
+            const classeEfeito = equipe.efeito !== null && equipe.efeito < 0 ? 'efeito-negativo' : '';
+            return `
+                <tr>
+                    <td>${escaparHtml(equipe.equipe)} <small>(${escaparHtml(equipe.sigla)}, INE ${escaparHtml(equipe.ine)})</small></td>
+                    <td>${escaparHtml(equipe.estabelecimento)} <small>(CNES ${escaparHtml(equipe.cnes)})</small></td>
+                    <td class="numero">${formatarNumero(equipe.pontuacao)}</td>
+                    <td class="numero ${classeEfeito}">${equipe.efeito > 0 ? '+' : ''}${formatarNumero(equipe.efeito, 2)}</td>
+                    <td>${componentes ? `<details><summary>${detalhe.componentes.length}</summary><ul>${componentes}</ul></details>` : ''}</td>
+                </tr>
+            `;
+        }).join('');
+
+        conteudo.innerHTML = `
+            <table class="equipes-tabela">
+                <thead>
+                    <tr><th>Equipe</th><th>Estabelecimento</th><th>Pontuação</th><th>Efeito no município</th><th>Componentes</th></tr>
+                </thead>
+                <tbody>${linhas}</tbody>
+            </table>
+        `;
+        equipesContainer.hidden = false;
+    }
+
+    async function mostrarEquipes(dadosIndicador, codigo) {
+        if (!equipesContainer || !codigo || !dadosIndicador.equipes) return;
+        if (equipesIndisponiveis.has(dadosIndicador.indicador)) {
+            equipesContainer.hidden = true;
+            return;
         }
+        try {
+            exibirEquipes(await carregarEquipes(dadosIndicador, codigo));
+            equipesContainer.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+        } catch (error) {
+            console.warn('Detalhamento por equipe indisponível:', error);
+            equipesContainer.hidden = true;
+        }
+    }
 
-        const municipalData = {};
-        
-        validResults.forEach(csvText => {
-            const lines = csvText.split('\n');
-            lines.slice(15).forEach(line => {
-                const trimmedLine = line.trim();
-                if (!trimmedLine) return;
-                
-                const columns = trimmedLine.split('|').map(col => col.trim());
-                if (columns.length < 2) return;
-                
-                const municipalInfo = columns[0];
-                const scoreStr = columns[columns.length - 1];
-                
-                if (municipalInfo && municipalInfo.includes('/')) {
-                    const municipalName = municipalInfo.split('/')[1].trim().toUpperCase();
-                    const score = parseFloat(scoreStr);
-                    
-                    if (!isNaN(score) && municipalName) {
-                        if (!municipalData[municipalName] || municipalData[municipalName] < score) {
-                            municipalData[municipalName] = score;
-                        }
-                    }
-                }
+    function pontuacaoMunicipio(dadosIndicador, codigo) {
+        // Topologia, SVG e payload usam o mesmo CD_MUN (7 dígitos)
+        return codigo ? dadosIndicador.municipios[codigo] : undefined;
+    }
+
+    function tendenciaMunicipio(dadosIndicador, codigo) {
+        // Variação e ranking pré-calculados pelo gerador (série por competência)
+        const serie = dadosIndicador.serie;
+        const municipio = serie && serie.municipios[codigo];
+        if (!municipio || serie.competencias.length < 2) return '';
+
+        const ultima = serie.competencias.length - 1;
+        const variacao = municipio.variacao[ultima];
+        const ranking = municipio.ranking[ultima];
+        const partes = [];
+        if (variacao !== null) {
+            partes.push(`Variação desde ${serie.competencias[ultima - 1]}: ${variacao > 0 ? '+' : ''}${variacao.toFixed(1)}`);
+        }
+        if (ranking !== null) partes.push(`Posição: ${ranking}º`);
+        return partes.length ? `<br>${partes.join('<br>')}` : '';
+    }
+
+    function resumoRegional(dadosIndicador, regiao) {
+        // Pontuação da região recalculada das equipes pelo gerador (não é a média dos municípios)
+        const agregado = dadosIndicador.regionais && dadosIndicador.regionais.regiao[regiao];
+        if (!agregado || agregado.pontuacao === null) return '';
+        return `<br>Região ${REGION_DISPLAY_NAMES[regiao] || regiao}: ${agregado.pontuacao.toFixed(1)} ` +
+            `(${agregado.municipios} municípios, ${agregado.equipes} equipes)`;
+    }
+
+    function corPorPontuacao(dadosIndicador, score) {
+        if (score === undefined || score === null) return dadosIndicador.semDados;
+        const faixa = dadosIndicador.faixas.find(([limite]) => score >= limite);
+        return faixa ? faixa[1] : dadosIndicador.faixas[dadosIndicador.faixas.length - 1][1];
+    }
+
+    function decodificarArcos(topologia) {
+        const [escalaX, escalaY] = topologia.transform.scale;
+        const [deslocX, deslocY] = topologia.transform.translate;
+
+        return topologia.arcs.map(arco => {
+            let x = 0, y = 0;
+            return arco.map(([dx, dy]) => {
+                x += dx;
+                y += dy;
+                return [x * escalaX + deslocX, y * escalaY + deslocY];
             });
         });
+    }
 
-        return {
-            indicador: indicatorId,
-            nome: indicatorConfig.name,
-            municipios: municipalData
-        };
+    function caminhoGeometria(geometria, arcos, casas = 1) {
+        const poligonos = geometria.type === 'MultiPolygon' ? geometria.arcs : [geometria.arcs];
+        const partes = [];
+
+        poligonos.forEach(aneis => aneis.forEach(anel => {
+            const pontos = [];
+            anel.forEach(indice => {
+                const arco = indice >= 0 ? arcos[indice] : arcos[~indice].slice().reverse();
+                // O primeiro ponto de cada arco repete o último do anterior
+                (pontos.length ? arco.slice(1) : arco).forEach(ponto => pontos.push(ponto));
+            });
+            if (pontos.length < 3) return;
+            partes.push('M' + pontos.map(([x, y]) => `${x.toFixed(casas)},${y.toFixed(casas)}`).join('L') + 'Z');
+        }));
+
+        return partes.join('');
     }
 
-    function gerarLegenda(dadosIndicador) {
-        if (!legendaItems || !dadosIndicador.municipios) return;
+    function preencherMunicipios(grupo, topologia, dadosIndicador) {
+        const arcos = decodificarArcos(topologia);
+        // Casas decimais suficientes para a grade de quantização do nível
+        const casas = Math.max(1, Math.ceil(-Math.log10(topologia.transform.scale[0])));
+
+        grupo.replaceChildren();
+        topologia.objects.municipios.geometries.forEach(geometria => {
+            const score = pontuacaoMunicipio(dadosIndicador, geometria.id);
+            const path = document.createElementNS(SVG_NS, 'path');
+            path.setAttribute('d', caminhoGeometria(geometria, arcos, casas));
+            path.setAttribute('class', 'municipio');
+            path.setAttribute('fill', corPorPontuacao(dadosIndicador, score));
+            path.setAttribute('fill-rule', 'evenodd');
+            path.setAttribute('stroke', '#ffffff');
+            path.setAttribute('stroke-width', '0.8');
+            path.setAttribute('vector-effect', 'non-scaling-stroke');
+            path.setAttribute('data-codigo', geometria.id);
+            path.setAttribute('data-nome', geometria.properties.nome || '');
+            path.setAttribute('data-regiao', geometria.properties.regiao || '');
+            grupo.appendChild(path);
+        });
+    }
 
-        const scores = Object.values(dadosIndicador.municipios);
-        if (scores.length === 0) return;
+    function renderizarTopologia(topologia, dadosIndicador) {
+        const [, , largura, altura] = topologia.bbox || [0, 0, 1000, 700];
 
-        const minScore = Math.min(...scores);
-        const maxScore = Math.max(...scores);
-        const avgScore = scores.reduce((a, b) => a + b, 0) / scores.length;
+        const svgElement = document.createElementNS(SVG_NS, 'svg');
+        svgElement.setAttribute('viewBox', `0 0 ${largura} ${altura}`);
+        svgElement.setAttribute('id', `mapa-${dadosIndicador.indicador}`);
 
-        const legendaConfig = [
-            { range: '80-100', color: '#2E7D32', label: 'Excelente' },
-            { range: '70-79', color: '#66BB6A', label: 'Bom' },
-            { range: '50-69', color: '#FFA726', label: 'Regular' },
-            { range: '30-49', color: '#FF7043', label: 'Ruim' },
-            { range: '0-29', color: '#D32F2F', label: 'Crítico' }
-        ];
+        // Mesmo deslocamento do SVG gerado em Python (espaço para o título)
+        const grupo = document.createElementNS(SVG_NS, 'g');
+        grupo.setAttribute('id', 'municipios');
+        grupo.setAttribute('transform', 'translate(0, 50)');
+        preencherMunicipios(grupo, topologia, dadosIndicador);
+
+        svgElement.appendChild(grupo);
+        return svgElement;
+    }
+
+    function configurarZoom(svgElement, topologia, dadosIndicador) {
+        // Roda do mouse amplia em torno do cursor; duplo clique volta ao estado inteiro.
+        // Ao cruzar o zoom_max do nível atual, carrega a topologia mais detalhada (ou mais leve)
+        const niveis = topologia.niveis || [];
+        const [, , largura, altura] = topologia.bbox || [0, 0, 1000, 700];
+        let nivelAtual = topologia.nivel || 'estado';
+        let nivelPedido = nivelAtual;
+
+        async function trocarNivel(zoom) {
+            if (!niveis.length) return;
+            const nivel = nivelParaZoom(niveis, zoom);
+            if (nivel.nivel === nivelPedido) return;
+            nivelPedido = nivel.nivel;
+
+            try {
+                const detalhada = await carregarTopologia(TOPOLOGIA_PASTA + nivel.arquivo);
+                // Outro nível pode ter sido pedido enquanto este carregava
+                if (nivelPedido !== nivel.nivel) return;
+                preencherMunicipios(svgElement.querySelector('#municipios'), detalhada, dadosIndicador);
+                configurarInteratividadeSVG(svgElement, dadosIndicador);
+                nivelAtual = nivel.nivel;
+            } catch (error) {
+                console.warn(`Nível de detalhe '${nivel.nivel}' indisponível:`, error);
+                nivelPedido = nivelAtual;
+            }
+        }
+
+        function aplicarViewBox(x, y, zoom) {
+            const w = largura / zoom;
+            const h = altura / zoom;
+            x = Math.min(Math.max(x, 0), largura - w);
+            y = Math.min(Math.max(y, 0), altura - h);
+            svgElement.setAttribute('viewBox', `${x} ${y} ${w} ${h}`);
+            trocarNivel(zoom);
+        }
+
+        svgElement.addEventListener('wheel', (e) => {
+            e.preventDefault();
+            const [x, y, w, h] = svgElement.getAttribute('viewBox').split(' ').map(Number);
+            const zoom = Math.min(Math.max(largura / w * (e.deltaY < 0 ? 1.25 : 0.8), 1), ZOOM_MAXIMO);
+
+            // O ponto sob o cursor permanece no lugar
+            const rect = svgElement.getBoundingClientRect();
+            const px = x + (e.clientX - rect.left) / rect.width * w;
+            const py = y + (e.clientY - rect.top) / rect.height * h;
+            const escala = (largura / zoom) / w;
+            aplicarViewBox(px - (px - x) * escala, py - (py - y) * escala, zoom);
+        }, { passive: false });
+
+        svgElement.addEventListener('dblclick', () => aplicarViewBox(0, 0, 1));
+    }
+
+    function gerarLegenda(dadosIndicador) {
+        if (!legendaItems || !dadosIndicador.municipios) return;
+
+        const stats = dadosIndicador.estatisticas;
+        if (!stats || !stats.municipios) return;
+
+        const minScore = stats.minima;
+        const maxScore = stats.maxima;
+        const avgScore = stats.media;
+        const estado = dadosIndicador.regionais && dadosIndicador.regionais.estado;
+
+        // Faixas exportadas pelo gerador Python (mesmas cores do SVG); o limite superior vem no
+        // payload porque as quebras de quantil/Jenks não seguem a escala 0-100 (payloads antigos: 0-100)
+        const legendaConfig = dadosIndicador.faixas.map(([limite, color, label, superior], i, faixas) => ({
+            range: superior !== undefined
+                ? `${formatarNumero(limite, 2)} – ${formatarNumero(superior, 2)}`
+                : (i === 0 ? `${limite}-100` : `${limite}-${faixas[i - 1][0] - 1}`),
+            color,
+            label
+        }));
+        const classificacao = dadosIndicador.classificacao;
 
         legendaItems.innerHTML = `
             <div class="indicator-info">
@@ -280,7 +480,9 @@ document.addEventListener('DOMContentLoaded', function() {
                     <span>Mín: ${minScore.toFixed(1)}</span>
                     <span>Máx: ${maxScore.toFixed(1)}</span>
                     <span>Média: ${avgScore.toFixed(1)}</span>
+                    ${estado && estado.pontuacao !== null ? `<span>Estado: ${estado.pontuacao.toFixed(1)}</span>` : ''}
                 </div>
+                ${classificacao && classificacao.direcao === 'menor' ? '<small>Quanto menor, melhor</small>' : ''}
             </div>
             ${legendaConfig.map(item => `
                 <div class="legenda-item">
@@ -313,24 +515,32 @@ document.addEventListener('DOMContentLoaded', function() {
         showInfo(`
             <strong>Gerando mapa SVG...</strong><br>
             Indicador: ${INDICATOR_PATHS[indicatorId]?.name || indicatorId}<br>
-            <em>O mapa está sendo processado em background.</em><br>
             <small>Isso pode levar alguns segundos...</small>
         `, 'info', 0);
+
+        // O servidor gera o mapa sob demanda e o mantém em cache enquanto os CSV não mudarem
+        const response = await fetch(`/api/indicador/${indicatorId}.svg`);
+        document.querySelectorAll('.info-message').forEach(msg => msg.remove());
+        if (!response.ok) {
+            throw new Error(`Servidor não gerou o mapa: ${response.status}`);
+        }
+        return await response.text();
     }
 
     function configurarInteratividadeSVG(svgElement, dadosIndicador) {
-        const paths = svgElement.querySelectorAll('path[data-municipio]');
+        const paths = svgElement.querySelectorAll('[data-codigo]');
         
         paths.forEach(path => {
-            const municipio = path.getAttribute('data-municipio');
-            const score = dadosIndicador.municipios[municipio];
+            const municipio = path.getAttribute('data-nome');
+            const score = pontuacaoMunicipio(dadosIndicador, path.getAttribute('data-codigo'));
+            const tendencia = tendenciaMunicipio(dadosIndicador, path.getAttribute('data-codigo'));
             
             if (score !== undefined) {
                 path.addEventListener('mouseenter', (e) => {
                     const tooltip = document.getElementById('mapa-tooltip') || createTooltip();
                     tooltip.innerHTML = `
                         <strong>${municipio}</strong><br>
-                        ${dadosIndicador.nome}: ${score.toFixed(1)}
+                        ${dadosIndicador.nome}: ${score.toFixed(1)}${dadosIndicador.unidade}${tendencia}
                     `;
                     tooltip.style.display = 'block';
                     updateTooltipPosition(e, tooltip);
@@ -349,9 +559,10 @@ document.addEventListener('DOMContentLoaded', function() {
                 path.addEventListener('click', () => {
                     showInfo(`
                         <strong>${municipio}</strong><br>
-                        ${dadosIndicador.nome}: <strong>${score.toFixed(1)}/100</strong><br>
+                        ${dadosIndicador.nome}: <strong>${score.toFixed(1)}${dadosIndicador.unidade}</strong>${tendencia}${resumoRegional(dadosIndicador, path.getAttribute('data-regiao'))}<br>
                         <small>Clique fora para fechar</small>
                     `, 'info', 8000);
+                    mostrarEquipes(dadosIndicador, path.getAttribute('data-codigo'));
                 });
             }
         });
@@ -378,12 +589,23 @@ document.addEventListener('DOMContentLoaded', function() {
         try {
             mapaContainer.innerHTML = '<div class="loading">Carregando mapa...</div>';
             
-            const [svgContent, dadosIndicador] = await Promise.all([
-                carregarSVGMapa(indicatorId),
+            const [topologia, dadosIndicador] = await Promise.all([
+                carregarTopologia().catch(error => {
+                    console.warn('Topologia indisponível, usando o SVG pré-gerado:', error);
+                    return null;
+                }),
                 loadIndicatorData(indicatorId)
             ]);
 
-            mapaContainer.innerHTML = svgContent;
+            if (topologia) {
+                mapaContainer.innerHTML = '';
+                const svgTopologia = renderizarTopologia(topologia, dadosIndicador);
+                mapaContainer.appendChild(svgTopologia);
+                configurarZoom(svgTopologia, topologia, dadosIndicador);
+            } else {
+                mapaContainer.innerHTML = await carregarSVGMapa(indicatorId)
+                    .catch(() => gerarSVGViaPython(indicatorId));
+            }
             const svgElement = mapaContainer.querySelector('svg');
             
             if (svgElement) {
@@ -401,20 +623,17 @@ document.addEventListener('DOMContentLoaded', function() {
         } catch (error) {
             console.error('Erro ao renderizar mapa:', error);
             mapaContainer.innerHTML = '<div class="error">Erro ao carregar o mapa</div>';
-            
-            if (error.message.includes('SVG não encontrado')) {
-                await gerarSVGViaPython(indicatorId);
-            } else {
-                showInfo(`Erro: ${error.message}`, 'error', 5000);
-            }
+            showInfo(`Erro: ${error.message}`, 'error', 5000);
         }
     }
 
     async function inicializarMapa() {
         try {
             currentFilters = await loadFiltersFromStorage();
+            // filtros.js grava o código do mapa em 'subindicator' (ou em 'indicator', no composto)
+            const indicatorId = currentFilters && (currentFilters.subindicator || currentFilters.indicator);
             
-            if (!currentFilters || !currentFilters.indicador) {
+            if (!indicatorId) {
                 showInfo('Nenhum filtro selecionado. Retornando aos filtros.', 'warning', 3000);
                 setTimeout(() => {
                     window.location.href = '/src/html/filtros.html';
@@ -423,9 +642,9 @@ document.addEventListener('DOMContentLoaded', function() {
             }
 
             document.querySelector('.header h1').textContent = 
-                INDICATOR_PATHS[currentFilters.indicador]?.name || 'Mapa de Indicadores';
+                INDICATOR_PATHS[indicatorId]?.name || 'Mapa de Indicadores';
 
-            await renderizarMapaSVG(currentFilters.indicador);
+            await renderizarMapaSVG(indicatorId);
 
         } catch (error) {
             console.error('Erro na inicialização:', error);
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Armazém colunar dos indicadores SIAPS
+Descrição: Converte as pastas de relatórios CSV de todos os indicadores em uma
+única tabela tipada (indicador x município x competência x equipe), gravada em
+Parquet quando pyarrow/fastparquet estiver disponível ou em pickle do pandas
+caso contrário. A geração de SVG/JSON lê desta tabela em vez de reprocessar
+os CSV. Os nomes dos componentes de cada indicador (colunas entre a
+identificação da equipe e a pontuação) ficam nos metadados
+
+Uso: python src/python/armazem.py [indicador ...]
+"""
+
+import os
+import sys
+import json
+import argparse
+import pandas as pd
+from datetime import datetime
+
+import siaps
+import leitura
+import manifesto
+
+# Incrementar quando as colunas ou a tipagem mudarem
+VERSAO_ARMAZEM = 2
+
+COLUNAS_ARMAZEM = [
+    'indicador', 'competencia', 'codigo_ibge', 'nome_municipio', 'cnes', 'estabelecimento', 'ine', 'nome_equipe',
+    'tipo_equipe', 'numerador', 'denominador', 'pontuacao', 'componentes', 'arquivo_origem'
+]
+
+COLUNAS_CATEGORICAS = ['indicador', 'competencia', 'codigo_ibge', 'nome_municipio', 'tipo_equipe', 'arquivo_origem']
+
+ARQUIVO_META = 'armazem.json'
+
+
+def formato_disponivel():
+    """'parquet' se houver um engine instalado, senão 'pickle'"""
+    for modulo in ('pyarrow', 'fastparquet'):
+        try:
+            __import__(modulo)
+            return 'parquet'
+        except ImportError:
+            continue
+    return 'pickle'
+
+
+def registros_relatorio(relatorio, indicador):
+    """Linhas do armazém para as equipes de um relatório (ver leitura.colunas_relatorio)"""
+    if relatorio.equipes.empty:
+        return pd.DataFrame(columns=COLUNAS_ARMAZEM)
+    return pd.DataFrame({'indicador': indicador, **leitura.colunas_relatorio(relatorio)}, columns=COLUNAS_ARMAZEM)
+
+
+def ler_pasta(pasta, indicador, log=print, ler_relatorios=None):
+    """Lê todos os relatórios de uma pasta; devolve (frame, arquivos lidos, nomes dos componentes)
+
+    ler_relatorios: pasta -> leitura.LeituraPasta (padrão: leitura paralela sem cache)
+    """
+    arquivos = leitura.arquivos_relatorios(pasta)
+    if ler_relatorios is not None:
+        lidos = ler_relatorios(pasta)
+    else:
+        lidos = leitura.ler_relatorios(arquivos)
+        for arquivo_csv, erro in lidos.falhas:
+            log(f"Erro processando {arquivo_csv.name}: {erro}")
+
+    for arquivo_csv in lidos.sem_municipio():
+        log(f"Município não identificado no preâmbulo: {arquivo_csv.name}")
+
+    frame = lidos.tabela()
+    if frame.empty:
+        return pd.DataFrame(columns=COLUNAS_ARMAZEM), arquivos, []
+
+    return frame.assign(indicador=indicador).reindex(columns=COLUNAS_ARMAZEM), arquivos, lidos.componentes()
+
+
+def tipar(frame):
+    """Tipos compactos: categorias para colunas repetitivas, float64 para as medidas"""
+    frame = frame.reindex(columns=COLUNAS_ARMAZEM)
+    for coluna in COLUNAS_CATEGORICAS:
+        frame[coluna] = frame[coluna].astype('string').astype('category')
+    for coluna in ('cnes', 'estabelecimento', 'ine', 'nome_equipe'):
+        frame[coluna] = frame[coluna].astype('string')
+    for coluna in ('numerador', 'denominador', 'pontuacao'):
+        frame[coluna] = pd.to_numeric(frame[coluna], errors='coerce').astype('float64')
+    return frame
+
+
+def construir_armazem(indicadores, base_path, log=print, ler_relatorios=None):
+    """Tabela única com as equipes de todos os indicadores, a assinatura dos CSV e os componentes de cada um
+
+    indicadores: dict código -> config com 'pasta' (como em GeradorSVGWeb)
+    ler_relatorios: ver ler_pasta
+    """
+    frames = []
+    assinaturas = {}
+    componentes = {}
+
+    for codigo, config in indicadores.items():
+        pasta = base_path / config['pasta']
+        if not pasta.exists():
+            log(f"Pasta não encontrada: {pasta}")
+            continue
+
+        frame, arquivos, componentes[codigo] = ler_pasta(pasta, codigo, log, ler_relatorios)
+        assinaturas[codigo] = manifesto.hash_arquivos(arquivos)
+        log(f"{codigo}: {len(arquivos)} arquivos, {len(frame)} equipes")
+        if not frame.empty:
+            frames.append(frame)
+
+    tabela = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUNAS_ARMAZEM)
+    return tipar(tabela), assinaturas, componentes
+
+
+def salvar_armazem(tabela, assinaturas, pasta, formato=None, componentes=None):
+    """Grava a tabela e os metadados (assinaturas dos CSV e componentes por indicador) de forma atômica"""
+    formato = formato or formato_disponivel()
+    pasta.mkdir(parents=True, exist_ok=True)
+
+    nome = 'indicadores.parquet' if formato == 'parquet' else 'indicadores.pkl'
+    temporario = pasta / (nome + '.tmp')
+    if formato == 'parquet':
+        tabela.to_parquet(temporario, index=False)
+    else:
+        tabela.to_pickle(temporario)
+    os.replace(temporario, pasta / nome)
+
+    meta = {
+        'versao': VERSAO_ARMAZEM,
+        'formato': formato,
+        'arquivo': nome,
+        'linhas': len(tabela),
+        'assinaturas': assinaturas,
+        'componentes': componentes or {},
+        'gerado_em': datetime.now().isoformat()
+    }
+    manifesto.salvar(pasta / ARQUIVO_META, meta)
+    return pasta / nome
+
+
+def carregar_armazem(pasta):
+    """Lê a tabela e os metadados; (None, None) se ausente, inválido ou de outra versão"""
+    try:
+        with open(pasta / ARQUIVO_META, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('versao') != VERSAO_ARMAZEM:
+            return None, None
+
+        caminho = pasta / meta['arquivo']
+        if meta['formato'] == 'parquet':
+            tabela = pd.read_parquet(caminho)
+        else:
+            tabela = pd.read_pickle(caminho)
+    except (OSError, ValueError, KeyError, ImportError):
+        return None, None
+
+    return tabela, meta
+
+
+def formato_equipes(tabela):
+    """Equipes do armazém no formato de siaps.agregar_por_municipio: codigo_ibge, nome_municipio,
+    competencia, pontuacao, peso (= denominador) e arquivo_origem"""
+    return pd.DataFrame({
+        'codigo_ibge': tabela['codigo_ibge'].astype(object),
+        'nome_municipio': tabela['nome_municipio'].astype(object),
+        'competencia': tabela['competencia'].astype(object),
+        'pontuacao': tabela['pontuacao'],
+        'peso': tabela['denominador'],
+        'arquivo_origem': tabela['arquivo_origem'].astype(object)
+    }).reset_index(drop=True)
+
+
+def equipes_indicador(tabela, indicador):
+    """Equipes de um indicador no formato de formato_equipes"""
+    return formato_equipes(tabela[tabela['indicador'] == indicador])
+
+
+def criar_parser():
+    """Argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(description="Converte os CSV de todos os indicadores no armazém colunar")
+    parser.add_argument('indicadores', nargs='*',
+                        help="Indicadores a incluir (padrão: todos)")
+    parser.add_argument('--formato', choices=('parquet', 'pickle'), default=None,
+                        help="Formato de gravação (padrão: parquet se disponível)")
+    return parser
+
+
+def main(argv=None):
+    """Ingestão completa: CSV -> armazém"""
+    from mapa import GeradorSVGWeb
+
+    args = criar_parser().parse_args(argv)
+    gerador = GeradorSVGWeb()
+
+    desconhecidos = [i for i in args.indicadores if i not in gerador.indicadores_mapeamento]
+    if desconhecidos:
+        print(f"❌ Indicador(es) desconhecido(s): {', '.join(desconhecidos)}")
+        return False
+
+    caminho = gerador.ingerir_armazem(args.indicadores or None, args.formato)
+    print(f"📦 Armazém gravado em: {caminho}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Classificação das pontuações em faixas
+Descrição: Define, por indicador, o método das quebras (fixo, quantil ou
+Jenks), a direção (quanto maior/menor, melhor) e classifica o array inteiro de
+pontuações de uma vez (np.digitize). As quebras calculadas ficam em cache e
+são exportadas no payload para a legenda do navegador usar as mesmas faixas
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+METODOS_QUEBRA = ('fixo', 'quantil', 'jenks')
+DIRECOES = ('maior', 'menor')
+
+# Rótulos das classes pelo valor, da menor para a maior pontuação
+ROTULOS = ['Muito Baixo', 'Baixo', 'Médio', 'Alto', 'Muito Alto']
+
+# Esquema padrão: cinco faixas fixas de 20 pontos na escala 0-100
+ESQUEMA_PADRAO = {
+    'metodo': 'fixo',
+    'limites': [20, 40, 60, 80],
+    'escala': [0, 100],
+    'direcao': 'maior'
+}
+
+# Casas decimais das pontuações no payload: quebras e valores classificados usam a mesma precisão,
+# para o navegador (que só vê os valores arredondados) chegar às mesmas faixas
+CASAS = 2
+
+VERSAO_CACHE = 1
+
+
+def quebras_quantil(valores, classes):
+    """Limites inferiores das classes 2..n com a mesma quantidade de municípios em cada uma"""
+    return np.quantile(valores, np.linspace(0, 1, classes + 1)[1:-1])
+
+
+def quebras_jenks(valores, classes, amostra=2000):
+    """Quebras naturais de Jenks (Fisher): minimiza a soma dos desvios quadráticos dentro das classes
+
+    Programação dinâmica com somas acumuladas; cada passo avalia todos os inícios da última
+    classe de uma vez. Acima de `amostra` valores usa quantis igualmente espaçados dos dados
+    """
+    x = np.sort(valores)
+    if len(x) > amostra:
+        x = np.quantile(x, np.linspace(0, 1, amostra))
+    n = len(x)
+    if len(np.unique(x)) <= classes:
+        return np.unique(x)[1:]
+
+    soma = np.concatenate([[0.0], np.cumsum(x)])
+    soma_quadrados = np.concatenate([[0.0], np.cumsum(x * x)])
+
+    # custo[k, i]: menor soma de desvios dos i primeiros valores em k classes
+    custo = np.full((classes + 1, n + 1), np.inf)
+    custo[0, 0] = 0.0
+    inicio = np.zeros((classes + 1, n + 1), dtype=np.int64)
+    for k in range(1, classes + 1):
+        for i in range(k, n + 1):
+            j = np.arange(k - 1, i)
+            quantidade = i - j
+            desvio = (soma_quadrados[i] - soma_quadrados[j]) - (soma[i] - soma[j]) ** 2 / quantidade
+            total = custo[k - 1, j] + desvio
+            melhor = int(np.argmin(total))
+            custo[k, i] = total[melhor]
+            inicio[k, i] = j[melhor]
+
+    # Volta pelas origens: o primeiro valor de cada classe (exceto a primeira) é o seu limite inferior
+    limites = []
+    i = n
+    for k in range(classes, 1, -1):
+        i = inicio[k, i]
+        limites.append(x[i])
+    return np.array(limites[::-1])
+
+
+def calcular_quebras(valores, esquema, classes):
+    """Limites inferiores das classes 2..n segundo o método do esquema"""
+    metodo = esquema.get('metodo', 'fixo')
+    if metodo not in METODOS_QUEBRA:
+        raise ValueError(f"Método de quebra inválido: {metodo}")
+
+    if metodo == 'fixo':
+        return np.asarray(esquema['limites'], dtype=np.float64)
+    if len(valores) == 0:
+        return np.array([])
+    quebras = quebras_quantil(valores, classes) if metodo == 'quantil' else quebras_jenks(valores, classes)
+    # Quebras repetidas (muitos valores iguais) viram uma só: menos classes, nenhuma vazia
+    return np.unique(np.round(quebras, CASAS))
+
+
+class Classificacao:
+    """Faixas de um indicador: limites inferiores crescentes, cor e rótulo de cada classe
+
+    limites: array (n-1,) com o limite inferior das classes 2..n (valor == limite sobe de classe)
+    cores: n cores do pior para o melhor desempenho
+    direcao: 'maior' (valores altos são melhores) ou 'menor' (cores invertidas)
+    minimo, maximo: extremos da escala exibidos na legenda
+    """
+
+    def __init__(self, limites, cores, cor_sem_dados, direcao='maior', metodo='fixo', minimo=None, maximo=None):
+        if direcao not in DIRECOES:
+            raise ValueError(f"Direção inválida: {direcao}")
+
+        self.limites = np.asarray(limites, dtype=np.float64)
+        self.direcao = direcao
+        self.metodo = metodo
+        self.minimo = minimo
+        self.maximo = maximo
+        self.cor_sem_dados = cor_sem_dados
+
+        # Menos classes que cores (quebras repetidas nos quantis): cores e rótulos espaçados, mantendo os extremos
+        quantidade = len(self.limites) + 1
+        if quantidade == 1:
+            posicoes = [len(cores) // 2]
+        else:
+            posicoes = np.round(np.linspace(0, len(cores) - 1, quantidade)).astype(int)
+        rotulos = ROTULOS if len(cores) == len(ROTULOS) else [f"Classe {i + 1}" for i in range(len(cores))]
+        por_valor = list(cores) if direcao == 'maior' else list(cores)[::-1]
+        self.rotulos = np.array([rotulos[p] for p in posicoes], dtype=object)
+        self.cores = np.array([por_valor[p] for p in posicoes], dtype=object)
+
+    @classmethod
+    def de_esquema(cls, esquema, valores, cores, cor_sem_dados, limites=None):
+        """Classificação de um esquema ({'metodo', 'limites', 'escala', 'direcao'}) para as pontuações dadas
+
+        limites: quebras já calculadas (cache); sem elas, são calculadas a partir dos valores
+        """
+        valores = np.asarray(valores, dtype=np.float64)
+        valores = valores[~np.isnan(valores)]
+        if limites is None:
+            limites = calcular_quebras(valores, esquema, len(cores))
+
+        escala = esquema.get('escala') if esquema.get('metodo', 'fixo') == 'fixo' else None
+        if escala:
+            minimo, maximo = escala
+        else:
+            minimo = float(valores.min()) if len(valores) else None
+            maximo = float(valores.max()) if len(valores) else None
+
+        return cls(limites, cores, cor_sem_dados, esquema.get('direcao', 'maior'),
+                   esquema.get('metodo', 'fixo'), minimo, maximo)
+
+    def classes(self, valores):
+        """Índice da classe de cada valor (0 = menores valores; -1 = sem dado), em uma única busca"""
+        valores = np.round(np.asarray(valores, dtype=np.float64), CASAS)
+        classes = np.digitize(valores, self.limites)
+        classes[np.isnan(valores)] = -1
+        return classes
+
+    def cores_de(self, valores):
+        """Cor de cada valor (cor de sem dados para NaN)"""
+        classes = self.classes(valores)
+        return np.where(classes >= 0, self.cores[np.maximum(classes, 0)], self.cor_sem_dados)
+
+    def rotulos_de(self, valores):
+        """Rótulo de cada valor ('Sem dados' para NaN)"""
+        classes = self.classes(valores)
+        return np.where(classes >= 0, self.rotulos[np.maximum(classes, 0)], 'Sem dados')
+
+    def faixas(self, casas=CASAS):
+        """Faixas da legenda [limite inferior, cor, rótulo, limite superior], das mais altas para as mais baixas"""
+        inferiores = [self.minimo if self.minimo is not None else 0.0] + list(self.limites)
+        superiores = list(self.limites) + [self.maximo if self.maximo is not None else inferiores[-1]]
+
+        faixas = [
+            [round(float(inferior), casas), str(cor), str(rotulo), round(float(superior), casas)]
+            for inferior, superior, cor, rotulo in zip(inferiores, superiores, self.cores, self.rotulos)
+        ]
+        return faixas[::-1]
+
+    def para_payload(self):
+        """Método, direção e quebras exportados junto com as faixas"""
+        return {
+            'metodo': self.metodo,
+            'direcao': self.direcao,
+            'limites': [float(limite) for limite in self.limites]
+        }
+
+
+def chave_quebras(esquema, valores, classes):
+    """Hash do esquema e das pontuações: as quebras só são recalculadas quando algum dos dois muda"""
+    sha = hashlib.sha256(json.dumps({'esquema': esquema, 'classes': classes, 'versao': VERSAO_CACHE},
+                                    sort_keys=True, default=str).encode('utf-8'))
+    valores = np.sort(np.asarray(valores, dtype=np.float64))
+    sha.update(valores[~np.isnan(valores)].tobytes())
+    return sha.hexdigest()
+
+
+def ler_quebras(arquivo, chave):
+    """Quebras em cache para a chave; None se ausentes, inválidas ou de outra chave"""
+    try:
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(dados, dict) or dados.get('chave') != chave:
+        return None
+    return np.asarray(dados.get('limites', []), dtype=np.float64)
+
+
+def gravar_quebras(arquivo, chave, classificacao):
+    """Grava as quebras de forma atômica (workers em paralelo gravam arquivos diferentes)"""
+    arquivo = Path(arquivo)
+    arquivo.parent.mkdir(parents=True, exist_ok=True)
+    temporario = arquivo.with_name(f"{arquivo.name}.{os.getpid()}.tmp")
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump({'chave': chave, **classificacao.para_payload(), 'faixas': classificacao.faixas()},
+                  f, ensure_ascii=False, indent=2)
+    os.replace(temporario, arquivo)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detalhamento por equipe
+Descrição: Monta, para cada município, a lista das suas equipes (CNES,
+estabelecimento, INE, nome e sigla da equipe, componentes do indicador,
+numerador, denominador e pontuação) com o efeito de cada uma na pontuação
+do município, e grava um arquivo pequeno por município em
+src/data/equipes/<indicador>/<CD_MUN>.json. O payload do indicador só aponta
+para a pasta; o frontend busca o arquivo do município clicado
+"""
+
+import os
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+
+import siaps
+import series
+import leitura
+
+
+def numero(valor, casas=2):
+    """float arredondado para o JSON; None para NaN/ausente"""
+    if valor is None:
+        return None
+    valor = float(valor)
+    return None if math.isnan(valor) else round(valor, casas)
+
+
+def texto(valor):
+    """str para o JSON; None para vazio/NaN"""
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return None
+    valor = str(valor).strip()
+    return valor or None
+
+
+def pontuacao_sem_cada(pontuacoes, pesos, metodo='ponderada'):
+    """Pontuação do município recalculada sem cada equipe (NaN quando ela é a única)
+
+    Mesmas regras de siaps.agregar_por_municipio: pesos negativos ou ausentes
+    valem zero e, na ponderada, peso total zero cai para a média simples.
+    """
+    if metodo not in siaps.METODOS_AGREGACAO:
+        raise ValueError(f"Método de agregação inválido: {metodo}")
+
+    pontuacoes = np.asarray(pontuacoes, dtype=np.float64)
+    pesos = np.clip(np.nan_to_num(np.asarray(pesos, dtype=np.float64)), 0, None)
+    quantidade = len(pontuacoes)
+    if quantidade < 2:
+        return np.full(quantidade, np.nan)
+
+    media = (pontuacoes.sum() - pontuacoes) / (quantidade - 1)
+    if metodo == 'media':
+        return media
+    if metodo == 'maximo':
+        return np.array([np.delete(pontuacoes, i).max() for i in range(quantidade)])
+
+    soma_peso = pesos.sum() - pesos
+    soma_pontuacao_peso = (pontuacoes * pesos).sum() - pontuacoes * pesos
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ponderada = soma_pontuacao_peso / soma_peso
+    return np.where(soma_peso > 0, ponderada, media)
+
+
+def fragmento_municipio(codigo, dados, equipes, componentes, metodo='ponderada'):
+    """Conteúdo do arquivo de um município: equipes da competência exibida no mapa, da pior para a melhor
+
+    equipes: dict coluna -> array com as linhas do armazém (leitura.COLUNAS_EQUIPES) do município
+    dados: entrada do município em carregar_dados_csv_indicador (nome, pontuação, competência)
+    efeito: pontuação do município menos a pontuação sem a equipe (negativo = a equipe puxa para baixo)
+    """
+    pontuacoes = equipes['pontuacao'].astype(np.float64)
+    validas = ~np.isnan(pontuacoes)
+    sem_equipe = np.full(len(pontuacoes), np.nan)
+    sem_equipe[validas] = pontuacao_sem_cada(pontuacoes[validas], equipes['denominador'][validas], metodo)
+    efeitos = dados['pontuacao'] - sem_equipe
+
+    lista = []
+    for i, efeito in enumerate(efeitos):
+        valores = leitura.valores_componentes(
+            equipes['componentes'][i], equipes['numerador'][i], equipes['denominador'][i], len(componentes)
+        )
+        lista.append({
+            'cnes': texto(equipes['cnes'][i]),
+            'estabelecimento': texto(equipes['estabelecimento'][i]),
+            'ine': texto(equipes['ine'][i]),
+            'equipe': texto(equipes['nome_equipe'][i]),
+            'sigla': texto(equipes['tipo_equipe'][i]),
+            'componentes': [numero(valor) for valor in valores],
+            'numerador': numero(equipes['numerador'][i]),
+            'denominador': numero(equipes['denominador'][i]),
+            'pontuacao': numero(pontuacoes[i]),
+            'efeito': numero(efeito)
+        })
+
+    # Sem pontuação vai para o fim; entre as demais, a menor primeiro
+    lista.sort(key=lambda equipe: (equipe['pontuacao'] is None, equipe['pontuacao'] or 0))
+
+    return {
+        'codigo': codigo,
+        'nome': dados['nome'],
+        'competencia': dados.get('competencia'),
+        'pontuacao': numero(dados['pontuacao']),
+        'agregacao': metodo,
+        'componentes': componentes,
+        'equipes': lista
+    }
+
+
+def indice_equipes(equipes, dados_municipios, componentes, metodo='ponderada'):
+    """dict CD_MUN -> fragmento_municipio para os municípios do mapa
+
+    equipes: linhas do armazém do indicador com codigo_ibge já normalizado para o CD_MUN
+    """
+    if equipes.empty:
+        return {}
+
+    # Colunas extraídas uma vez; cada município é só um conjunto de posições
+    colunas = {
+        coluna: equipes[coluna].to_numpy(dtype=object)
+        for coluna in ('cnes', 'estabelecimento', 'ine', 'nome_equipe', 'tipo_equipe', 'componentes')
+    }
+    for coluna in ('numerador', 'denominador', 'pontuacao'):
+        colunas[coluna] = equipes[coluna].to_numpy(dtype=np.float64, na_value=np.nan)
+    competencias = equipes['competencia'].astype(object).fillna('').to_numpy()
+
+    indice = {}
+    for codigo, posicoes in equipes.groupby(equipes['codigo_ibge'].astype(object), sort=True).indices.items():
+        dados = dados_municipios.get(codigo)
+        if dados is None or dados['pontuacao'] is None:
+            continue
+
+        # Mesma competência exibida no mapa (a mais recente do município)
+        do_municipio = competencias[posicoes]
+        competencia = dados.get('competencia') or ''
+        if competencia not in set(do_municipio):
+            competencia = max(do_municipio, key=series.chave_competencia)
+        posicoes = posicoes[do_municipio == competencia]
+
+        indice[codigo] = fragmento_municipio(
+            codigo, dados, {coluna: valores[posicoes] for coluna, valores in colunas.items()}, componentes, metodo
+        )
+
+    return indice
+
+
+def gravar_fragmentos(indice, pasta, opcoes_json=None):
+    """Grava um JSON por município e remove os de municípios que saíram; devolve os bytes gravados"""
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    opcoes_json = opcoes_json or {'separators': (',', ':')}
+
+    for antigo in pasta.glob('*.json'):
+        if antigo.stem not in indice:
+            antigo.unlink()
+
+    total = 0
+    for codigo, fragmento in indice.items():
+        corpo = json.dumps(fragmento, ensure_ascii=False, **opcoes_json).encode('utf-8')
+        arquivo = pasta / f"{codigo}.json"
+        # Não regrava arquivos idênticos (mantém mtime e ETag do servidor estático)
+        if arquivo.exists() and arquivo.stat().st_size == len(corpo) and arquivo.read_bytes() == corpo:
+            continue
+        temporario = arquivo.with_name(f"{arquivo.name}.{os.getpid()}.tmp")
+        temporario.write_bytes(corpo)
+        os.replace(temporario, arquivo)
+        total += len(corpo)
+
+    return total
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Geometria projetada das microrregiões - Mato Grosso do Sul
+Descrição: Normaliza Polygon/MultiPolygon (com buracos) num buffer único de
+anéis, projeta e simplifica (Douglas-Peucker com tolerância em pixels) e
+mantém um cache em disco com arrays NumPy mapeados em memória, chaveado pelo
+hash dos arquivos de origem
+"""
+
+import json
+import shutil
+import hashlib
+import numpy as np
+
+# Incrementar quando o formato do cache mudar
+VERSAO_CACHE = 3
+
+
+class GeometriaProjetada:
+    """Anéis projetados em coordenadas SVG e os metadados de cada município
+
+    coordenadas: array (N, 2) com os pontos de todos os anéis, em sequência
+    aneis: offsets (R + 1,); o anel i é coordenadas[aneis[i]:aneis[i + 1]]
+    feicoes: lista de dicts com 'regiao', 'propriedades', 'aneis' ([início, fim))
+    e 'poligonos' ([início, fim) de cada parte; o primeiro anel é o exterior,
+    os demais são buracos)
+    caixas: array (F, 4) com (min_x, min_y, max_x, max_y) de cada feição
+    """
+
+    def __init__(self, coordenadas, aneis, feicoes, bounds, caixas=None):
+        self.coordenadas = coordenadas
+        self.aneis = aneis
+        self.feicoes = feicoes
+        self.bounds = bounds
+        self.caixas = caixas if caixas is not None else caixas_feicoes(coordenadas, aneis, feicoes)
+
+    @property
+    def total_vertices(self):
+        return int(self.aneis[-1]) if len(self.aneis) else 0
+
+    def anel(self, indice):
+        """Pontos de um anel"""
+        return self.coordenadas[self.aneis[indice]:self.aneis[indice + 1]]
+
+    def aneis_feicao(self, indice):
+        """Lista com os anéis de uma feição (município)"""
+        inicio, fim = self.feicoes[indice]['aneis']
+        return [self.anel(i) for i in range(inicio, fim)]
+
+    def caixa(self, indices):
+        """Caixa envolvente (min_x, min_y, max_x, max_y) de um conjunto de feições"""
+        caixas = self.caixas[list(indices)]
+        return (float(caixas[:, 0].min()), float(caixas[:, 1].min()),
+                float(caixas[:, 2].max()), float(caixas[:, 3].max()))
+
+    def escala_recorte(self, indices, largura, altura, margem=0.05):
+        """Ampliação (escala uniforme) que enquadra as feições no viewport"""
+        min_x, min_y, max_x, max_y = self.caixa(indices)
+        return min(largura * (1 - 2 * margem) / max(max_x - min_x, 1e-9),
+                   altura * (1 - 2 * margem) / max(max_y - min_y, 1e-9))
+
+    def recortar(self, indices, largura, altura, margem=0.05):
+        """Nova geometria só com as feições pedidas, reajustada (escala uniforme) ao viewport"""
+        indices = list(indices)
+        min_x, min_y, max_x, max_y = self.caixa(indices)
+        escala = self.escala_recorte(indices, largura, altura, margem)
+        desloc_x = (largura - (max_x - min_x) * escala) / 2 - min_x * escala
+        desloc_y = (altura - (max_y - min_y) * escala) / 2 - min_y * escala
+
+        trechos = []
+        feicoes = []
+        total = 0
+        for indice in indices:
+            feicao = self.feicoes[indice]
+            inicio, fim = feicao['aneis']
+            for anel in range(inicio, fim):
+                trechos.append(self.anel(anel))
+            feicoes.append({
+                **feicao,
+                'aneis': [total, total + fim - inicio],
+                'poligonos': [[a - inicio + total, b - inicio + total] for a, b in feicao['poligonos']]
+            })
+            total += fim - inicio
+
+        tamanhos = [len(trecho) for trecho in trechos]
+        aneis = np.zeros(len(tamanhos) + 1, dtype=np.int64)
+        np.cumsum(tamanhos, out=aneis[1:])
+        coordenadas = np.concatenate(trechos) * escala + (desloc_x, desloc_y) if trechos else np.zeros((0, 2))
+
+        return GeometriaProjetada(coordenadas, aneis, feicoes, self.bounds,
+                                  self.caixas[indices] * escala + (desloc_x, desloc_y, desloc_x, desloc_y))
+
+    def por_regiao(self):
+        """Índices das feições agrupados por região, na ordem de carregamento"""
+        regioes = {}
+        for indice, feicao in enumerate(self.feicoes):
+            regioes.setdefault(feicao['regiao'], []).append(indice)
+        return regioes
+
+
+def caixas_feicoes(coordenadas, aneis, feicoes):
+    """Caixa envolvente de cada feição a partir dos seus anéis"""
+    caixas = np.zeros((len(feicoes), 4), dtype=np.float64)
+    for indice, feicao in enumerate(feicoes):
+        inicio, fim = feicao['aneis']
+        pontos = coordenadas[aneis[inicio]:aneis[fim]]
+        if len(pontos):
+            caixas[indice, :2] = pontos.min(axis=0)
+            caixas[indice, 2:] = pontos.max(axis=0)
+    return caixas
+
+
+def chave_cache(arquivos, parametros):
+    """Hash do conteúdo dos arquivos de origem e dos parâmetros de projeção"""
+    sha = hashlib.sha256()
+    sha.update(json.dumps({'versao': VERSAO_CACHE, **parametros}, sort_keys=True).encode('utf-8'))
+
+    for arquivo in sorted(arquivos):
+        sha.update(arquivo.name.encode('utf-8'))
+        with open(arquivo, 'rb') as f:
+            for bloco in iter(lambda: f.read(1 << 20), b''):
+                sha.update(bloco)
+
+    return sha.hexdigest()[:16]
+
+
+def _douglas_peucker(pontos, tolerancia):
+    """Máscara dos pontos mantidos por Douglas-Peucker (versão iterativa)"""
+    n = len(pontos)
+    manter = np.zeros(n, dtype=bool)
+    manter[0] = manter[-1] = True
+
+    pilha = [(0, n - 1)]
+    while pilha:
+        inicio, fim = pilha.pop()
+        if fim - inicio < 2:
+            continue
+
+        a, b = pontos[inicio], pontos[fim]
+        trecho = pontos[inicio + 1:fim]
+        segmento = b - a
+        comprimento = np.hypot(segmento[0], segmento[1])
+
+        if comprimento == 0:
+            distancias = np.hypot(trecho[:, 0] - a[0], trecho[:, 1] - a[1])
+        else:
+            distancias = np.abs(segmento[0] * (trecho[:, 1] - a[1]) - segmento[1] * (trecho[:, 0] - a[0])) / comprimento
+
+        maior = int(np.argmax(distancias))
+        if distancias[maior] > tolerancia:
+            meio = inicio + 1 + maior
+            manter[meio] = True
+            pilha.append((inicio, meio))
+            pilha.append((meio, fim))
+
+    return manter
+
+
+def simplificar_anel(pontos, tolerancia):
+    """Simplifica um anel fechado preservando ao menos um triângulo"""
+    pontos = np.asarray(pontos, dtype=np.float64)
+    if tolerancia <= 0 or len(pontos) <= 4:
+        return pontos
+
+    # Divide o anel no ponto mais distante do primeiro para não colapsar
+    # quando início e fim coincidem
+    distancias = np.hypot(pontos[:, 0] - pontos[0, 0], pontos[:, 1] - pontos[0, 1])
+    corte = int(np.argmax(distancias))
+    if corte == 0:
+        return pontos[:1]
+
+    manter = np.zeros(len(pontos), dtype=bool)
+    manter[:corte + 1] |= _douglas_peucker(pontos[:corte + 1], tolerancia)
+    manter[corte:] |= _douglas_peucker(pontos[corte:], tolerancia)
+
+    simplificado = pontos[manter]
+    if len(simplificado) < 4:
+        # Garante um triângulo fechado
+        indices = np.unique(np.linspace(0, len(pontos) - 1, 4).astype(int))
+        simplificado = pontos[indices]
+
+    return simplificado
+
+
+def formatar_caminho(aneis, casas=1):
+    """Atributo 'd' do SVG: cada anel começa com 'M x y' absoluto e segue com
+    deslocamentos relativos ('l'), calculados na grade arredondada para não
+    acumular erro, e fecha com 'z'"""
+    fator = 10 ** casas
+    partes = []
+
+    for anel in aneis:
+        grade = np.rint(np.asarray(anel, dtype=np.float64) * fator).astype(np.int64)
+        if len(grade) > 1 and (grade[0] == grade[-1]).all():
+            grade = grade[:-1]
+
+        delta = np.diff(grade, axis=0)
+        delta = delta[delta.any(axis=1)]
+        if len(delta) < 2:
+            # Anel degenerado na grade (menos que um triângulo)
+            continue
+
+        inicio = ('%.7g %.7g' % tuple((grade[0] / fator).tolist())).replace(' -', '-')
+        valores = (delta.ravel() / fator).tolist()
+        relativos = ('%.7g ' * len(valores) % tuple(valores))[:-1].replace(' -', '-')
+        partes.append(f"M{inicio}l{relativos}z")
+
+    return ''.join(partes)
+
+
+def poligonos_geojson(geometry):
+    """Polígonos (listas de anéis, exterior primeiro) de uma geometria Polygon ou MultiPolygon"""
+    geometry = geometry or {}
+    if geometry.get('type') == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry.get('type') == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+
+def normalizar_feicoes(dados_regioes):
+    """Passada única sobre o GeoJSON: (região, propriedades, polígonos) de cada município
+
+    Os polígonos vêm como listas de arrays N x 2 (lng/lat); anéis vazios e
+    coordenadas extras (altitude) são descartados.
+    """
+    for nome_regiao, dados_regiao in dados_regioes.items():
+        for feature in dados_regiao.get('features', []):
+            properties = feature.get('properties', {})
+            if not properties.get('CD_MUN'):
+                continue
+
+            poligonos = []
+            for poligono in poligonos_geojson(feature.get('geometry')):
+                aneis = [np.asarray(anel, dtype=np.float64)[:, :2] for anel in poligono if len(anel)]
+                if aneis:
+                    poligonos.append(aneis)
+
+            if poligonos:
+                yield nome_regiao, properties, poligonos
+
+
+def construir_geometria(dados_regioes, projetar, bounds, tolerancia):
+    """Projeta (projetar: array N x 2 -> array N x 2) e simplifica os anéis de todas as regiões"""
+    aneis_projetados = []
+    feicoes = []
+
+    for nome_regiao, properties, poligonos in normalizar_feicoes(dados_regioes):
+        inicio = len(aneis_projetados)
+        partes = []
+
+        for poligono in poligonos:
+            partes.append([len(aneis_projetados), len(aneis_projetados) + len(poligono)])
+            for anel in poligono:
+                aneis_projetados.append(simplificar_anel(projetar(anel), tolerancia))
+
+        feicoes.append({
+            'regiao': nome_regiao,
+            'propriedades': properties,
+            'aneis': [inicio, len(aneis_projetados)],
+            'poligonos': partes
+        })
+
+    tamanhos = [len(anel) for anel in aneis_projetados]
+    aneis = np.zeros(len(tamanhos) + 1, dtype=np.int64)
+    np.cumsum(tamanhos, out=aneis[1:])
+    coordenadas = np.concatenate(aneis_projetados) if aneis_projetados else np.zeros((0, 2))
+
+    return GeometriaProjetada(coordenadas, aneis, feicoes, bounds)
+
+
+def salvar_cache(geometria, pasta):
+    """Grava o cache (arrays .npy + metadados JSON) de forma atômica"""
+    temporaria = pasta.with_name(pasta.name + '.tmp')
+    if temporaria.exists():
+        shutil.rmtree(temporaria)
+    temporaria.mkdir(parents=True)
+
+    np.save(temporaria / 'coordenadas.npy', np.ascontiguousarray(geometria.coordenadas, dtype=np.float64))
+    np.save(temporaria / 'aneis.npy', np.asarray(geometria.aneis, dtype=np.int64))
+    np.save(temporaria / 'caixas.npy', np.asarray(geometria.caixas, dtype=np.float64))
+
+    with open(temporaria / 'feicoes.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'versao': VERSAO_CACHE,
+            'bounds': geometria.bounds,
+            'feicoes': geometria.feicoes
+        }, f, ensure_ascii=False)
+
+    if pasta.exists():
+        shutil.rmtree(pasta)
+    temporaria.rename(pasta)
+
+
+def carregar_cache(pasta):
+    """Abre o cache com os arrays mapeados em memória; None se ausente ou inválido"""
+    try:
+        with open(pasta / 'feicoes.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('versao') != VERSAO_CACHE:
+            return None
+
+        coordenadas = np.load(pasta / 'coordenadas.npy', mmap_mode='r')
+        aneis = np.load(pasta / 'aneis.npy', mmap_mode='r')
+        caixas = np.load(pasta / 'caixas.npy')
+    except (OSError, ValueError):
+        return None
+
+    return GeometriaProjetada(coordenadas, aneis, meta['feicoes'], meta['bounds'], caixas)
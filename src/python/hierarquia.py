@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agregados regionais
+Descrição: Soma as equipes por município uma única vez e sobe as somas pela
+hierarquia do GeoJSON (município -> região imediata (CD_RGI) -> região
+intermediária (CD_RGINT) -> macrorregião do REGIAO/ -> estado). Em cada nível
+a pontuação é recalculada a partir das somas das equipes (razão de somas,
+não média de percentuais)
+"""
+
+import numpy as np
+
+import siaps
+
+NIVEIS = ('municipio', 'rgi', 'rgint', 'regiao', 'estado')
+
+# Níveis acima do município, com a chave e o nome de cada um em chaves_municipios
+CHAVES_NIVEL = ('rgi', 'rgint', 'regiao')
+
+# Colunas aditivas das equipes (o máximo sobe à parte)
+SOMAS = ('equipes', 'soma_pontuacao', 'soma_peso', 'soma_pontuacao_peso', 'numerador', 'denominador')
+
+
+def fator_razao(numerador, denominador, pontuacao, tolerancia=0.06, minimo=0.9):
+    """Escala em que pontuação = fator * numerador / denominador (100 ou 1)
+
+    None quando as colunas não reproduzem a pontuação (ex.: indicadores em que o
+    par final do relatório é só um dos componentes); nesse caso a razão não é publicada
+    """
+    numerador = np.asarray(numerador, dtype=np.float64)
+    denominador = np.asarray(denominador, dtype=np.float64)
+    pontuacao = np.asarray(pontuacao, dtype=np.float64)
+
+    validas = (denominador > 0) & ~np.isnan(numerador) & ~np.isnan(pontuacao)
+    if not validas.any():
+        return None
+
+    razao = numerador[validas] / denominador[validas]
+    for fator in (100.0, 1.0):
+        if np.mean(np.abs(fator * razao - pontuacao[validas]) <= tolerancia) >= minimo:
+            return fator
+    return None
+
+
+def chaves_municipios(municipios):
+    """Chave e nome de cada nível e área por CD_MUN, a partir do registro de municípios"""
+    return {
+        municipio.codigo: {
+            'rgi': (municipio.cd_rgi, municipio.nm_rgi),
+            'rgint': (municipio.cd_rgint, municipio.nm_rgint),
+            'regiao': (municipio.regiao, municipio.regiao),
+            'area_km2': municipio.area_km2
+        }
+        for municipio in municipios
+    }
+
+
+def agrupar(rotulos):
+    """Rótulos únicos ordenados e o grupo de cada linha (-1 para rótulo None)"""
+    unicos = sorted({rotulo for rotulo in rotulos if rotulo is not None})
+    indice = {rotulo: i for i, rotulo in enumerate(unicos)}
+    return unicos, np.array([indice.get(rotulo, -1) for rotulo in rotulos], dtype=np.int64)
+
+
+def somar(grupos, quantidade, colunas):
+    """Somas (e máximo) das colunas aditivas por grupo, em um bincount por coluna"""
+    validas = grupos >= 0
+    grupos = grupos[validas]
+    somas = {
+        nome: np.bincount(grupos, weights=colunas[nome][validas], minlength=quantidade)
+        for nome in SOMAS
+    }
+    maximo = np.full(quantidade, -np.inf)
+    np.maximum.at(maximo, grupos, colunas['maximo'][validas])
+    somas['maximo'] = maximo
+    return somas
+
+
+def somas_municipio(equipes):
+    """CD_MUN e somas aditivas das equipes por município (base de todos os níveis)
+
+    equipes: DataFrame com codigo_ibge, pontuacao, numerador e denominador
+    """
+    equipes = equipes.dropna(subset=['codigo_ibge', 'pontuacao'])
+    pontuacao = equipes['pontuacao'].to_numpy(dtype=np.float64)
+    numerador = np.nan_to_num(equipes['numerador'].to_numpy(dtype=np.float64, na_value=np.nan))
+    denominador = np.nan_to_num(equipes['denominador'].to_numpy(dtype=np.float64, na_value=np.nan))
+    # Mesmo peso de siaps.agregar_por_municipio: denominador, negativos e ausentes valem zero
+    peso = np.clip(denominador, 0, None)
+
+    codigos, grupos = agrupar(equipes['codigo_ibge'].astype(object).tolist())
+    return codigos, somar(grupos, len(codigos), {
+        'equipes': np.ones(len(pontuacao)),
+        'soma_pontuacao': pontuacao,
+        'soma_peso': peso,
+        'soma_pontuacao_peso': pontuacao * peso,
+        'maximo': pontuacao,
+        'numerador': numerador,
+        'denominador': denominador
+    })
+
+
+def pontuacao_somas(somas, metodo='ponderada'):
+    """Pontuação de cada grupo a partir das somas das suas equipes (regras de siaps.agregar_por_municipio)"""
+    if metodo not in siaps.METODOS_AGREGACAO:
+        raise ValueError(f"Método de agregação inválido: {metodo}")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = somas['soma_pontuacao'] / somas['equipes']
+        if metodo == 'media':
+            return media
+        if metodo == 'maximo':
+            return np.where(somas['equipes'] > 0, somas['maximo'], np.nan)
+        ponderada = somas['soma_pontuacao_peso'] / somas['soma_peso']
+    return np.where(somas['soma_peso'] > 0, ponderada, media)
+
+
+def agregar_nivel(somas, metodo, fator):
+    """Equipes, pontuação e (com fator) numerador, denominador e razão de cada grupo"""
+    nivel = {'equipes': somas['equipes'], 'pontuacao': pontuacao_somas(somas, metodo)}
+    if fator is not None:
+        nivel['numerador'] = somas['numerador']
+        nivel['denominador'] = somas['denominador']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            razao = fator * somas['numerador'] / somas['denominador']
+        nivel['razao'] = np.where(somas['denominador'] > 0, razao, np.nan)
+    return nivel
+
+
+def distribuicao(grupos, quantidade, valores):
+    """Contagem, mínimo, máximo e média das pontuações municipais por grupo"""
+    validas = (grupos >= 0) & ~np.isnan(valores)
+    grupos, valores = grupos[validas], valores[validas]
+    contagem = np.bincount(grupos, minlength=quantidade)
+    minima = np.full(quantidade, np.inf)
+    maxima = np.full(quantidade, -np.inf)
+    np.minimum.at(minima, grupos, valores)
+    np.maximum.at(maxima, grupos, valores)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = np.bincount(grupos, weights=valores, minlength=quantidade) / contagem
+    vazios = contagem == 0
+    minima[vazios] = maxima[vazios] = np.nan
+    return {'municipios': contagem, 'minima': minima, 'maxima': maxima, 'media': media}
+
+
+def cubo(equipes, chaves, metodo='ponderada', fator=None):
+    """Agregados de todos os níveis: dict nível -> (chaves, dict coluna -> array alinhado)
+
+    equipes: equipes exibidas no mapa (uma competência por município), codigo_ibge já como CD_MUN
+    chaves: chaves_municipios (municípios fora do GeoJSON só entram no estado)
+    """
+    codigos, base = somas_municipio(equipes)
+    municipio = agregar_nivel(base, metodo, fator)
+    niveis = {'municipio': (codigos, {**municipio, 'municipios': np.ones(len(codigos), dtype=np.int64)})}
+
+    # Os níveis acima sobem as somas municipais (aditivas), não as pontuações
+    for nome in CHAVES_NIVEL:
+        rotulos = [(chaves.get(codigo) or {}).get(nome, (None, None))[0] for codigo in codigos]
+        unicos, grupos = agrupar(rotulos)
+        nivel = agregar_nivel(somar(grupos, len(unicos), base), metodo, fator)
+        nivel.update(distribuicao(grupos, len(unicos), municipio['pontuacao']))
+
+        # Nome e área somada de todos os municípios do GeoJSON no grupo, com ou sem dados
+        nomes, areas = {}, dict.fromkeys(unicos, 0.0)
+        for dados in chaves.values():
+            rotulo, nome_grupo = dados[nome]
+            if rotulo in areas:
+                nomes.setdefault(rotulo, nome_grupo)
+                areas[rotulo] += float(dados['area_km2'] or 0)
+        nivel['nome'] = [nomes.get(rotulo) for rotulo in unicos]
+        nivel['area_km2'] = np.array([areas[rotulo] for rotulo in unicos])
+        niveis[nome] = (unicos, nivel)
+
+    grupos = np.zeros(len(codigos), dtype=np.int64)
+    estado = agregar_nivel(somar(grupos, 1, base), metodo, fator)
+    estado.update(distribuicao(grupos, 1, municipio['pontuacao']))
+    estado['area_km2'] = np.array([sum(float(dados['area_km2'] or 0) for dados in chaves.values())])
+    niveis['estado'] = (['estado'], estado)
+    return niveis
+
+
+def para_payload(niveis, casas=2):
+    """Níveis do cubo como dicts JSON: {nível: {chave: {...}}}, com 'estado' como um único registro"""
+    def valor(v):
+        if v is None or isinstance(v, str):
+            return v
+        v = float(v)
+        if np.isnan(v):
+            return None
+        return int(v) if v.is_integer() else round(v, casas)
+
+    payload = {}
+    for nome, (rotulos, colunas) in niveis.items():
+        payload[nome] = {
+            str(rotulo): {coluna: valor(valores[i]) for coluna, valores in colunas.items()}
+            for i, rotulo in enumerate(rotulos)
+        }
+    payload['estado'] = payload['estado'].get('estado')
+    return payload
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instrumentação do pipeline de geração
+Descrição: Cronometra as etapas do gerador (contexto `etapa`) e emite um
+evento JSON por linha com duração, linhas, vértices, bytes gravados e pico de
+memória; com uma pasta de perfis, grava também cProfile e tracemalloc por
+indicador
+"""
+
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from pathlib import Path
+from datetime import datetime
+from contextlib import contextmanager
+from collections import deque
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Eventos mantidos em memória (processos longos, como o servidor, não crescem sem limite)
+MAXIMO_EVENTOS = 10000
+
+# Linhas do relatório de cada perfil
+LINHAS_PERFIL = 40
+
+
+def reiniciar_pico_rss():
+    """Zera o pico de RSS do processo (Linux); False se não for possível"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def memoria_processo():
+    """(RSS atual, pico de RSS) em MB; o pico vem do getrusage quando não há /proc"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            campos = dict(linha.split(':', 1) for linha in f if ':' in linha)
+        return int(campos['VmRSS'].split()[0]) / 1024, int(campos['VmHWM'].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        pass
+
+    if resource is None:
+        return None, None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em bytes no macOS e em KB no Linux
+    return None, pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def resumir_eventos(eventos):
+    """Totais por etapa: chamadas, duração total e máxima, linhas, vértices e bytes gravados"""
+    etapas = {}
+    for evento in eventos:
+        if evento.get('evento') != 'etapa':
+            continue
+
+        total = etapas.setdefault(evento['etapa'], {
+            'chamadas': 0, 'duracao_total_ms': 0.0, 'duracao_max_ms': 0.0,
+            'linhas': 0, 'vertices': 0, 'bytes_gravados': 0, 'erros': 0
+        })
+        total['chamadas'] += 1
+        total['duracao_total_ms'] = round(total['duracao_total_ms'] + evento['duracao_ms'], 3)
+        total['duracao_max_ms'] = max(total['duracao_max_ms'], evento['duracao_ms'])
+        for campo in ('linhas', 'vertices', 'bytes_gravados'):
+            total[campo] += evento.get(campo) or 0
+        total['erros'] += 1 if evento.get('erro') else 0
+
+    return etapas
+
+
+class Instrumentacao:
+    """Coleta os eventos das etapas e os grava em JSON-lines quando há destino
+
+    destino: arquivo .jsonl (acrescentado; seguro entre processos do lote)
+    pasta_perfis: pasta dos perfis por indicador (None desliga o perfilamento)
+    """
+
+    def __init__(self, destino=None, pasta_perfis=None):
+        self.destino = Path(destino) if destino else None
+        self.pasta_perfis = Path(pasta_perfis) if pasta_perfis else None
+        self.eventos = deque(maxlen=MAXIMO_EVENTOS)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def emitir(self, evento):
+        """Guarda o evento e acrescenta uma linha ao destino"""
+        with self.lock:
+            self.eventos.append(evento)
+            if self.destino is not None:
+                self.destino.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.destino, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(evento, ensure_ascii=False, default=str) + '\n')
+
+    def eventos_indicador(self, indicador):
+        """Eventos de etapa já emitidos para um indicador"""
+        with self.lock:
+            return [e for e in self.eventos if e.get('evento') == 'etapa' and e.get('indicador') == indicador]
+
+    def picos_python(self):
+        """Pilha (por thread) dos picos do tracemalloc das etapas abertas"""
+        if not hasattr(self.local, 'picos'):
+            self.local.picos = []
+        return self.local.picos
+
+    @contextmanager
+    def etapa(self, nome, indicador=None):
+        """Cronometra um bloco; o dict entregue aceita 'linhas', 'vertices' e 'bytes_gravados'"""
+        campos = {}
+        picos = self.picos_python()
+        if tracemalloc.is_tracing():
+            # Etapas aninhadas: o pico da externa é o maior entre ela e as internas
+            if picos:
+                picos[-1] = max(picos[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            picos.append(0)
+
+        erro = None
+        momento = datetime.now().isoformat(timespec='milliseconds')
+        inicio = time.perf_counter()
+        try:
+            yield campos
+        except BaseException as e:
+            erro = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            duracao = time.perf_counter() - inicio
+            _, pico_rss = memoria_processo()
+
+            evento = {
+                'evento': 'etapa',
+                'etapa': nome,
+                'indicador': indicador,
+                'momento': momento,
+                'duracao_ms': round(duracao * 1000, 3),
+                'linhas': campos.get('linhas'),
+                'vertices': campos.get('vertices'),
+                'bytes_gravados': campos.get('bytes_gravados'),
+                'pico_rss_mb': round(pico_rss, 1) if pico_rss is not None else None,
+                'pid': os.getpid()
+            }
+
+            if tracemalloc.is_tracing() and picos:
+                pico = max(picos.pop(), tracemalloc.get_traced_memory()[1])
+                if picos:
+                    picos[-1] = max(picos[-1], pico)
+                evento['pico_python_mb'] = round(pico / (1024 * 1024), 1)
+
+            if erro:
+                evento['erro'] = erro
+            self.emitir(evento)
+
+    @contextmanager
+    def perfil(self, indicador):
+        """cProfile + tracemalloc durante o bloco, gravados em <pasta>/<indicador>.prof e .txt"""
+        if self.pasta_perfis is None:
+            yield
+            return
+
+        self.pasta_perfis.mkdir(parents=True, exist_ok=True)
+        iniciou_tracemalloc = not tracemalloc.is_tracing()
+        if iniciou_tracemalloc:
+            tracemalloc.start(10)
+        tracemalloc.reset_peak()
+
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            fotografia = tracemalloc.take_snapshot()
+            pico = tracemalloc.get_traced_memory()[1]
+            if iniciou_tracemalloc:
+                tracemalloc.stop()
+
+            arquivo_prof = self.pasta_perfis / f"{indicador}.prof"
+            arquivo_txt = self.pasta_perfis / f"{indicador}.txt"
+            perfil.dump_stats(arquivo_prof)
+
+            with open(arquivo_txt, 'w', encoding='utf-8') as f:
+                f.write(f"# cProfile - {indicador} (tempo acumulado)\n")
+                pstats.Stats(perfil, stream=f).sort_stats('cumulative').print_stats(LINHAS_PERFIL)
+                f.write(f"\n# tracemalloc - {indicador} (pico {pico / (1024 * 1024):.1f} MB, memória retida por linha)\n")
+                for estatistica in fotografia.statistics('lineno')[:LINHAS_PERFIL]:
+                    f.write(f"{estatistica}\n")
+
+            self.emitir({
+                'evento': 'perfil',
+                'indicador': indicador,
+                'momento': datetime.now().isoformat(timespec='milliseconds'),
+                'perfil': str(arquivo_prof),
+                'relatorio': str(arquivo_txt),
+                'pico_python_mb': round(pico / (1024 * 1024), 1),
+                'pid': os.getpid()
+            })
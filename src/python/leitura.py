@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitura dos relatórios SIAPS de uma pasta
+Descrição: Lê os CSV em paralelo (threads) e guarda as equipes de cada
+relatório, já em colunas NumPy no formato do armazém, em um cache por arquivo
+válido enquanto caminho, tamanho e data de modificação não mudarem; numa nova
+leitura só os exports novos ou alterados são reprocessados, e as colunas de
+todos os arquivos são concatenadas em um único DataFrame. Informa quais
+arquivos foram relidos e quais falharam. Uma planilha consolidada (XLSX com
+todos os municípios) substitui os CSV da pasta. Além da pontuação, guarda o
+estabelecimento, o nome e os componentes de cada equipe (detalhamento)
+"""
+
+import os
+import re
+import pickle
+import hashlib
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import siaps
+import series
+
+# Incrementar quando o leitor (siaps.ler_relatorio_siaps) ou as colunas mudarem
+VERSAO_CACHE = 2
+
+# Extensões lidas nas pastas dos indicadores
+EXTENSAO_CSV = '.csv'
+EXTENSAO_PLANILHA = '.xlsx'
+
+# Colunas de identificação por linha das planilhas consolidadas (ver siaps.tabela_consolidada)
+COLUNAS_POR_LINHA = ('codigo_ibge', 'nome_municipio', 'competencia')
+
+# Colunas das equipes de um relatório (as do armazém, sem 'indicador')
+COLUNAS_EQUIPES = [
+    'competencia', 'codigo_ibge', 'nome_municipio', 'cnes', 'estabelecimento', 'ine', 'nome_equipe',
+    'tipo_equipe', 'numerador', 'denominador', 'pontuacao', 'componentes', 'arquivo_origem'
+]
+
+
+def tuplas(linhas):
+    """Array de objetos com uma tupla por linha (np.array converteria as tuplas em uma matriz)"""
+    linhas = list(linhas)
+    resultado = np.empty(len(linhas), dtype=object)
+    for i, linha in enumerate(linhas):
+        resultado[i] = tuple(linha)
+    return resultado
+
+
+def nomes_componentes(equipes):
+    """Colunas de componentes do indicador: as numéricas entre a identificação da equipe e a pontuação"""
+    colunas = [coluna for coluna in equipes.columns if coluna not in COLUNAS_POR_LINHA]
+    return [coluna for coluna in colunas[:-1] if coluna not in siaps.COLUNAS_TEXTO]
+
+
+def valores_componentes(componentes, numerador, denominador, quantidade):
+    """Valores de todos os componentes de uma equipe, a partir da tupla guardada em 'componentes'
+
+    A tupla omite os dois últimos componentes quando eles são o numerador e o
+    denominador (já guardados em colunas próprias); na maioria dos indicadores
+    ela fica vazia.
+    """
+    componentes = tuple(componentes) if componentes is not None else ()
+    return componentes + (numerador, denominador)[:max(quantidade - len(componentes), 0)]
+
+
+def colunas_relatorio(relatorio):
+    """Equipes de um relatório como dict coluna -> array (COLUNAS_EQUIPES)
+
+    Numerador e denominador são a antepenúltima e a penúltima colunas (as
+    mesmas usadas como peso na agregação); ficam vazios quando a tabela não
+    tem colunas suficientes. 'componentes' tem uma tupla por equipe com os
+    valores das colunas de nomes_componentes, sem o numerador e o denominador
+    (ver valores_componentes).
+    """
+    equipes = relatorio.equipes
+    linhas = len(equipes) if len(equipes.columns) else 0
+    colunas_equipe = [coluna for coluna in equipes.columns if coluna not in COLUNAS_POR_LINHA]
+
+    def texto(nome):
+        if nome in equipes.columns:
+            return equipes[nome].to_numpy(dtype=object)
+        return np.full(linhas, None, dtype=object)
+
+    def constante(valor):
+        return np.full(linhas, valor, dtype=object)
+
+    def por_linha(nome, valor):
+        return texto(nome) if nome in equipes.columns else constante(valor)
+
+    def numero(posicao):
+        if len(colunas_equipe) < 3:
+            return np.full(linhas, np.nan)
+        return siaps.converter_numero(equipes[colunas_equipe[posicao]]).to_numpy(dtype=np.float64, na_value=np.nan)
+
+    extras = [
+        coluna for coluna in nomes_componentes(equipes)
+        if len(colunas_equipe) < 3 or coluna not in colunas_equipe[-3:-1]
+    ]
+    componentes = tuplas(np.column_stack([
+        siaps.converter_numero(equipes[coluna]).to_numpy(dtype=np.float64, na_value=np.nan)
+        for coluna in extras
+    ] or [np.zeros((linhas, 0))]).tolist() if linhas else [])
+
+    if 'SIGLA DA EQUIPE' in equipes.columns:
+        tipo_equipe = texto('SIGLA DA EQUIPE')
+    else:
+        tipo_equipe = constante(relatorio.metadados.get('tipo_equipe'))
+
+    return {
+        'competencia': por_linha('competencia', relatorio.competencia),
+        'codigo_ibge': por_linha('codigo_ibge', relatorio.codigo_ibge),
+        'nome_municipio': por_linha('nome_municipio', relatorio.nome_municipio),
+        'cnes': texto('CNES'),
+        'estabelecimento': texto('ESTABELECIMENTO'),
+        'ine': texto('INE'),
+        'nome_equipe': texto('NOME DA EQUIPE'),
+        'tipo_equipe': tipo_equipe,
+        'numerador': numero(-3),
+        'denominador': numero(-2),
+        'pontuacao': equipes[colunas_equipe[-1]].to_numpy(dtype=np.float64) if linhas else np.zeros(0),
+        'componentes': componentes,
+        'arquivo_origem': constante(Path(relatorio.arquivo).name)
+    }
+
+
+class LeituraPasta:
+    """Resultado da leitura de uma lista de relatórios
+
+    registros: (arquivo, metadados do preâmbulo, colunas) dos lidos com sucesso, na ordem dos arquivos
+    novos / modificados: arquivos sem cache ou com cache desatualizado (relidos)
+    falhas: lista de (arquivo, mensagem de erro)
+    do_cache: quantidade de relatórios vindos do cache
+    consolidadas: planilhas com as equipes de vários municípios
+    substituidos: CSV com linhas descartadas porque uma planilha consolidada mais recente traz o
+        mesmo município e competência
+    prevalecem: CSV mais novos que a planilha consolidada que cobre o município e competência (as linhas dela saem)
+    faltantes: municípios sem relatório segundo a planilha de controle mais recente
+    """
+
+    def __init__(self):
+        self.registros = []
+        self.novos = []
+        self.modificados = []
+        self.falhas = []
+        self.do_cache = 0
+        self.consolidadas = []
+        self.substituidos = []
+        self.prevalecem = []
+        self.faltantes = []
+
+    def sem_municipio(self):
+        """Relatórios lidos cujo preâmbulo não identifica o município (ficam fora da tabela)"""
+        return [
+            arquivo for arquivo, metadados, _ in self.registros
+            if not metadados.get('codigo_ibge') and not metadados.get('planilha')
+        ]
+
+    def validos(self):
+        """(metadados, colunas) dos relatórios com município identificado e ao menos uma equipe"""
+        return [
+            (metadados, colunas) for _, metadados, colunas in self.registros
+            if (metadados.get('codigo_ibge') or metadados.get('consolidado')) and len(colunas['pontuacao'])
+        ]
+
+    def componentes(self):
+        """Nomes dos componentes do indicador, na ordem em que aparecem nos relatórios"""
+        nomes = {}
+        for metadados, _ in self.validos():
+            nomes.update(dict.fromkeys(metadados.get('componentes', [])))
+        return list(nomes)
+
+    def tabela(self):
+        """Equipes de todos os relatórios com município identificado, em um único DataFrame
+
+        Os componentes seguem a ordem de componentes(); relatórios com outro
+        layout têm as tuplas completas reordenadas (NaN nos componentes ausentes).
+        """
+        validos = self.validos()
+        if not validos:
+            return pd.DataFrame(columns=COLUNAS_EQUIPES)
+
+        nomes = self.componentes()
+        partes = []
+        for metadados, colunas in validos:
+            proprios = metadados.get('componentes', [])
+            if proprios != nomes:
+                posicoes = {nome: i for i, nome in enumerate(proprios)}
+                reordenados = tuplas(
+                    [valores[posicoes[nome]] if nome in posicoes else np.nan for nome in nomes]
+                    for valores in (
+                        valores_componentes(extras, numerador, denominador, len(proprios))
+                        for extras, numerador, denominador in zip(
+                            colunas['componentes'], colunas['numerador'], colunas['denominador']
+                        )
+                    )
+                )
+                colunas = {**colunas, 'componentes': reordenados}
+            partes.append(colunas)
+        return pd.DataFrame({coluna: np.concatenate([parte[coluna] for parte in partes]) for coluna in COLUNAS_EQUIPES})
+
+    def resumo(self):
+        """Dict serializável para logs, manifesto e resumos"""
+        return {
+            'arquivos': len(self.registros) + len(self.falhas),
+            'do_cache': self.do_cache,
+            'novos': [arquivo.name for arquivo in self.novos],
+            'modificados': [arquivo.name for arquivo in self.modificados],
+            'falhas': [{'arquivo': arquivo.name, 'erro': erro} for arquivo, erro in self.falhas],
+            'consolidadas': [arquivo.name for arquivo in self.consolidadas],
+            'substituidos': [arquivo.name for arquivo in self.substituidos],
+            'prevalecem': [arquivo.name for arquivo in self.prevalecem],
+            'faltantes': self.faltantes
+        }
+
+
+def arquivos_relatorios(pasta):
+    """CSV e planilhas XLSX de uma pasta de indicador (sem os temporários '~$' do Excel)"""
+    return sorted(
+        arquivo for arquivo in pasta.iterdir()
+        if arquivo.suffix.lower() in (EXTENSAO_CSV, EXTENSAO_PLANILHA) and not arquivo.name.startswith('~$')
+    )
+
+
+def impressao_pasta(pasta, extensoes=(EXTENSAO_CSV, EXTENSAO_PLANILHA)):
+    """Nome, tamanho e mtime dos arquivos da pasta com as extensões dadas: muda sempre que um arquivo é trocado"""
+    try:
+        return tuple(sorted(
+            (entrada.name, entrada.stat().st_size, entrada.stat().st_mtime_ns)
+            for entrada in os.scandir(pasta)
+            if entrada.name.lower().endswith(extensoes)
+        ))
+    except OSError:
+        return ()
+
+
+def arquivo_cache(caminho, pasta_cache):
+    """Entrada do cache de um relatório (uma por caminho; substituída quando o arquivo muda)"""
+    nome = hashlib.sha1(str(Path(caminho).resolve()).encode('utf-8')).hexdigest()[:20]
+    return pasta_cache / f"{nome}.pkl"
+
+
+def ler_com_cache(caminho, pasta_cache=None):
+    """(metadados, colunas, erro, situação) de um arquivo; situação: 'cache', 'novo' ou 'modificado'
+
+    Falhas de interpretação também ficam em cache, para não reprocessar um
+    arquivo quebrado que não mudou.
+    """
+    stat = os.stat(caminho)
+    identidade = {'versao': VERSAO_CACHE, 'tamanho': stat.st_size, 'modificado': stat.st_mtime_ns}
+    entrada = arquivo_cache(caminho, pasta_cache) if pasta_cache is not None else None
+
+    situacao = 'novo'
+    if entrada is not None:
+        try:
+            with open(entrada, 'rb') as f:
+                registro = pickle.load(f)
+            if registro['identidade'] == identidade:
+                return registro['metadados'], registro['colunas'], registro['erro'], 'cache'
+            situacao = 'modificado'
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # Entrada corrompida ou de outra versão do NumPy: é refeita abaixo
+            situacao = 'modificado'
+
+    metadados, colunas, erro = None, None, None
+    ler = siaps.ler_planilha_siaps if Path(caminho).suffix.lower() == EXTENSAO_PLANILHA else siaps.ler_relatorio_siaps
+    try:
+        relatorio = ler(caminho)
+        metadados = {**relatorio.metadados, 'componentes': nomes_componentes(relatorio.equipes)}
+        colunas = colunas_relatorio(relatorio)
+    except Exception as e:
+        erro = f"{type(e).__name__}: {e}"
+
+    if entrada is not None:
+        try:
+            entrada.parent.mkdir(parents=True, exist_ok=True)
+            temporario = entrada.with_name(f"{entrada.name}.{os.getpid()}.tmp")
+            with open(temporario, 'wb') as f:
+                pickle.dump({'identidade': identidade, 'metadados': metadados, 'colunas': colunas, 'erro': erro},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporario, entrada)
+        except OSError:
+            pass
+
+    return metadados, colunas, erro, situacao
+
+
+def chave_municipio(codigo):
+    """Código IBGE sem o dígito verificador: os CSV trazem 6 dígitos, algumas planilhas 7"""
+    return re.sub(r'\D', '', str(codigo))[:6]
+
+
+def chave_competencia(competencia):
+    """Competência comparável entre CSV e planilha ('AGO/25' e 'AGOSTO/2025' coincidem)"""
+    chave = series.chave_competencia(competencia)
+    return chave if chave != (0, 0) else str(competencia or '').strip().upper()
+
+
+def chaves_linhas(colunas):
+    """(município, competência) de cada linha de um relatório"""
+    return [
+        (chave_municipio(codigo), chave_competencia(competencia))
+        for codigo, competencia in zip(colunas['codigo_ibge'], colunas['competencia'])
+    ]
+
+
+def filtrar_colunas(colunas, manter):
+    """Colunas de um relatório só com as linhas em que `manter` é verdadeiro"""
+    return {coluna: np.asarray(valores)[manter] for coluna, valores in colunas.items()}
+
+
+def ler_relatorios(arquivos, pasta_cache=None, trabalhadores=None):
+    """Lê os relatórios (em paralelo se trabalhadores != 1) e devolve uma LeituraPasta
+
+    Uma planilha consolidada substitui, município a município, os CSV que ela
+    cobre: o CSV de um município presente na planilha é descartado, a menos
+    que seja mais novo que ela (aí as linhas do município saem da planilha).
+    CSV de municípios que a planilha não traz continuam valendo.
+
+    trabalhadores: threads do pool (None = padrão do ThreadPoolExecutor); o
+    pd.read_csv libera o GIL durante a leitura, e os lotes com vários
+    indicadores já usam processos (gerar_todos_svgs.py -j)
+    """
+    arquivos = sorted(Path(arquivo) for arquivo in arquivos)
+    planilhas = [arquivo for arquivo in arquivos if arquivo.suffix.lower() == EXTENSAO_PLANILHA]
+    relatorios = [arquivo for arquivo in arquivos if arquivo.suffix.lower() != EXTENSAO_PLANILHA]
+
+    def ler(caminho):
+        try:
+            return ler_com_cache(caminho, pasta_cache)
+        except OSError as e:
+            return None, None, f"{type(e).__name__}: {e}", 'novo'
+
+    leitura = LeituraPasta()
+
+    def registrar(lista, resultados):
+        for caminho, (metadados, colunas, erro, situacao) in zip(lista, resultados):
+            if situacao == 'cache':
+                leitura.do_cache += 1
+            elif situacao == 'modificado':
+                leitura.modificados.append(caminho)
+            else:
+                leitura.novos.append(caminho)
+
+            if erro is not None:
+                leitura.falhas.append((caminho, erro))
+                continue
+            leitura.registros.append((caminho, metadados, colunas))
+            if metadados.get('consolidado'):
+                leitura.consolidadas.append(caminho)
+            if metadados.get('controle'):
+                # Planilhas de controle têm a data no nome: a última prevalece
+                leitura.faltantes = metadados.get('faltantes', [])
+
+    registrar(planilhas, [ler(caminho) for caminho in planilhas])
+
+    if trabalhadores == 1 or len(relatorios) <= 1:
+        resultados = [ler(caminho) for caminho in relatorios]
+    else:
+        with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+            resultados = list(executor.map(ler, relatorios))
+    registrar(relatorios, resultados)
+
+    if leitura.consolidadas:
+        substituir_por_planilha(leitura)
+    return leitura
+
+
+def substituir_por_planilha(leitura):
+    """Resolve, por (município, competência), as linhas dos CSV cobertas pelas planilhas consolidadas
+
+    Só saem dos CSV as linhas de um município e competência que a planilha
+    traz, e só se o CSV não for mais novo que ela; as demais competências do
+    município continuam vindo do CSV. Um CSV mais novo prevalece: as linhas
+    do mesmo município e competência saem da planilha. Preenche
+    leitura.substituidos (CSV com linhas descartadas) e leitura.prevalecem.
+    """
+    # (município, competência) -> mtime da planilha consolidada mais recente que a traz
+    cobertura = {}
+    for caminho, metadados, colunas in leitura.registros:
+        if not metadados.get('consolidado'):
+            continue
+        modificado = caminho.stat().st_mtime_ns
+        for chave in set(chaves_linhas(colunas)):
+            cobertura[chave] = max(cobertura.get(chave, modificado), modificado)
+
+    registros, mais_novos = [], set()
+    for caminho, metadados, colunas in leitura.registros:
+        chaves = chaves_linhas(colunas)
+        if metadados.get('consolidado') or not any(chave in cobertura for chave in chaves):
+            registros.append((caminho, metadados, colunas))
+            continue
+
+        modificado = caminho.stat().st_mtime_ns
+        manter = np.array([chave not in cobertura or modificado > cobertura[chave] for chave in chaves], dtype=bool)
+        novas = {chave for chave in chaves if chave in cobertura and modificado > cobertura[chave]}
+        if novas:
+            leitura.prevalecem.append(caminho)
+            mais_novos.update(novas)
+        if not manter.all():
+            leitura.substituidos.append(caminho)
+        if manter.any():
+            registros.append((caminho, metadados, colunas if manter.all() else filtrar_colunas(colunas, manter)))
+
+    if mais_novos:
+        registros = [
+            (caminho, metadados, filtrar_colunas(colunas, np.array(
+                [chave not in mais_novos for chave in chaves_linhas(colunas)], dtype=bool
+            )) if metadados.get('consolidado') else colunas)
+            for caminho, metadados, colunas in registros
+        ]
+    leitura.registros = registros
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manifesto de build - rebuilds incrementais
+Descrição: Guarda, por indicador, a assinatura das entradas usadas na última
+geração (conteúdo dos CSV da pasta, GeoJSON das regiões e configuração do
+gerador) para pular indicadores cujas entradas não mudaram
+"""
+
+import os
+import json
+import hashlib
+
+VERSAO_MANIFESTO = 1
+
+
+def hash_arquivos(arquivos, base=None):
+    """Hash do nome e do conteúdo de uma lista de arquivos"""
+    sha = hashlib.sha256()
+
+    for arquivo in sorted(arquivos):
+        nome = arquivo.relative_to(base) if base else arquivo.name
+        sha.update(str(nome).encode('utf-8'))
+        sha.update(b'\0')
+        with open(arquivo, 'rb') as f:
+            for bloco in iter(lambda: f.read(1 << 20), b''):
+                sha.update(bloco)
+        sha.update(b'\0')
+
+    return sha.hexdigest()
+
+
+def hash_config(config):
+    """Hash estável de um dicionário de configuração"""
+    texto = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def carregar(caminho):
+    """Lê o manifesto; devolve um manifesto vazio se ausente, inválido ou de outra versão"""
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+    except (OSError, ValueError):
+        dados = None
+
+    if not isinstance(dados, dict) or dados.get('versao') != VERSAO_MANIFESTO:
+        return {'versao': VERSAO_MANIFESTO, 'indicadores': {}}
+
+    dados.setdefault('indicadores', {})
+    return dados
+
+
+def salvar(caminho, dados):
+    """Grava o manifesto de forma atômica"""
+    temporario = caminho.with_name(caminho.name + '.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temporario, caminho)
@@ -7,21 +7,78 @@ Descrição: Processa dados CSV e JSON para gerar SVGs consumidos pelo frontend
 """
 
 import json
+import hashlib
+import argparse
+import numpy as np
 import pandas as pd
 import os
-import re
 import sys
 from pathlib import Path
-import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from xml.sax.saxutils import escape, quoteattr
 from datetime import datetime
 
+import siaps
+import armazem
+import geometria
+import manifesto
+import topologia
+import series
+import leitura
+import detalhamento
+import matriz
+import hierarquia
+import classificacao
+from instrumentacao import Instrumentacao
+from municipios import RegistroMunicipios, codigo_completo, normalizar_nome
+from modelo_svg import ModeloSVG, campos_municipio, escrever_fragmentos
+
+# Versão do formato das saídas (SVG, payload e topologia): entra na assinatura dos
+# indicadores. Incremente ao mudar o que o gerador escreve, para forçar o rebuild
+VERSAO_SAIDA = 2
+
+# Modelos SVG de recortes guardados em memória (LRU): no servidor, cada subconjunto
+# de municípios pedido gera um modelo, então o cache não pode crescer sem limite
+MAXIMO_MODELOS_RECORTE = 16
+
+# Estilos CSS integrados aos SVGs
+ESTILO_SVG = """
+        .municipio {
+            fill-rule: evenodd;
+            stroke: #ffffff;
+            stroke-width: 0.8;
+            cursor: pointer;
+            transition: all 0.3s ease;
+        }
+        .municipio:hover {
+            stroke-width: 2;
+            opacity: 0.8;
+            filter: brightness(1.1);
+        }
+        .regiao-grupo {
+            pointer-events: all;
+        }
+        .titulo-mapa {
+            font-family: 'Arial', sans-serif;
+            font-size: 24px;
+            font-weight: bold;
+            fill: #333;
+        }
+"""
+
 class GeradorSVGWeb:
-    def __init__(self):
+    def __init__(self, metodo_agregacao='ponderada'):
         # Ajusta paths baseado na localização do script em src/python/
         self.base_path = Path(__file__).parent.parent.parent  # Volta para raiz do projeto
         self.regioes_path = self.base_path / "REGIAO"
         self.svg_output_path = self.base_path / "src" / "svg"
         self.dados_output_path = self.base_path / "src" / "data"
+        self.cache_path = self.base_path / "src" / "cache"
+        self.manifesto_path = self.dados_output_path / "manifesto.json"
+        self.topologia_path = self.dados_output_path / "municipios.topo.json"
+        self.armazem_path = self.cache_path / "armazem"
+        self.relatorios_cache_path = self.cache_path / "relatorios"
+        self.classes_cache_path = self.cache_path / "classes"
         
         # Cria diretórios de saída
         self.svg_output_path.mkdir(parents=True, exist_ok=True)
@@ -34,6 +91,68 @@ class GeradorSVGWeb:
         self.svg_height = 700
         self.bounds = None
         
+        # Geometria projetada e simplificada (ver carregar_geometria)
+        self.geometria = None
+        self.chave_geometria = None
+        
+        # Registro de municípios (códigos de 6/7 dígitos e nomes), construído com a geometria
+        self.municipios = None
+        self.tolerancia_simplificacao = 0.25  # pixels no viewBox
+        
+        # Modelo do SVG: geometria serializada uma vez, recolorida por indicador
+        self.modelo_svg = None
+        self.modelos_recorte = OrderedDict()
+        self.maximo_modelos_recorte = MAXIMO_MODELOS_RECORTE
+        
+        # JSON sem indentação (arquivos menores para o navegador)
+        self.json_compacto = False
+        
+        # Séries por competência dos indicadores já carregados (ver carregar_dados_csv_indicador)
+        self.series = {}
+        
+        # Leitura dos CSV: threads por pasta (None = padrão do ThreadPoolExecutor) e o
+        # resultado da última leitura de cada indicador (relidos e falhas)
+        self.trabalhadores_leitura = None
+        self.leituras = {}
+        
+        # Armazém colunar com as equipes de todos os indicadores (ver ingerir_armazem)
+        self.armazem = None
+        self.assinaturas_armazem = {}
+        self.componentes_armazem = {}
+        
+        # Equipes (com CD_MUN) e nomes dos componentes do último carregamento de cada indicador,
+        # usados no detalhamento por município (ver gerar_equipes)
+        self.equipes_detalhe = {}
+        
+        # Pontuação composta da APS: percentis de todos os indicadores ponderados por 'peso'
+        # (padrão 1) de indicadores_mapeamento; sem composto abaixo da cobertura mínima
+        self.composto = {
+            'codigo': 'composto',
+            'nome': 'Desempenho Geral da APS',
+            'cobertura_minima': 0.5
+        }
+        self.ranking_path = self.dados_output_path / "ranking.json"
+        
+        # Topologia para o navegador: grade de quantização (pixels) e simplificação dos arcos
+        self.escala_topologia = 0.1
+        
+        # Níveis de detalhe para o zoom: tolerância e grade em pixels do mapa estadual e a maior
+        # ampliação atendida por cada um (erro de até ~0,5px na tela); 'estado' usa os valores acima
+        self.niveis_detalhe = {
+            'estado': {'tolerancia': None, 'escala': None, 'zoom_max': 2},
+            'regiao': {'tolerancia': 0.05, 'escala': 0.02, 'zoom_max': 10},
+            'municipio': {'tolerancia': 0.01, 'escala': 0.005, 'zoom_max': None}
+        }
+        self.geometrias_nivel = {}
+        
+        # Tempos por etapa (eventos JSON-lines) e perfis opcionais por indicador
+        self.instrumentacao = Instrumentacao()
+        
+        # Agregação das equipes por município: 'media', 'ponderada' ou 'maximo'
+        if metodo_agregacao not in siaps.METODOS_AGREGACAO:
+            raise ValueError(f"Método de agregação inválido: {metodo_agregacao}")
+        self.metodo_agregacao = metodo_agregacao
+        
         # Cores consistentes com o sistema web
         self.cores_faixas = {
             'muito_alto': '#2e7d32',    # Verde escuro (80-100%)
@@ -44,6 +163,12 @@ class GeradorSVGWeb:
             'sem_dados': '#e0e0e0'     # Cinza para municípios sem dados
         }
         
+        # Classes do pior para o melhor desempenho; o esquema de cada indicador ('classificacao' em
+        # indicadores_mapeamento) sobrescreve classificacao.ESQUEMA_PADRAO (faixas fixas de 20 pontos)
+        self.paleta_classes = [
+            self.cores_faixas[faixa] for faixa in ('muito_baixo', 'baixo', 'medio', 'alto', 'muito_alto')
+        ]
+        
         # Mapeamento de indicadores (consistente com mapa.js)
         self.indicadores_mapeamento = {
             'emulti-acoes': {
@@ -52,7 +177,9 @@ class GeradorSVGWeb:
             },
             'emulti-media': {
                 'nome': 'Média de Atendimento da eMulti por Pessoa',
-                'pasta': 'EQUIPES MULTIPROFISSIONAIS NA APS/MÉDIA DE ATENDIMENTO DA EMULTI POR PESSOA'
+                'pasta': 'EQUIPES MULTIPROFISSIONAIS NA APS/MÉDIA DE ATENDIMENTO DA EMULTI POR PESSOA',
+                'unidade': '',  # atendimentos por pessoa, fora da escala 0-100
+                'classificacao': {'metodo': 'quantil'}
             },
             'esf-desenvolvimento': {
                 'nome': 'Desenvolvimento Infantil',
@@ -96,7 +223,9 @@ class GeradorSVGWeb:
             },
             'sb-exodontias': {
                 'nome': 'Taxa de Exodontias',
-                'pasta': 'SAÚDE BUCAL NA APS/TAXA DE EXODONTIAS'
+                'pasta': 'SAÚDE BUCAL NA APS/TAXA DE EXODONTIAS',
+                'direcao': 'menor',  # quanto menor a taxa, melhor (entra invertida no composto)
+                'classificacao': {'metodo': 'jenks'}
             },
             'sb-tratamento-concluido': {
                 'nome': 'Tratamento Odontológico Concluído',
@@ -118,7 +247,7 @@ class GeradorSVGWeb:
         """Carrega dados GeoJSON das microrregiões"""
         self.log("Carregando dados das microrregiões...")
         
-        arquivos_json = list(self.regioes_path.glob("*.json"))
+        arquivos_json = sorted(self.regioes_path.glob("*.json"))
         
         for arquivo in arquivos_json:
             try:
@@ -139,22 +268,21 @@ class GeradorSVGWeb:
     
     def calcular_bounds(self):
         """Calcula limites geográficos para normalização"""
-        min_x, min_y = float('inf'), float('inf')
-        max_x, max_y = float('-inf'), float('-inf')
+        # Anéis exteriores de todas as partes (os buracos ficam dentro deles)
+        aneis = [
+            poligono[0]
+            for _, _, poligonos in geometria.normalizar_feicoes(self.dados_regioes)
+            for poligono in poligonos
+        ]
         
-        for dados_regiao in self.dados_regioes.values():
-            if 'features' not in dados_regiao:
-                continue
-            
-            for feature in dados_regiao['features']:
-                geometry = feature.get('geometry', {})
-                if geometry.get('type') != 'Polygon':
-                    continue
-                
-                coordinates = geometry['coordinates'][0]
-                for lng, lat in coordinates:
-                    min_x, max_x = min(min_x, lng), max(max_x, lng)
-                    min_y, max_y = min(min_y, lat), max(max_y, lat)
+        # Min/max vetorizados sobre um buffer único com todos os vértices
+        buffer = np.concatenate(aneis) if aneis else np.zeros((0, 2))
+        if len(buffer) == 0:
+            self.log("Nenhum polígono para calcular os limites", "ERROR")
+            return
+        
+        min_x, min_y = buffer.min(axis=0).tolist()
+        max_x, max_y = buffer.max(axis=0).tolist()
         
         self.bounds = {
             'min_x': min_x, 'max_x': max_x,
@@ -165,6 +293,127 @@ class GeradorSVGWeb:
         
         self.log(f"Bounds calculados: {self.bounds['width']:.3f} x {self.bounds['height']:.3f}")
     
+    def parametros_nivel(self, nivel):
+        """Tolerância, grade da topologia e zoom máximo de um nível de detalhe"""
+        if nivel not in self.niveis_detalhe:
+            raise ValueError(f"Nível de detalhe inválido: {nivel} (use {', '.join(self.niveis_detalhe)})")
+        parametros = dict(self.niveis_detalhe[nivel])
+        if parametros['tolerancia'] is None:
+            parametros['tolerancia'] = self.tolerancia_simplificacao
+        if parametros['escala'] is None:
+            parametros['escala'] = self.escala_topologia
+        return parametros
+    
+    def nivel_para_zoom(self, zoom):
+        """Nível mais leve que ainda atende a ampliação pedida (1 = estado inteiro)"""
+        for nivel, parametros in self.niveis_detalhe.items():
+            if parametros['zoom_max'] is None or zoom <= parametros['zoom_max']:
+                return nivel
+        return list(self.niveis_detalhe)[-1]
+    
+    def obter_geometria(self, tolerancia, usar_cache=True):
+        """(geometria, chave) com a tolerância pedida, do cache em disco ou construída a partir do GeoJSON"""
+        arquivos_json = sorted(self.regioes_path.glob("*.json"))
+        if not arquivos_json:
+            self.log(f"Nenhum GeoJSON em {self.regioes_path}", "ERROR")
+            return None
+        
+        chave = geometria.chave_cache(arquivos_json, {
+            'svg_width': self.svg_width,
+            'svg_height': self.svg_height,
+            'tolerancia': tolerancia
+        })
+        pasta_cache = self.cache_path / "geometria" / chave
+        
+        if usar_cache:
+            carregada = geometria.carregar_cache(pasta_cache)
+            if carregada is not None:
+                self.log(f"Geometria do cache {chave}: {len(carregada.feicoes)} municípios, "
+                         f"{carregada.total_vertices} vértices")
+                return carregada, chave
+        
+        # Cache ausente ou desatualizado: projeta e simplifica a partir do GeoJSON
+        if not self.dados_regioes and not self.carregar_dados_regioes():
+            return None
+        self.calcular_bounds()
+        
+        construida = geometria.construir_geometria(
+            self.dados_regioes, self.converter_coordenadas_array, self.bounds, tolerancia
+        )
+        
+        vertices_originais = sum(
+            len(anel)
+            for _, _, poligonos in geometria.normalizar_feicoes(self.dados_regioes)
+            for poligono in poligonos
+            for anel in poligono
+        )
+        self.log(f"Geometria simplificada: {vertices_originais} -> {construida.total_vertices} vértices "
+                 f"(tolerância {tolerancia}px)")
+        
+        try:
+            geometria.salvar_cache(construida, pasta_cache)
+            self.log(f"Cache de geometria salvo: {pasta_cache}")
+        except OSError as e:
+            self.log(f"Não foi possível salvar o cache de geometria: {e}", "WARNING")
+        
+        return construida, chave
+    
+    def carregar_geometria(self, usar_cache=True):
+        """Carrega a geometria do nível 'estado' (a usada nos mapas inteiros e no registro de municípios)"""
+        resultado = self.obter_geometria(self.tolerancia_simplificacao, usar_cache)
+        if resultado is None:
+            return False
+        
+        self.geometria, self.chave_geometria = resultado
+        self.bounds = self.geometria.bounds
+        self.municipios = RegistroMunicipios.de_feicoes(self.geometria.feicoes)
+        self.geometrias_nivel = {'estado': self.geometria}
+        return True
+    
+    def geometria_nivel(self, nivel):
+        """Geometria de um nível de detalhe (carregada sob demanda; mesmas feições, na mesma ordem)"""
+        if nivel not in self.geometrias_nivel:
+            resultado = self.obter_geometria(self.parametros_nivel(nivel)['tolerancia'])
+            if resultado is None:
+                return None
+            self.geometrias_nivel[nivel] = resultado[0]
+        return self.geometrias_nivel[nivel]
+    
+    def preparar(self, topologia=True, ingerir=False):
+        """Carga compartilhada por todos os indicadores: geometria, modelo SVG, topologia e armazém"""
+        with self.instrumentacao.etapa('geometria') as medida:
+            if not self.carregar_geometria():
+                return False
+            medida['linhas'] = len(self.geometria.feicoes)
+            medida['vertices'] = self.geometria.total_vertices
+        
+        with self.instrumentacao.etapa('modelo_svg'):
+            self.construir_modelo_svg()
+        
+        if topologia:
+            with self.instrumentacao.etapa('topologia') as medida:
+                caminho = self.gerar_topologia()
+                medida['bytes_gravados'] = sum(
+                    self.topologia_nivel_path(nivel).stat().st_size for nivel in self.niveis_detalhe
+                ) if caminho else None
+        
+        with self.instrumentacao.etapa('armazem') as medida:
+            if ingerir:
+                self.ingerir_armazem()
+            else:
+                self.carregar_armazem()
+            medida['linhas'] = len(self.armazem) if self.armazem is not None else 0
+        
+        return True
+    
+    def recarregar_regioes(self):
+        """Descarta regiões, geometrias e modelos em memória e prepara tudo de novo a partir do REGIAO/
+        (modo --watch, quando um GeoJSON muda)"""
+        self.dados_regioes = {}
+        self.modelo_svg = None
+        self.modelos_recorte.clear()
+        return self.preparar()
+    
     def converter_coordenadas(self, lng, lat):
         """Converte coordenadas geográficas para SVG"""
         if not self.bounds:
@@ -180,22 +429,28 @@ class GeradorSVGWeb:
         
         return x, y
     
-    def extrair_dados_municipio_csv(self, info_municipio):
-        """Extrai código IBGE e nome do formato '500025 / ALCINÓPOLIS'"""
-        if pd.isna(info_municipio):
-            return None, None
-        
-        info_str = str(info_municipio).strip()
+    def transformacao_svg(self):
+        """Coeficientes (escala_x, escala_y, desloc_x, desloc_y) da projeção lng/lat -> SVG"""
+        # Adiciona margem de 5% em cada lado
+        margin = 0.05
+        effective_width = self.svg_width * (1 - 2 * margin)
+        effective_height = self.svg_height * (1 - 2 * margin)
         
-        # Extrai código IBGE
-        match_codigo = re.match(r'^(\d{6})', info_str)
-        codigo = match_codigo.group(1) if match_codigo else None
+        escala_x = effective_width / self.bounds['width']
+        escala_y = -effective_height / self.bounds['height']
+        desloc_x = margin * self.svg_width - self.bounds['min_x'] * escala_x
+        desloc_y = self.svg_height - margin * self.svg_height - self.bounds['min_y'] * escala_y
         
-        # Extrai nome do município
-        match_nome = re.search(r'/\s*(.+)$', info_str)
-        nome = match_nome.group(1).strip() if match_nome else None
+        return escala_x, escala_y, desloc_x, desloc_y
+    
+    def converter_coordenadas_array(self, coordenadas):
+        """Converte um anel inteiro (array N x 2 de lng/lat) para SVG com uma única transformação afim"""
+        coordenadas = np.asarray(coordenadas, dtype=np.float64).reshape(-1, 2)
+        if not self.bounds:
+            return np.zeros_like(coordenadas)
         
-        return codigo, nome
+        escala_x, escala_y, desloc_x, desloc_y = self.transformacao_svg()
+        return coordenadas * (escala_x, escala_y) + (desloc_x, desloc_y)
     
     def carregar_dados_csv_indicador(self, codigo_indicador):
         """Carrega dados CSV para um indicador específico"""
@@ -212,217 +467,392 @@ class GeradorSVGWeb:
             self.log(f"Pasta não encontrada: {pasta_indicador}", "ERROR")
             return {}
         
+        # Libera as equipes do carregamento anterior antes de ler as novas
+        self.equipes_detalhe.pop(codigo_indicador, None)
+        
+        # Usa o armazém colunar quando ele foi gerado a partir destes mesmos CSV
+        lidas = self.equipes_do_armazem(codigo_indicador, pasta_indicador)
+        if lidas is not None:
+            origem = "armazém"
+        else:
+            lidas = self.ler_equipes_csv(pasta_indicador, codigo_indicador)
+            origem = "CSV"
+        tabela, componentes = lidas
+        
+        if tabela.empty:
+            self.log(f"Nenhuma equipe encontrada ({origem}), 0 municípios")
+            return {}
+        
+        # Agrega as equipes por competência e CD_MUN (mesma chave da geometria); o mapa
+        # usa a competência mais recente de cada município
+        tabela = self.normalizar_codigos(tabela)
+        equipes = armazem.formato_equipes(tabela)
+        self.equipes_detalhe[codigo_indicador] = (tabela, componentes)
+        por_competencia = series.agregar_por_competencia(equipes, self.metodo_agregacao)
+        self.series[codigo_indicador] = series.SerieIndicador.de_agregado(
+            por_competencia, config.get('direcao', 'maior')
+        )
+        agregado = series.mais_recente(por_competencia)
+        
         dados_municipios = {}
-        arquivos_processados = 0
+        for codigo, nome, pontuacao, n_equipes, competencia, arquivo in zip(
+            agregado.index, agregado['nome'], agregado['pontuacao'], agregado['equipes'],
+            agregado['competencia'], agregado['arquivo_origem']
+        ):
+            municipio = self.municipios.resolver(codigo) if self.municipios else None
+            dados_municipios[codigo] = {
+                'nome': municipio.nome if municipio else (nome or 'Nome não identificado'),
+                'regiao': municipio.regiao if municipio else None,
+                'pontuacao': float(pontuacao),
+                'equipes': int(n_equipes),
+                'competencia': competencia,
+                'arquivo_origem': arquivo
+            }
         
-        # Processa todos os CSV da pasta
-        for arquivo_csv in pasta_indicador.glob("*.csv"):
-            try:
-                # Lê CSV pulando cabeçalho (linhas 0-14)
-                df = pd.read_csv(arquivo_csv, sep=';', skiprows=15, encoding='utf-8', low_memory=False)
-                
-                if df.empty:
-                    continue
-                
-                for _, row in df.iterrows():
-                    if len(row) < 2:
-                        continue
-                    
-                    codigo, nome = self.extrair_dados_municipio_csv(row.iloc[0])
-                    
-                    if not codigo:
-                        continue
-                    
-                    # Pontuação na última coluna
-                    try:
-                        pontuacao_str = str(row.iloc[-1]).replace(',', '.')
-                        pontuacao = float(pontuacao_str)
-                        
-                        dados_municipios[codigo] = {
-                            'nome': nome or 'Nome não identificado',
-                            'pontuacao': pontuacao,
-                            'arquivo_origem': arquivo_csv.name
-                        }
-                        
-                    except (ValueError, TypeError):
-                        continue
-                
-                arquivos_processados += 1
-                
-            except Exception as e:
-                self.log(f"Erro processando {arquivo_csv.name}: {e}", "ERROR")
+        sem_geometria = [codigo for codigo, dados in dados_municipios.items() if dados['regiao'] is None]
+        if self.municipios and sem_geometria:
+            self.log(f"Municípios sem geometria no REGIAO/: {', '.join(sem_geometria)}", "WARNING")
         
-        self.log(f"Processados {arquivos_processados} arquivos, {len(dados_municipios)} municípios")
+        self.log(f"Processadas {len(equipes)} equipes ({origem}), {len(dados_municipios)} municípios, "
+                 f"{len(self.series[codigo_indicador].competencias)} competência(s) "
+                 f"(agregação: {self.metodo_agregacao})")
         return dados_municipios
     
-    def obter_cor_por_pontuacao(self, pontuacao):
-        """Retorna cor baseada na pontuação"""
-        if pontuacao is None or pd.isna(pontuacao):
-            return self.cores_faixas['sem_dados']
-        elif pontuacao >= 80:
-            return self.cores_faixas['muito_alto']
-        elif pontuacao >= 60:
-            return self.cores_faixas['alto']
-        elif pontuacao >= 40:
-            return self.cores_faixas['medio']
-        elif pontuacao >= 20:
-            return self.cores_faixas['baixo']
+    def normalizar_codigos(self, equipes):
+        """Troca os códigos dos relatórios (6 dígitos) pelo CD_MUN de 7 dígitos, resolvendo cada código uma vez"""
+        unicos = equipes['codigo_ibge'].dropna().unique()
+        if self.municipios:
+            codigos = {codigo: self.municipios.codigo(codigo) for codigo in unicos}
         else:
-            return self.cores_faixas['muito_baixo']
+            codigos = {codigo: codigo_completo(codigo) for codigo in unicos}
+        return equipes.assign(codigo_ibge=equipes['codigo_ibge'].map(codigos))
     
-    def gerar_svg_indicador(self, codigo_indicador, dados_csv):
-        """Gera SVG para um indicador específico"""
-        config = self.indicadores_mapeamento[codigo_indicador]
+    def ler_relatorios(self, pasta_indicador):
+        """Relatórios da pasta em paralelo, reaproveitando o cache dos que não mudaram"""
+        lidos = leitura.ler_relatorios(
+            leitura.arquivos_relatorios(pasta_indicador), self.relatorios_cache_path, self.trabalhadores_leitura
+        )
         
-        # Elemento SVG raiz
-        svg = ET.Element('svg', {
-            'width': str(self.svg_width),
-            'height': str(self.svg_height),
-            'viewBox': f'0 0 {self.svg_width} {self.svg_height}',
-            'xmlns': 'http://www.w3.org/2000/svg',
-            'id': f'mapa-{codigo_indicador}'
-        })
+        relidos = lidos.novos + lidos.modificados
+        self.log(f"{pasta_indicador.name}: {len(lidos.registros) + len(lidos.falhas)} arquivos, "
+                 f"{lidos.do_cache} do cache, {len(lidos.novos)} novos, {len(lidos.modificados)} modificados, "
+                 f"{len(lidos.falhas)} com erro")
+        if lidos.modificados:
+            nomes = [arquivo.name for arquivo in lidos.modificados]
+            extras = f" (+{len(nomes) - 10})" if len(nomes) > 10 else ""
+            self.log(f"Relidos por alteração: {', '.join(nomes[:10])}{extras}")
+        for arquivo, erro in lidos.falhas:
+            situacao = "relido" if arquivo in relidos else "em cache"
+            self.log(f"Erro processando {arquivo.name} ({situacao}): {erro}", "ERROR")
+        if lidos.consolidadas:
+            self.log(f"Planilha consolidada: {', '.join(arquivo.name for arquivo in lidos.consolidadas)}")
+        if lidos.substituidos:
+            nomes = [arquivo.name for arquivo in lidos.substituidos]
+            extras = f" (+{len(nomes) - 10})" if len(nomes) > 10 else ""
+            self.log(f"{len(nomes)} CSV substituídos pela planilha consolidada: {', '.join(nomes[:10])}{extras}",
+                     "WARNING")
+        if lidos.prevalecem:
+            self.log(f"CSV mais novos que a planilha consolidada (prevalecem sobre ela): "
+                     f"{', '.join(arquivo.name for arquivo in lidos.prevalecem)}", "WARNING")
+        if lidos.faltantes:
+            self.log(f"Municípios faltantes segundo a planilha de controle: {', '.join(lidos.faltantes)}", "WARNING")
+        return lidos
+    
+    def ler_equipes_csv(self, pasta_indicador, codigo_indicador=None):
+        """Lê os relatórios da pasta: (equipes no formato do armazém, nomes dos componentes)"""
+        lidos = self.ler_relatorios(pasta_indicador)
+        for arquivo_csv in lidos.sem_municipio():
+            self.log(f"Município não identificado no preâmbulo: {arquivo_csv.name}", "WARNING")
         
-        # Estilos CSS integrados
-        style = ET.SubElement(svg, 'style')
-        style.text = f"""
-        <![CDATA[
-        .municipio {{
-            stroke: #ffffff;
-            stroke-width: 0.8;
-            cursor: pointer;
-            transition: all 0.3s ease;
-        }}
-        .municipio:hover {{
-            stroke-width: 2;
-            opacity: 0.8;
-            filter: brightness(1.1);
-        }}
-        .regiao-grupo {{
-            pointer-events: all;
-        }}
-        .titulo-mapa {{
-            font-family: 'Arial', sans-serif;
-            font-size: 24px;
-            font-weight: bold;
-            fill: #333;
-        }}
-        ]]>
-        """
+        if codigo_indicador is not None:
+            self.leituras[codigo_indicador] = lidos.resumo()
         
-        # Título do mapa
-        titulo = ET.SubElement(svg, 'text', {
-            'x': str(self.svg_width // 2),
-            'y': '30',
-            'text-anchor': 'middle',
-            'class': 'titulo-mapa'
-        })
-        titulo.text = config['nome']
+        return lidos.tabela(), lidos.componentes()
+    
+    def carregar_armazem(self):
+        """Carrega o armazém colunar, se existir"""
+        tabela, meta = armazem.carregar_armazem(self.armazem_path)
+        if tabela is None:
+            return False
         
-        # Grupo principal dos municípios
-        grupo_municipios = ET.SubElement(svg, 'g', {
-            'id': 'municipios',
-            'transform': 'translate(0, 50)'  # Espaço para título
-        })
+        self.armazem = tabela
+        self.assinaturas_armazem = meta['assinaturas']
+        self.componentes_armazem = meta.get('componentes', {})
+        self.log(f"Armazém carregado: {len(tabela)} equipes, {len(self.assinaturas_armazem)} indicadores "
+                 f"({meta['formato']})")
+        return True
+    
+    def equipes_do_armazem(self, codigo_indicador, pasta_indicador):
+        """(equipes, componentes) do indicador a partir do armazém; None se ausente ou se os CSV mudaram"""
+        assinatura = self.assinaturas_armazem.get(codigo_indicador)
+        if self.armazem is None or assinatura is None:
+            return None
         
-        municipios_renderizados = 0
+        if assinatura != manifesto.hash_arquivos(leitura.arquivos_relatorios(pasta_indicador)):
+            self.log(f"Armazém desatualizado para {codigo_indicador}, lendo os CSV", "WARNING")
+            return None
         
-        # Processa cada região
-        for nome_regiao, dados_regiao in self.dados_regioes.items():
-            if 'features' not in dados_regiao:
-                continue
-            
-            grupo_regiao = ET.SubElement(grupo_municipios, 'g', {
-                'id': f'regiao-{nome_regiao}',
-                'class': 'regiao-grupo',
-                'data-regiao': nome_regiao
-            })
+        tabela = self.armazem[self.armazem['indicador'] == codigo_indicador].reset_index(drop=True)
+        return tabela, self.componentes_armazem.get(codigo_indicador, [])
+    
+    def ingerir_armazem(self, indicadores=None, formato=None):
+        """Converte os CSV dos indicadores (padrão: todos) no armazém colunar e o grava em disco"""
+        codigos = indicadores or list(self.indicadores_mapeamento.keys())
+        mapeamento = {codigo: self.indicadores_mapeamento[codigo] for codigo in codigos}
+        
+        self.log(f"Ingerindo {len(mapeamento)} indicador(es) no armazém...")
+        tabela, assinaturas, componentes = armazem.construir_armazem(mapeamento, self.base_path, log=self.log,
+                                                                     ler_relatorios=self.ler_relatorios)
+        
+        # Ingestão parcial: preserva os demais indicadores já armazenados
+        if indicadores and self.armazem is None:
+            self.carregar_armazem()
+        if indicadores and self.armazem is not None:
+            outros = self.armazem[~self.armazem['indicador'].isin(codigos)]
+            tabela = armazem.tipar(pd.concat([outros.astype(object), tabela.astype(object)], ignore_index=True))
+            assinaturas = {**{c: a for c, a in self.assinaturas_armazem.items() if c not in codigos},
+                           **assinaturas}
+            componentes = {**{c: n for c, n in self.componentes_armazem.items() if c not in codigos},
+                           **componentes}
+        
+        caminho = armazem.salvar_armazem(tabela, assinaturas, self.armazem_path, formato, componentes)
+        self.armazem = tabela
+        self.assinaturas_armazem = assinaturas
+        self.componentes_armazem = componentes
+        self.log(f"Armazém salvo: {caminho} ({len(tabela)} equipes)")
+        return caminho
+    
+    def esquema_classificacao(self, codigo_indicador):
+        """Esquema de faixas do indicador: ESQUEMA_PADRAO com 'classificacao' e 'direcao' da configuração"""
+        config = self.indicadores_mapeamento.get(codigo_indicador, {})
+        return {
+            **classificacao.ESQUEMA_PADRAO,
+            **config.get('classificacao', {}),
+            'direcao': config.get('direcao', 'maior')
+        }
+    
+    def classificar_indicador(self, codigo_indicador, dados_csv):
+        """Faixas do indicador para as pontuações carregadas; quebras de quantil/Jenks ficam em cache
+        (src/cache/classes) e só são recalculadas quando as pontuações ou o esquema mudam"""
+        esquema = self.esquema_classificacao(codigo_indicador)
+        pontuacoes = self.pontuacoes_array(dados_csv.values())
+        
+        limites = chave = None
+        if esquema['metodo'] != 'fixo':
+            arquivo = self.classes_cache_path / f"{codigo_indicador}.json"
+            chave = classificacao.chave_quebras(esquema, pontuacoes, len(self.paleta_classes))
+            limites = classificacao.ler_quebras(arquivo, chave)
+        
+        resultado = classificacao.Classificacao.de_esquema(
+            esquema, pontuacoes, self.paleta_classes, self.cores_faixas['sem_dados'], limites
+        )
+        if chave is not None and limites is None:
+            classificacao.gravar_quebras(arquivo, chave, resultado)
+            self.log(f"Quebras ({esquema['metodo']}) calculadas: {[float(l) for l in resultado.limites]}")
+        return resultado
+    
+    @staticmethod
+    def pontuacoes_array(dados):
+        """Array float64 das pontuações (NaN para municípios sem dados)"""
+        return np.array([d.get('pontuacao') for d in dados], dtype=np.float64)
+    
+    def valores_municipios(self, codigo_indicador, municipios, dados_csv, classes=None):
+        """Campos que variam por indicador (cor, pontuação, classificação e tooltip) de uma lista de
+        (CD_MUN, nome), com todas as pontuações classificadas de uma vez"""
+        if classes is None:
+            classes = self.classificar_indicador(codigo_indicador, dados_csv)
+        unidade = self.indicadores_mapeamento.get(codigo_indicador, {}).get('unidade', '%')
+        
+        dados = [dados_csv.get(codigo_municipio, {}) for codigo_municipio, _ in municipios]
+        pontuacoes = self.pontuacoes_array(dados)
+        cores = classes.cores_de(pontuacoes)
+        rotulos = classes.rotulos_de(pontuacoes)
+        
+        valores = []
+        for (_, nome_municipio), dados_mun, cor, rotulo in zip(municipios, dados, cores, rotulos):
+            pontuacao = dados_mun.get('pontuacao')
+            if pontuacao is None:
+                tooltip = f"{nome_municipio}\nSem dados"
+            else:
+                tooltip = f"{nome_municipio}\nPontuação: {pontuacao:.1f}{unidade}"
+            valores.append((str(cor), str(pontuacao or 0), str(rotulo), tooltip))
+        return valores
+    
+    @staticmethod
+    def municipios_geometria(geo):
+        """(CD_MUN, nome) de cada feição, na ordem das feições"""
+        return [
+            (feicao['propriedades'].get('CD_MUN'), feicao['propriedades'].get('NM_MUN', 'Município'))
+            for feicao in geo.feicoes
+        ]
+    
+    def abertura_svg(self):
+        """Início do documento dividido em (antes do id, antes do título, depois do título)"""
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            f'<svg width="{self.svg_width}" height="{self.svg_height}" '
+            f'viewBox="0 0 {self.svg_width} {self.svg_height}" xmlns="http://www.w3.org/2000/svg" id=',
+            f'><style>{escape(ESTILO_SVG)}</style>'
+            f'<text x="{self.svg_width // 2}" y="30" text-anchor="middle" class="titulo-mapa">',
+            '</text><g id="municipios" transform="translate(0, 50)">'
+        )
+    
+    def abertura_grupo_regiao(self, nome_regiao):
+        """Tag de abertura do grupo de uma região"""
+        return (f'<g id={quoteattr(f"regiao-{nome_regiao}")} class="regiao-grupo" '
+                f'data-regiao={quoteattr(nome_regiao)}>')
+    
+    def abertura_poligono(self, indice, nome_regiao, geo=None):
+        """Tag <path> (ainda aberta) com a geometria e os atributos fixos do município"""
+        geo = geo or self.geometria
+        properties = geo.feicoes[indice]['propriedades']
+        codigo_municipio = properties.get('CD_MUN')
+        nome_municipio = properties.get('NM_MUN', 'Município')
+        
+        caminho = geometria.formatar_caminho(geo.aneis_feicao(indice))
+        if not caminho:
+            return None
+        
+        return (f'<path d="{caminho}" class="municipio" '
+                f'data-codigo={quoteattr(codigo_municipio)} data-nome={quoteattr(nome_municipio)} '
+                f'data-regiao={quoteattr(nome_regiao)} id={quoteattr(f"municipio-{codigo_municipio}")}')
+    
+    def montar_modelo_svg(self, geo):
+        """Serializa os polígonos de uma geometria como modelo (fragmentos estáticos + campos variáveis)"""
+        blocos = []
+        municipios = []
+        
+        for nome_regiao, indices in geo.por_regiao().items():
+            estatico = self.abertura_grupo_regiao(nome_regiao)
             
-            for feature in dados_regiao['features']:
-                properties = feature.get('properties', {})
-                geometry = feature.get('geometry', {})
-                
-                if geometry.get('type') != 'Polygon':
-                    continue
-                
-                codigo_municipio = properties.get('CD_MUN')
-                nome_municipio = properties.get('NM_MUN', 'Município')
-                
-                if not codigo_municipio:
+            for indice in indices:
+                poligono = self.abertura_poligono(indice, nome_regiao, geo)
+                if poligono is None:
                     continue
                 
-                # Busca dados do indicador
-                dados_mun = dados_csv.get(codigo_municipio, {})
-                pontuacao = dados_mun.get('pontuacao')
-                cor = self.obter_cor_por_pontuacao(pontuacao)
-                
-                # Converte geometria para SVG
-                coordinates = geometry['coordinates'][0]
-                pontos_svg = []
-                
-                for lng, lat in coordinates:
-                    x, y = self.converter_coordenadas(lng, lat)
-                    pontos_svg.append(f"{x:.1f},{y:.1f}")
-                
-                if not pontos_svg:
-                    continue
-                
-                pontos_str = " ".join(pontos_svg)
-                
-                # Atributos do polígono
-                attrs_poligono = {
-                    'points': pontos_str,
-                    'fill': cor,
-                    'class': 'municipio',
-                    'data-codigo': codigo_municipio,
-                    'data-nome': nome_municipio,
-                    'data-regiao': nome_regiao,
-                    'data-pontuacao': str(pontuacao or 0),
-                    'data-classificacao': self.obter_classificacao(pontuacao),
-                    'id': f'municipio-{codigo_municipio}'
-                }
-                
-                poligono = ET.SubElement(grupo_regiao, 'polygon', attrs_poligono)
-                
-                # Tooltip nativo
-                titulo_tooltip = ET.SubElement(poligono, 'title')
-                titulo_tooltip.text = f"{nome_municipio}\nPontuação: {pontuacao:.1f}%" if pontuacao else f"{nome_municipio}\nSem dados"
-                
-                municipios_renderizados += 1
-        
-        self.log(f"SVG gerado: {municipios_renderizados} municípios renderizados")
-        return svg
-    
-    def obter_classificacao(self, pontuacao):
-        """Classificação textual da pontuação"""
-        if pontuacao is None or pd.isna(pontuacao):
-            return "Sem dados"
-        elif pontuacao >= 80:
-            return "Muito Alto"
-        elif pontuacao >= 60:
-            return "Alto"
-        elif pontuacao >= 40:
-            return "Médio"
-        elif pontuacao >= 20:
-            return "Baixo"
-        else:
-            return "Muito Baixo"
+                properties = geo.feicoes[indice]['propriedades']
+                blocos.append((estatico + poligono, len(municipios)))
+                municipios.append((properties.get('CD_MUN'), properties.get('NM_MUN', 'Município')))
+                estatico = ''
+            
+            blocos.append((estatico + '</g>', None))
+        
+        return ModeloSVG(geo, self.abertura_svg(), blocos, '</g></svg>\n', municipios)
     
-    def salvar_svg(self, svg_element, nome_arquivo):
-        """Salva SVG em arquivo"""
-        arquivo_path = self.svg_output_path / nome_arquivo
+    def construir_modelo_svg(self):
+        """Serializa a geometria uma única vez como modelo reutilizado por todos os indicadores"""
+        if self.modelo_svg is not None and self.modelo_svg.geometria is self.geometria:
+            return self.modelo_svg
+        
+        self.modelo_svg = self.montar_modelo_svg(self.geometria)
+        self.log(f"Modelo SVG construído: {len(self.modelo_svg.municipios)} municípios")
+        return self.modelo_svg
+    
+    def selecionar_feicoes(self, regiao=None, rgi=None, municipios=None):
+        """Índices das feições de um recorte: arquivo do REGIAO/, região imediata (NM_RGI ou CD_RGI)
+        e/ou lista de municípios (código ou nome); os critérios informados se somam"""
+        if self.geometria is None:
+            raise ValueError("Geometria das regiões não carregada")
+        
+        selecionados = set()
+        
+        if regiao:
+            indices = self.geometria.por_regiao().get(regiao)
+            if not indices:
+                raise ValueError(f"Região não encontrada: {regiao}")
+            selecionados.update(indices)
+        
+        if rgi:
+            alvo = normalizar_nome(rgi)
+            indices = [
+                indice for indice, feicao in enumerate(self.geometria.feicoes)
+                if alvo in (normalizar_nome(feicao['propriedades'].get('NM_RGI')),
+                            str(feicao['propriedades'].get('CD_RGI')))
+            ]
+            if not indices:
+                raise ValueError(f"Região imediata não encontrada: {rgi}")
+            selecionados.update(indices)
+        
+        if municipios:
+            por_codigo = {feicao['propriedades'].get('CD_MUN'): indice
+                          for indice, feicao in enumerate(self.geometria.feicoes)}
+            for chave in municipios:
+                codigo = self.municipios.codigo(chave) if self.municipios else None
+                if codigo not in por_codigo:
+                    raise ValueError(f"Município não encontrado: {chave}")
+                selecionados.add(por_codigo[codigo])
+        
+        if not selecionados:
+            raise ValueError("Recorte vazio: informe região, região imediata ou municípios")
+        return sorted(selecionados)
+    
+    def modelo_recorte(self, indices):
+        """Modelo SVG de um recorte, com a geometria reajustada ao viewport (em cache LRU por recorte,
+        limitado a maximo_modelos_recorte); o nível de detalhe acompanha a ampliação do recorte em
+        relação ao mapa estadual"""
+        chave = tuple(indices)
+        if chave not in self.modelos_recorte:
+            # Abaixo do título: mesma área útil do mapa estadual
+            largura, altura = self.svg_width, self.svg_height - 50
+            nivel = self.nivel_para_zoom(self.geometria.escala_recorte(indices, largura, altura))
+            geo = (self.geometria_nivel(nivel) or self.geometria).recortar(indices, largura, altura)
+            self.log(f"Recorte de {len(indices)} municípios no nível de detalhe '{nivel}'")
+            self.modelos_recorte[chave] = self.montar_modelo_svg(geo)
+            while len(self.modelos_recorte) > self.maximo_modelos_recorte:
+                self.modelos_recorte.popitem(last=False)
+        self.modelos_recorte.move_to_end(chave)
+        return self.modelos_recorte[chave]
+    
+    def fragmentos_svg_modelo(self, codigo_indicador, dados_csv, indices=None, titulo=None, classes=None):
+        """Fragmentos do SVG do indicador a partir do modelo, substituindo só os campos variáveis
+        (indices: recorte de municípios; padrão: o estado inteiro; classes: faixas já calculadas)"""
+        titulo = titulo or self.indicadores_mapeamento[codigo_indicador]['nome']
+        modelo = self.construir_modelo_svg() if indices is None else self.modelo_recorte(indices)
         
-        # Formatação e salvamento
-        ET.indent(svg_element, space="  ")
-        tree = ET.ElementTree(svg_element)
+        valores = self.valores_municipios(codigo_indicador, modelo.municipios, dados_csv, classes)
         
-        with open(arquivo_path, 'wb') as f:
-            tree.write(f, encoding='utf-8', xml_declaration=True)
+        self.log(f"SVG gerado: {len(modelo.municipios)} municípios renderizados (modelo)")
+        return modelo.fragmentos(f'mapa-{codigo_indicador}', titulo, valores)
+    
+    def renderizar_svg_modelo(self, codigo_indicador, dados_csv, indices=None, classes=None):
+        """Gera o SVG do indicador a partir do modelo como texto"""
+        return ''.join(self.fragmentos_svg_modelo(codigo_indicador, dados_csv, indices, classes=classes))
+    
+    def gerar_svg_recorte(self, codigo_indicador, indices, sufixo):
+        """Grava o SVG de um recorte como <indicador>_<sufixo>_mapa.svg"""
+        dados_csv = self.carregar_dados_csv_indicador(codigo_indicador)
+        if not dados_csv:
+            self.log("Nenhum dado CSV encontrado!", "ERROR")
+            return None
+        
+        fragmentos = self.fragmentos_svg_modelo(codigo_indicador, dados_csv, indices)
+        return self.salvar_svg_stream(fragmentos, f"{codigo_indicador}_{sufixo}_mapa.svg")
+    
+    def salvar_svg_stream(self, fragmentos, nome_arquivo):
+        """Salva SVG gravando os fragmentos em um arquivo bufferizado à medida que são gerados"""
+        arquivo_path = self.svg_output_path / nome_arquivo
         
-        self.log(f"SVG salvo: {arquivo_path}")
+        bytes_escritos = escrever_fragmentos(arquivo_path, fragmentos)
+        
+        self.log(f"SVG salvo: {arquivo_path} ({bytes_escritos} caracteres)")
         return arquivo_path
     
-    def gerar_dados_json_web(self, codigo_indicador, dados_csv):
+    def opcoes_json(self):
+        """Formatação dos JSON gerados: compacta ou indentada"""
+        if self.json_compacto:
+            return {'separators': (',', ':')}
+        return {'indent': 2}
+    
+    def gravar_json(self, caminho, dados, **opcoes):
+        """Grava um JSON de forma atômica (temporário + os.replace): o servidor e o navegador
+        nunca leem um arquivo pela metade enquanto ele é regerado"""
+        temporario = caminho.with_name(f"{caminho.name}.{os.getpid()}.tmp")
+        with open(temporario, 'w', encoding='utf-8', buffering=1 << 16) as f:
+            json.dump(dados, f, ensure_ascii=False, **opcoes)
+        os.replace(temporario, caminho)
+        return caminho
+    
+    def gerar_dados_json_web(self, codigo_indicador, dados_csv, classes=None):
         """Gera JSON para consumo pelo JavaScript"""
         config = self.indicadores_mapeamento[codigo_indicador]
         
@@ -450,78 +880,642 @@ class GeradorSVGWeb:
                 'pontuacao_media': sum(pontuacoes) / len(pontuacoes)
             })
         
-        # Dados detalhados por município
-        for codigo, dados in dados_csv.items():
-            pontuacao = dados['pontuacao']
+        # Dados detalhados por município (cores e classes de todos de uma vez)
+        if classes is None:
+            classes = self.classificar_indicador(codigo_indicador, dados_csv)
+        todas = self.pontuacoes_array(dados_csv.values())
+        dados_web['faixas'] = classes.faixas()
+        dados_web['classificacao'] = classes.para_payload()
+        for (codigo, dados), cor, rotulo in zip(dados_csv.items(), classes.cores_de(todas), classes.rotulos_de(todas)):
             dados_web['dados_municipios'][codigo] = {
                 'nome': dados['nome'],
-                'pontuacao': pontuacao,
-                'cor': self.obter_cor_por_pontuacao(pontuacao),
-                'classificacao': self.obter_classificacao(pontuacao)
+                'regiao': dados.get('regiao'),
+                'pontuacao': dados['pontuacao'],
+                'cor': str(cor),
+                'classificacao': str(rotulo)
             }
         
         # Salva JSON
         nome_arquivo = f"{codigo_indicador}_dados.json"
         arquivo_path = self.dados_output_path / nome_arquivo
         
-        with open(arquivo_path, 'w', encoding='utf-8') as f:
-            json.dump(dados_web, f, ensure_ascii=False, indent=2)
+        self.gravar_json(arquivo_path, dados_web, **self.opcoes_json())
         
         self.log(f"JSON salvo: {arquivo_path}")
         return arquivo_path
     
-    def processar_indicador_completo(self, codigo_indicador):
-        """Processa indicador gerando SVG e JSON"""
+    def payload_web(self, codigo_indicador, dados_csv, classes=None):
+        """Payload compacto do frontend: pontuações por código IBGE, estatísticas e legenda"""
+        config = self.indicadores_mapeamento[codigo_indicador]
+        if classes is None:
+            classes = self.classificar_indicador(codigo_indicador, dados_csv)
+        
+        pontuacoes = {
+            codigo: round(float(dados['pontuacao']), classificacao.CASAS)
+            for codigo, dados in dados_csv.items()
+            if dados['pontuacao'] is not None and not pd.isna(dados['pontuacao'])
+        }
+        valores = list(pontuacoes.values())
+        serie = self.series.get(codigo_indicador)
+        competencias = sorted({dados.get('competencia') for dados in dados_csv.values() if dados.get('competencia')},
+                              key=series.chave_competencia)
+        
+        payload = {
+            'codigo': codigo_indicador,
+            'nome': config['nome'],
+            'competencia': competencias[-1] if competencias else None,
+            'estatisticas': {
+                'municipios': len(valores),
+                'minima': min(valores) if valores else None,
+                'maxima': max(valores) if valores else None,
+                'media': round(sum(valores) / len(valores), 2) if valores else None
+            },
+            # Faixas [inferior, cor, rótulo, superior] e quebras do esquema do indicador
+            'faixas': classes.faixas(),
+            'classificacao': classes.para_payload(),
+            'unidade': config.get('unidade', '%'),
+            'sem_dados': self.cores_faixas['sem_dados'],
+            'pontuacoes': pontuacoes,
+            # Detalhamento por equipe: um arquivo por município (src/data/<equipes>/<CD_MUN>.json)
+            'equipes': self.pasta_equipes(codigo_indicador).relative_to(self.dados_output_path).as_posix()
+        }
+        if serie is not None:
+            # Tendências pré-calculadas: variação, média móvel (3) e ranking por competência
+            payload['serie'] = serie.para_payload()
+        
+        regionais = self.regionais(codigo_indicador, dados_csv)
+        if regionais is not None:
+            # Agregados por município, RGI, RGINT, região e estado (razão das somas das equipes)
+            payload['regionais'] = regionais
+        
+        return payload
+    
+    def regionais(self, codigo_indicador, dados_csv):
+        """Agregados de todos os níveis da hierarquia a partir das equipes do último carregamento do indicador"""
+        tabela, _ = self.equipes_detalhe.get(codigo_indicador, (None, []))
+        if tabela is None or tabela.empty or not self.municipios:
+            return None
+        
+        # Só as equipes da competência exibida no mapa para cada município
+        competencias = {codigo: dados.get('competencia') or '' for codigo, dados in dados_csv.items()}
+        exibidas = tabela[
+            tabela['codigo_ibge'].astype(object).map(competencias) == tabela['competencia'].astype(object).fillna('')
+        ]
+        
+        fator = hierarquia.fator_razao(exibidas['numerador'], exibidas['denominador'], exibidas['pontuacao'])
+        niveis = hierarquia.cubo(exibidas, hierarquia.chaves_municipios(self.municipios), self.metodo_agregacao, fator)
+        return {'fator_razao': fator, **hierarquia.para_payload(niveis)}
+    
+    def gerar_payload_web(self, codigo_indicador, dados_csv, classes=None):
+        """Grava o payload compacto do frontend"""
+        payload = self.payload_web(codigo_indicador, dados_csv, classes)
+        
+        arquivo_path = self.dados_output_path / f"{codigo_indicador}_web.json"
+        self.gravar_json(arquivo_path, payload, separators=(',', ':'))
+        
+        self.log(f"Payload web salvo: {arquivo_path}")
+        return arquivo_path
+    
+    def pasta_equipes(self, codigo_indicador):
+        """Pasta dos arquivos de detalhamento por município de um indicador"""
+        return self.dados_output_path / "equipes" / codigo_indicador
+    
+    def indice_equipes(self, codigo_indicador, dados_csv):
+        """Detalhamento por município (CD_MUN -> equipes) do último carregamento do indicador"""
+        tabela, componentes = self.equipes_detalhe.get(codigo_indicador, (None, []))
+        if tabela is None:
+            return {}
+        return detalhamento.indice_equipes(tabela, dados_csv, componentes, self.metodo_agregacao)
+    
+    def gerar_equipes(self, codigo_indicador, dados_csv):
+        """Grava um JSON por município com as equipes e o efeito de cada uma na pontuação"""
+        indice = self.indice_equipes(codigo_indicador, dados_csv)
+        pasta = self.pasta_equipes(codigo_indicador)
+        bytes_gravados = detalhamento.gravar_fragmentos(indice, pasta, self.opcoes_json())
+        
+        # As equipes só são necessárias até aqui (lotes grandes não acumulam os frames)
+        self.equipes_detalhe.pop(codigo_indicador, None)
+        self.log(f"Detalhamento por equipe salvo: {pasta} ({len(indice)} municípios)")
+        return pasta, len(indice), bytes_gravados
+    
+    def payloads_publicados(self):
+        """Payloads web já gerados ({indicador: arquivo}), na ordem de indicadores_mapeamento"""
+        arquivos = {codigo: self.dados_output_path / f"{codigo}_web.json" for codigo in self.indicadores_mapeamento}
+        return {codigo: arquivo for codigo, arquivo in arquivos.items() if arquivo.exists()}
+    
+    @staticmethod
+    def ler_payloads(arquivos):
+        """Conteúdo dos payloads web ({indicador: arquivo} -> {indicador: payload})"""
+        payloads = {}
+        for codigo, arquivo in arquivos.items():
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                payloads[codigo] = json.load(f)
+        return payloads
+    
+    def montar_matriz(self, payloads=None):
+        """Matriz municípios x indicadores a partir das pontuações publicadas (sem reler os CSV)
+        
+        payloads: {indicador: payload web} (padrão: os arquivos já gravados em src/data)
+        Devolve a matriz e a competência de cada indicador
+        """
+        payloads = self.ler_payloads(self.payloads_publicados()) if payloads is None else payloads
+        pontuacoes, competencias = {}, {}
+        for codigo, payload in payloads.items():
+            pontuacoes[codigo] = payload.get('pontuacoes') or {}
+            competencias[codigo] = payload.get('competencia')
+        
+        # Linhas: todos os municípios do GeoJSON (os sem dado ficam NaN) e os demais códigos encontrados
+        codigos = [municipio.codigo for municipio in self.municipios] if self.municipios else []
+        conhecidos = set(codigos)
+        codigos += sorted({c for valores in pontuacoes.values() for c in valores if c not in conhecidos})
+        
+        return matriz.MatrizIndicadores.de_pontuacoes(pontuacoes, codigos), competencias
+    
+    def calcular_composto(self, tabela):
+        """Percentis, composto, cobertura e posição de cada município (arrays alinhados com as linhas)"""
+        configs = [self.indicadores_mapeamento[codigo] for codigo in tabela.indicadores]
+        direcoes = {codigo: config.get('direcao', 'maior') for codigo, config in zip(tabela.indicadores, configs)}
+        pesos = {codigo: config.get('peso', 1.0) for codigo, config in zip(tabela.indicadores, configs)}
+        
+        percentis = tabela.percentis(direcoes)
+        composto, cobertura = tabela.composto(percentis, pesos, self.composto['cobertura_minima'])
+        return {
+            'percentis': percentis,
+            'composto': composto,
+            'cobertura': cobertura,
+            'posicao': tabela.ranking(composto),
+            'direcoes': direcoes,
+            'pesos': pesos
+        }
+    
+    def dados_composto(self, tabela, calculo):
+        """Composto no formato de carregar_dados_csv_indicador (usado pelo SVG)"""
+        dados = {}
+        for i, codigo in enumerate(tabela.codigos):
+            municipio = self.municipios.resolver(codigo) if self.municipios else None
+            pontuacao = calculo['composto'][i]
+            dados[codigo] = {
+                'nome': municipio.nome if municipio else codigo,
+                'regiao': municipio.regiao if municipio else None,
+                'pontuacao': None if np.isnan(pontuacao) else float(pontuacao)
+            }
+        return dados
+    
+    def payload_composto(self, dados, competencias, classes=None):
+        """Payload do composto no mesmo formato dos indicadores (o frontend o exibe como um indicador)"""
+        pontuacoes = {codigo: round(d['pontuacao'], 2) for codigo, d in dados.items() if d['pontuacao'] is not None}
+        valores = list(pontuacoes.values())
+        if classes is None:
+            classes = self.classificar_indicador(self.composto['codigo'], dados)
+        ordenadas = sorted(filter(None, competencias.values()), key=series.chave_competencia)
+        
+        return {
+            'codigo': self.composto['codigo'],
+            'nome': self.composto['nome'],
+            'competencia': ordenadas[-1] if ordenadas else None,
+            'estatisticas': {
+                'municipios': len(valores),
+                'minima': min(valores) if valores else None,
+                'maxima': max(valores) if valores else None,
+                'media': round(sum(valores) / len(valores), 2) if valores else None
+            },
+            'faixas': classes.faixas(),
+            'classificacao': classes.para_payload(),
+            'unidade': '%',
+            'sem_dados': self.cores_faixas['sem_dados'],
+            'pontuacoes': pontuacoes,
+            # Sem detalhamento por equipe: o composto não tem equipes próprias
+            'equipes': None
+        }
+    
+    def ranking_composto(self, tabela, calculo, competencias):
+        """Ranking geral (composto, posição, cobertura, percentis e valores) e resumos por região"""
+        def numero(valor):
+            return None if np.isnan(valor) else round(float(valor), 2)
+        
+        indicadores = [{
+            'codigo': codigo,
+            'nome': self.indicadores_mapeamento[codigo]['nome'],
+            'competencia': competencias.get(codigo),
+            'direcao': calculo['direcoes'][codigo],
+            'peso': calculo['pesos'][codigo],
+            'municipios': int(tabela.mascara[:, j].sum())
+        } for j, codigo in enumerate(tabela.indicadores)]
+        
+        municipios = []
+        regioes_municipio = []
+        for i, codigo in enumerate(tabela.codigos):
+            municipio = self.municipios.resolver(codigo) if self.municipios else None
+            regioes_municipio.append(municipio.regiao if municipio else None)
+            posicao = calculo['posicao'][i]
+            municipios.append({
+                'codigo': codigo,
+                'nome': municipio.nome if municipio else None,
+                'regiao': regioes_municipio[-1],
+                'composto': numero(calculo['composto'][i]),
+                'posicao': None if np.isnan(posicao) else int(posicao),
+                'cobertura': numero(calculo['cobertura'][i]),
+                'percentis': {ind: numero(calculo['percentis'][i, j]) for j, ind in enumerate(tabela.indicadores)},
+                'valores': {ind: numero(tabela.valores[i, j]) for j, ind in enumerate(tabela.indicadores)}
+            })
+        municipios.sort(key=lambda m: (m['posicao'] is None, m['posicao'] or 0, m['codigo']))
+        
+        # Composto e pontuações de cada indicador resumidos por região em uma passada
+        colunas = np.column_stack([calculo['composto'], tabela.valores])
+        rotulos, resumo = matriz.MatrizIndicadores.resumo_por_grupo(regioes_municipio, colunas)
+        melhores = {}
+        for m in municipios:
+            if m['posicao'] is not None and m['regiao'] is not None:
+                melhores.setdefault(m['regiao'], m['codigo'])
+        
+        regioes = {}
+        for k, regiao in enumerate(rotulos):
+            regioes[regiao] = {
+                'municipios': int(sum(1 for r in regioes_municipio if r == regiao)),
+                'com_composto': int(resumo['municipios'][k, 0]),
+                'composto': {metrica: numero(resumo[metrica][k, 0]) for metrica in ('media', 'minimo', 'maximo')},
+                'melhor': melhores.get(regiao),
+                'indicadores': {ind: numero(resumo['media'][k, j + 1]) for j, ind in enumerate(tabela.indicadores)}
+            }
+        
+        return {
+            'codigo': self.composto['codigo'],
+            'nome': self.composto['nome'],
+            'agregacao': self.metodo_agregacao,
+            'cobertura_minima': self.composto['cobertura_minima'],
+            'indicadores': indicadores,
+            'municipios': municipios,
+            'regioes': regioes
+        }
+    
+    def assinatura_composto(self, payloads):
+        """Assinatura do composto: pontuações publicadas e configuração dos indicadores e do gerador"""
+        return manifesto.hash_config({
+            'composto': self.composto,
+            'indicadores': {codigo: self.indicadores_mapeamento[codigo] for codigo in payloads},
+            'payloads': manifesto.hash_arquivos(list(payloads.values())),
+            'regioes': self.chave_geometria,
+            'gerador': self.config_geracao()
+        })
+    
+    def gerar_composto(self, forcar=False):
+        """Gera o mapa, o payload e o ranking do composto a partir de todos os indicadores publicados"""
+        payloads = self.payloads_publicados()
+        if not payloads:
+            self.log("Nenhum payload de indicador encontrado para o composto", "WARNING")
+            return None
+        
+        codigo = self.composto['codigo']
+        arquivo_web = self.dados_output_path / f"{codigo}_web.json"
+        arquivo_svg = self.svg_output_path / f"{codigo}_mapa.svg"
+        saidas = (arquivo_web, arquivo_svg, self.ranking_path)
+        
+        assinatura = self.assinatura_composto(payloads)
+        registro = manifesto.carregar(self.manifesto_path).get('composto') or {}
+        if not forcar and registro.get('assinatura') == assinatura and all(saida.exists() for saida in saidas):
+            self.log("Composto sem alterações")
+            return {**registro, 'ignorado': True}
+        
+        tabela, competencias = self.montar_matriz(self.ler_payloads(payloads))
+        calculo = self.calcular_composto(tabela)
+        dados = self.dados_composto(tabela, calculo)
+        # Faixas calculadas uma vez para o payload e o SVG
+        classes = self.classificar_indicador(codigo, dados)
+        
+        self.gravar_json(arquivo_web, self.payload_composto(dados, competencias, classes), separators=(',', ':'))
+        self.gravar_json(self.ranking_path, self.ranking_composto(tabela, calculo, competencias), **self.opcoes_json())
+        
+        fragmentos = self.fragmentos_svg_modelo(codigo, dados, titulo=self.composto['nome'], classes=classes)
+        self.salvar_svg_stream(fragmentos, arquivo_svg.name)
+        
+        registro = {
+            'assinatura': assinatura,
+            'indicadores': tabela.indicadores,
+            'web_path': arquivo_web.relative_to(self.base_path).as_posix(),
+            'svg_path': arquivo_svg.relative_to(self.base_path).as_posix(),
+            'ranking_path': self.ranking_path.relative_to(self.base_path).as_posix(),
+            'municipios_processados': int(np.count_nonzero(~np.isnan(calculo['composto']))),
+            'gerado_em': datetime.now().isoformat()
+        }
+        dados_manifesto = manifesto.carregar(self.manifesto_path)
+        dados_manifesto['composto'] = registro
+        manifesto.salvar(self.manifesto_path, dados_manifesto)
+        
+        self.log(f"Composto gerado: {len(tabela.indicadores)} indicadores, "
+                 f"{registro['municipios_processados']} municípios com pontuação")
+        return {**registro, 'ignorado': False}
+    
+    def composto_em_memoria(self, payloads):
+        """(payload, SVG) do composto a partir de payloads já em memória (servidor), sem gravar arquivos"""
+        tabela, competencias = self.montar_matriz(payloads)
+        calculo = self.calcular_composto(tabela)
+        dados = self.dados_composto(tabela, calculo)
+        classes = self.classificar_indicador(self.composto['codigo'], dados)
+        svg = ''.join(self.fragmentos_svg_modelo(self.composto['codigo'], dados, titulo=self.composto['nome'],
+                                                 classes=classes))
+        return self.payload_composto(dados, competencias, classes), svg
+    
+    def topologia_nivel_path(self, nivel):
+        """Arquivo da topologia de um nível ('estado' é o municipios.topo.json padrão)"""
+        if nivel == 'estado':
+            return self.topologia_path
+        return self.topologia_path.with_name(f"municipios.{nivel}.topo.json")
+    
+    def chave_topologia(self, nivel):
+        """Chave da topologia de um nível: geometria de origem + tolerância e grade do nível"""
+        parametros = self.parametros_nivel(nivel)
+        return manifesto.hash_config({
+            'geometria': self.chave_geometria,
+            'tolerancia': parametros['tolerancia'],
+            'escala': parametros['escala'],
+            'versao_saida': VERSAO_SAIDA
+        })
+    
+    def gerar_topologia(self, forcar=False):
+        """Gera a topologia compartilhada (arcos quantizados) usada pelo frontend no lugar do GeoJSON bruto,
+        um arquivo por nível de detalhe; o do nível 'estado' lista os demais em 'niveis'"""
+        if self.geometria is None:
+            self.log("Geometria das regiões não carregada!", "ERROR")
+            return None
+        
+        niveis = [
+            {
+                'nivel': nivel,
+                'zoom_max': parametros['zoom_max'],
+                'arquivo': self.topologia_nivel_path(nivel).name
+            }
+            for nivel, parametros in self.niveis_detalhe.items()
+        ]
+        
+        feicoes = base = None
+        for nivel in self.niveis_detalhe:
+            caminho = self.topologia_nivel_path(nivel)
+            chave = self.chave_topologia(nivel)
+            
+            if not forcar and caminho.exists():
+                try:
+                    with open(caminho, 'r', encoding='utf-8') as f:
+                        atual = json.load(f)
+                    if atual.get('chave') == chave and (nivel != 'estado' or atual.get('niveis') == niveis):
+                        continue
+                except (OSError, ValueError):
+                    pass
+            
+            # Os arcos partem dos anéis originais (com buracos) projetados com os mesmos limites do cache;
+            # as fronteiras são identificadas uma vez, na grade base, e reaproveitadas por todos os níveis
+            if feicoes is None:
+                if not self.dados_regioes and not self.carregar_dados_regioes():
+                    return None
+                
+                feicoes = [
+                    {
+                        'id': properties['CD_MUN'],
+                        'propriedades': {'nome': properties.get('NM_MUN'), 'regiao': nome_regiao},
+                        'poligonos': [[self.converter_coordenadas_array(anel) for anel in poligono]
+                                      for poligono in poligonos]
+                    }
+                    for nome_regiao, properties, poligonos in geometria.normalizar_feicoes(self.dados_regioes)
+                ]
+                grade = min([topologia.GRADE_BASE] + [self.parametros_nivel(n)['escala'] for n in self.niveis_detalhe])
+                base = topologia.montar_arcos(feicoes, grade)
+            
+            parametros = self.parametros_nivel(nivel)
+            dados_topologia = topologia.construir_topologia(
+                feicoes, parametros['escala'], parametros['tolerancia'],
+                bbox=[0, 0, self.svg_width, self.svg_height], base=base
+            )
+            dados_topologia['chave'] = chave
+            dados_topologia['nivel'] = nivel
+            if nivel == 'estado':
+                dados_topologia['niveis'] = niveis
+            
+            temporario = caminho.with_name(caminho.name + '.tmp')
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(dados_topologia, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temporario, caminho)
+            
+            self.log(f"Topologia '{nivel}' salva: {caminho} ({len(dados_topologia['arcs'])} arcos, "
+                     f"{sum(len(arco) for arco in dados_topologia['arcs'])} pontos)")
+        
+        return self.topologia_path
+    
+    def config_geracao(self):
+        """Configuração que afeta as saídas (entra na assinatura dos indicadores)"""
+        return {
+            'svg': [self.svg_width, self.svg_height],
+            'tolerancia': self.tolerancia_simplificacao,
+            'agregacao': self.metodo_agregacao,
+            'json_compacto': self.json_compacto,
+            'cores': self.cores_faixas,
+            'classificacao': classificacao.ESQUEMA_PADRAO,
+            'versao_saida': VERSAO_SAIDA
+        }
+    
+    def assinatura_indicador(self, codigo_indicador):
+        """Assinatura das entradas de um indicador: CSV e planilhas da pasta, regiões e configuração"""
+        config = self.indicadores_mapeamento[codigo_indicador]
+        pasta_indicador = self.base_path / config['pasta']
+        arquivos = leitura.arquivos_relatorios(pasta_indicador) if pasta_indicador.exists() else []
+        
+        return manifesto.hash_config({
+            'indicador': config,
+            'arquivos': manifesto.hash_arquivos(arquivos),
+            'regioes': self.chave_geometria,
+            'gerador': self.config_geracao()
+        })
+    
+    def indicador_atualizado(self, codigo_indicador, assinatura):
+        """Verifica no manifesto se as saídas do indicador correspondem às entradas atuais"""
+        registro = manifesto.carregar(self.manifesto_path)['indicadores'].get(codigo_indicador)
+        if not registro or registro.get('assinatura') != assinatura:
+            return None
+        
+        chaves = ('svg_path', 'json_path', 'web_path', 'equipes_path')
+        if not all(chave in registro for chave in chaves):
+            return None
+        
+        saidas = [self.base_path / registro[chave] for chave in chaves]
+        if not all(saida.exists() for saida in saidas):
+            return None
+        
+        return registro
+    
+    def registrar_no_manifesto(self, resultados):
+        """Atualiza o manifesto com os indicadores gerados com sucesso"""
+        resultados = [r for r in resultados if r and r.get('sucesso') and not r.get('ignorado')]
+        if not resultados:
+            return
+        
+        dados = manifesto.carregar(self.manifesto_path)
+        for resultado in resultados:
+            dados['indicadores'][resultado['indicador']] = {
+                'assinatura': resultado['assinatura'],
+                'svg_path': Path(resultado['svg_path']).relative_to(self.base_path).as_posix(),
+                'json_path': Path(resultado['json_path']).relative_to(self.base_path).as_posix(),
+                'web_path': Path(resultado['web_path']).relative_to(self.base_path).as_posix(),
+                'equipes_path': Path(resultado['equipes_path']).relative_to(self.base_path).as_posix(),
+                'municipios_processados': resultado['municipios_processados'],
+                'gerado_em': datetime.now().isoformat()
+            }
+        
+        manifesto.salvar(self.manifesto_path, dados)
+        self.log(f"Manifesto atualizado: {len(resultados)} indicador(es)")
+    
+    def processar_indicador_completo(self, codigo_indicador, forcar=False):
+        """Processa indicador gerando SVG e JSON (pula se as entradas não mudaram, salvo forcar=True)"""
         self.log(f"=== PROCESSANDO INDICADOR: {codigo_indicador} ===")
         
-        if not self.dados_regioes:
-            self.log("Dados das regiões não carregados!", "ERROR")
+        if self.geometria is None:
+            self.log("Geometria das regiões não carregada!", "ERROR")
+            return None
+        
+        if codigo_indicador not in self.indicadores_mapeamento:
+            self.log(f"Indicador não encontrado: {codigo_indicador}", "ERROR")
             return None
         
+        # Rebuild incremental: compara as entradas com o manifesto
+        assinatura = self.assinatura_indicador(codigo_indicador)
+        registro = None if forcar else self.indicador_atualizado(codigo_indicador, assinatura)
+        if registro:
+            self.log(f"=== SEM ALTERAÇÕES: {codigo_indicador} (use --force para regerar) ===")
+            return {
+                'indicador': codigo_indicador,
+                'svg_path': str(self.base_path / registro['svg_path']),
+                'json_path': str(self.base_path / registro['json_path']),
+                'web_path': str(self.base_path / registro['web_path']),
+                'equipes_path': str(self.base_path / registro['equipes_path']),
+                'municipios_processados': registro['municipios_processados'],
+                'assinatura': assinatura,
+                'ignorado': True,
+                'sucesso': True
+            }
+        
         # Carrega dados CSV
-        dados_csv = self.carregar_dados_csv_indicador(codigo_indicador)
+        with self.instrumentacao.etapa('csv', codigo_indicador) as medida:
+            dados_csv = self.carregar_dados_csv_indicador(codigo_indicador)
+            medida['linhas'] = sum(dados.get('equipes') or 0 for dados in (dados_csv or {}).values())
         if not dados_csv:
             self.log("Nenhum dado CSV encontrado!", "ERROR")
             return None
         
-        # Gera SVG
-        svg_element = self.gerar_svg_indicador(codigo_indicador, dados_csv)
+        # Faixas calculadas uma vez e compartilhadas pelo SVG, pelo JSON e pelo payload web
+        classes = self.classificar_indicador(codigo_indicador, dados_csv)
+        
+        # Gera SVG (gravação incremental, sem montar a árvore completa)
         nome_svg = f"{codigo_indicador}_mapa.svg"
-        arquivo_svg = self.salvar_svg(svg_element, nome_svg)
+        with self.instrumentacao.etapa('svg', codigo_indicador) as medida:
+            fragmentos = self.fragmentos_svg_modelo(codigo_indicador, dados_csv, classes=classes)
+            arquivo_svg = self.salvar_svg_stream(fragmentos, nome_svg)
+            medida['linhas'] = len(dados_csv)
+            medida['vertices'] = self.geometria.total_vertices
+            medida['bytes_gravados'] = arquivo_svg.stat().st_size
         
         # Gera JSON
-        arquivo_json = self.gerar_dados_json_web(codigo_indicador, dados_csv)
+        with self.instrumentacao.etapa('json', codigo_indicador) as medida:
+            arquivo_json = self.gerar_dados_json_web(codigo_indicador, dados_csv, classes)
+            medida['linhas'] = len(dados_csv)
+            medida['bytes_gravados'] = arquivo_json.stat().st_size
+        
+        with self.instrumentacao.etapa('payload_web', codigo_indicador) as medida:
+            arquivo_web = self.gerar_payload_web(codigo_indicador, dados_csv, classes)
+            medida['linhas'] = len(dados_csv)
+            medida['bytes_gravados'] = arquivo_web.stat().st_size
+        
+        # Detalhamento por equipe (um arquivo por município, buscado no clique)
+        with self.instrumentacao.etapa('equipes', codigo_indicador) as medida:
+            pasta_equipes, medida['linhas'], medida['bytes_gravados'] = self.gerar_equipes(codigo_indicador, dados_csv)
         
         resultado = {
             'indicador': codigo_indicador,
             'svg_path': str(arquivo_svg),
             'json_path': str(arquivo_json),
+            'web_path': str(arquivo_web),
+            'equipes_path': str(pasta_equipes),
             'municipios_processados': len(dados_csv),
-            'sucesso': True
+            'assinatura': assinatura,
+            'ignorado': False,
+            'sucesso': True,
+            'leitura': self.leituras.get(codigo_indicador),
+            'etapas': self.instrumentacao.eventos_indicador(codigo_indicador)
         }
         
         self.log(f"=== CONCLUÍDO: {codigo_indicador} ===")
         return resultado
 
+def criar_parser():
+    """Argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(description="Gera SVG e JSON de um indicador")
+    parser.add_argument('indicador', nargs='?',
+                        help="Código do indicador (sem argumento: modo interativo)")
+    parser.add_argument('--agregacao', choices=siaps.METODOS_AGREGACAO, default='ponderada',
+                        help="Agregação das equipes por município (padrão: ponderada)")
+    parser.add_argument('--json-compacto', action='store_true',
+                        help="Grava os JSON sem indentação")
+    parser.add_argument('--force', action='store_true',
+                        help="Regera mesmo que as entradas não tenham mudado")
+    parser.add_argument('--regiao',
+                        help="Recorte: arquivo do REGIAO/ (ex.: norte)")
+    parser.add_argument('--rgi',
+                        help="Recorte: região imediata (NM_RGI ou CD_RGI)")
+    parser.add_argument('--municipios',
+                        help="Recorte: municípios separados por vírgula (código IBGE ou nome)")
+    parser.add_argument('--eventos', metavar='ARQUIVO',
+                        help="Acrescenta os tempos de cada etapa em JSON-lines")
+    parser.add_argument('--profile', nargs='?', const='src/cache/perfis', metavar='PASTA',
+                        help="Grava cProfile e tracemalloc por indicador (padrão: src/cache/perfis)")
+    return parser
+
+def sufixo_recorte(args):
+    """Sufixo do arquivo de um recorte a partir das opções usadas"""
+    partes = []
+    if args.regiao:
+        partes.append(args.regiao)
+    if args.rgi:
+        partes.append(normalizar_nome(args.rgi).lower().replace(' ', '-'))
+    if args.municipios:
+        partes.append('municipios-' + hashlib.sha256(args.municipios.encode('utf-8')).hexdigest()[:8])
+    return '_'.join(partes)
+
 def main():
     """Função principal - pode ser chamada via linha de comando ou importada"""
-    if len(sys.argv) > 1:
+    args = criar_parser().parse_args()
+    
+    if args.indicador:
         # Modo linha de comando
-        codigo_indicador = sys.argv[1]
+        codigo_indicador = args.indicador
         
-        gerador = GeradorSVGWeb()
+        gerador = GeradorSVGWeb(metodo_agregacao=args.agregacao)
+        gerador.json_compacto = args.json_compacto
+        gerador.instrumentacao = Instrumentacao(args.eventos, args.profile)
+        recorte = bool(args.regiao or args.rgi or args.municipios)
         
         # Inicialização
-        if not gerador.carregar_dados_regioes():
+        if not gerador.preparar(topologia=not recorte):
             print("ERRO: Falha ao carregar dados das regiões")
             sys.exit(1)
         
-        gerador.calcular_bounds()
+        if recorte:
+            # Recorte: só o SVG, com a geometria ajustada ao subconjunto
+            try:
+                indices = gerador.selecionar_feicoes(
+                    args.regiao, args.rgi,
+                    [m.strip() for m in args.municipios.split(',')] if args.municipios else None
+                )
+            except ValueError as e:
+                print(json.dumps({'sucesso': False, 'erro': str(e)}))
+                sys.exit(1)
+            
+            arquivo_svg = gerador.gerar_svg_recorte(codigo_indicador, indices, sufixo_recorte(args))
+            print(json.dumps({'indicador': codigo_indicador, 'svg_path': str(arquivo_svg) if arquivo_svg else None,
+                              'municipios': len(indices), 'sucesso': arquivo_svg is not None}))
+            sys.exit(0 if arquivo_svg else 1)
         
         # Processa indicador específico
-        resultado = gerador.processar_indicador_completo(codigo_indicador)
+        with gerador.instrumentacao.perfil(codigo_indicador):
+            resultado = gerador.processar_indicador_completo(codigo_indicador, forcar=args.force)
         
         if resultado and resultado['sucesso']:
+            gerador.registrar_no_manifesto([resultado])
             # Retorna JSON do resultado para o JavaScript
             print(json.dumps(resultado))
             sys.exit(0)
@@ -534,14 +1528,14 @@ def main():
         print("🗺️  GERADOR SVG WEB - MATO GROSSO DO SUL")
         print("="*50)
         
-        gerador = GeradorSVGWeb()
+        gerador = GeradorSVGWeb(metodo_agregacao=args.agregacao)
+        gerador.json_compacto = args.json_compacto
+        gerador.instrumentacao = Instrumentacao(args.eventos, args.profile)
         
-        if not gerador.carregar_dados_regioes():
+        if not gerador.preparar():
             print("❌ Erro ao carregar dados das regiões")
             return
         
-        gerador.calcular_bounds()
-        
         print("\nIndicadores disponíveis:")
         for i, (codigo, config) in enumerate(gerador.indicadores_mapeamento.items(), 1):
             print(f"{i}. {codigo}: {config['nome']}")
@@ -549,18 +1543,26 @@ def main():
         escolha = input("\nEscolha um indicador ou 'todos': ").strip()
         
         if escolha.lower() == 'todos':
+            resultados = []
             for codigo in gerador.indicadores_mapeamento.keys():
-                resultado = gerador.processar_indicador_completo(codigo)
+                with gerador.instrumentacao.perfil(codigo):
+                    resultado = gerador.processar_indicador_completo(codigo, forcar=args.force)
                 if resultado:
+                    resultados.append(resultado)
                     print(f"✅ {codigo} processado com sucesso")
+            gerador.registrar_no_manifesto(resultados)
+            if gerador.gerar_composto(forcar=args.force):
+                print(f"🏆 Composto e ranking: {gerador.ranking_path}")
         else:
             try:
                 indice = int(escolha) - 1
                 codigos = list(gerador.indicadores_mapeamento.keys())
                 if 0 <= indice < len(codigos):
                     codigo = codigos[indice]
-                    resultado = gerador.processar_indicador_completo(codigo)
+                    with gerador.instrumentacao.perfil(codigo):
+                        resultado = gerador.processar_indicador_completo(codigo, forcar=args.force)
                     if resultado:
+                        gerador.registrar_no_manifesto([resultado])
                         print(f"✅ {codigo} processado com sucesso")
                         print(f"📄 SVG: {resultado['svg_path']}")
                         print(f"📊 JSON: {resultado['json_path']}")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Matriz municípios x indicadores
+Descrição: Junta as pontuações de todos os indicadores em uma matriz densa
+(NaN onde o município não tem dado) e calcula em lote os percentis por
+indicador, a pontuação composta ponderada, o ranking e os resumos por região
+"""
+
+import numpy as np
+import pandas as pd
+
+DIRECOES = ('maior', 'menor')
+
+
+class MatrizIndicadores:
+    """Matriz densa (municípios x indicadores) de pontuações, NaN onde não há dados
+
+    codigos: lista de CD_MUN (linhas)
+    indicadores: lista de códigos de indicador (colunas)
+    valores: array float64 (M, I)
+    """
+
+    def __init__(self, codigos, indicadores, valores):
+        self.codigos = list(codigos)
+        self.indicadores = list(indicadores)
+        self.valores = np.asarray(valores, dtype=np.float64)
+
+    @classmethod
+    def de_pontuacoes(cls, pontuacoes, codigos=None):
+        """Constrói a matriz a partir de {indicador: {CD_MUN: pontuação}}
+
+        codigos: linhas na ordem desejada (padrão: todos os municípios com algum dado, ordenados)
+        """
+        indicadores = list(pontuacoes)
+        if codigos is None:
+            codigos = sorted({codigo for valores in pontuacoes.values() for codigo in valores})
+        linha = {codigo: i for i, codigo in enumerate(codigos)}
+
+        valores = np.full((len(codigos), len(indicadores)), np.nan)
+        for j, indicador in enumerate(indicadores):
+            presentes = [(linha[codigo], valor) for codigo, valor in pontuacoes[indicador].items()
+                         if codigo in linha and valor is not None]
+            if presentes:
+                posicoes, numeros = zip(*presentes)
+                valores[list(posicoes), j] = numeros
+        return cls(codigos, indicadores, valores)
+
+    @property
+    def mascara(self):
+        """True onde o município tem dado do indicador"""
+        return ~np.isnan(self.valores)
+
+    def percentis(self, direcoes=None):
+        """Percentil (0-100) de cada município em cada indicador; 100 = melhor desempenho
+
+        direcoes: {indicador: 'maior' | 'menor'} (padrão 'maior' = quanto maior, melhor).
+        Empates recebem o percentil médio; indicador com um único município vale 100
+        """
+        direcoes = direcoes or {}
+        sinais = np.array([-1.0 if direcoes.get(i, 'maior') == 'menor' else 1.0 for i in self.indicadores])
+
+        # Uma ordenação por coluna (NaN fica fora do ranking)
+        postos = pd.DataFrame(self.valores * sinais).rank(axis=0, method='average').to_numpy()
+        contagens = self.mascara.sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percentis = (postos - 1) / (contagens - 1) * 100
+        percentis[:, contagens == 1] = np.where(self.mascara[:, contagens == 1], 100.0, np.nan)
+        return percentis
+
+    def composto(self, percentis, pesos=None, cobertura_minima=0.5):
+        """Média ponderada dos percentis disponíveis de cada município e a cobertura (peso presente / peso total)
+
+        Municípios com cobertura abaixo de cobertura_minima ficam sem pontuação composta
+        """
+        pesos = pesos or {}
+        vetor = np.array([float(pesos.get(i, 1.0)) for i in self.indicadores])
+        presentes = ~np.isnan(percentis)
+
+        peso_presente = presentes @ vetor
+        with np.errstate(divide='ignore', invalid='ignore'):
+            composto = np.where(presentes, percentis, 0.0) @ vetor / peso_presente
+            cobertura = peso_presente / vetor.sum()
+        composto[~(cobertura >= cobertura_minima) | (peso_presente == 0)] = np.nan
+        return composto, np.nan_to_num(cobertura)
+
+    @staticmethod
+    def ranking(valores):
+        """Posição de cada município (1 = maior valor; NaN sem posição)"""
+        return pd.Series(valores).rank(ascending=False, method='min').to_numpy()
+
+    @staticmethod
+    def resumo_por_grupo(grupos, colunas):
+        """Média, mínimo, máximo e contagem por grupo para várias colunas de uma vez
+
+        grupos: rótulo de cada município (None = sem grupo)
+        colunas: array (M,) ou (M, K) com NaN onde não há dado
+        Devolve (rótulos, dict métrica -> array (G, K))
+        """
+        colunas = np.asarray(colunas, dtype=np.float64)
+        if colunas.ndim == 1:
+            colunas = colunas[:, None]
+
+        rotulos = sorted({g for g in grupos if g is not None})
+        indice = {g: k for k, g in enumerate(rotulos)}
+        posicao = np.array([indice.get(g, -1) for g in grupos])
+        com_grupo = posicao >= 0
+
+        # Matriz de pertinência (G, M): somas e contagens de todas as colunas em um produto só
+        pertinencia = np.zeros((len(rotulos), len(grupos)))
+        pertinencia[posicao[com_grupo], np.flatnonzero(com_grupo)] = 1.0
+        presentes = ~np.isnan(colunas)
+        contagem = pertinencia @ presentes
+        with np.errstate(divide='ignore', invalid='ignore'):
+            media = pertinencia @ np.where(presentes, colunas, 0.0) / contagem
+
+        minimo = np.full((len(rotulos), colunas.shape[1]), np.nan)
+        maximo = np.full_like(minimo, np.nan)
+        for k in range(len(rotulos)):
+            linhas = colunas[posicao == k]
+            if len(linhas):
+                with np.errstate(all='ignore'):
+                    validas = ~np.isnan(linhas).all(axis=0)
+                    minimo[k, validas] = np.nanmin(linhas[:, validas], axis=0)
+                    maximo[k, validas] = np.nanmax(linhas[:, validas], axis=0)
+
+        return rotulos, {'media': media, 'minimo': minimo, 'maximo': maximo, 'municipios': contagem}
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modelo de SVG reutilizado entre indicadores
+Descrição: A geometria (caminhos, ids, data-regiao) é serializada uma única vez;
+cada indicador só substitui o título do mapa e, por município, a cor, os
+atributos de dados e o texto do tooltip
+"""
+
+import os
+from xml.sax.saxutils import escape, quoteattr
+
+
+def campos_municipio(cor, pontuacao, classificacao, tooltip):
+    """Atributos variáveis e tooltip que fecham a tag <path> de um município"""
+    return (f' fill={quoteattr(cor)} data-pontuacao={quoteattr(pontuacao)}'
+            f' data-classificacao={quoteattr(classificacao)}>'
+            f'<title>{escape(tooltip)}</title></path>')
+
+
+class ModeloSVG:
+    """Fragmentos estáticos do SVG intercalados com os campos variáveis
+
+    abertura: (antes do id, antes do título, depois do título)
+    blocos: lista de (fragmento estático, índice do município ou None); o
+    fragmento termina com a tag <path> ainda aberta, pronta para receber
+    os atributos variáveis
+    municipios: lista de (código, nome) na ordem dos blocos
+    """
+
+    def __init__(self, geometria, abertura, blocos, fechamento, municipios):
+        self.geometria = geometria
+        self.abertura = abertura
+        self.blocos = blocos
+        self.fechamento = fechamento
+        self.municipios = municipios
+
+    def fragmentos(self, id_svg, titulo, valores):
+        """Gera os pedaços do documento; valores[i] = (cor, pontuação, classificação, tooltip)"""
+        antes_id, antes_titulo, depois_titulo = self.abertura
+        yield antes_id
+        yield quoteattr(id_svg)
+        yield antes_titulo
+        yield escape(titulo)
+        yield depois_titulo
+
+        for estatico, indice in self.blocos:
+            yield estatico
+            if indice is None:
+                continue
+
+            yield campos_municipio(*valores[indice])
+
+        yield self.fechamento
+
+    def renderizar(self, id_svg, titulo, valores):
+        """Documento SVG completo como texto"""
+        return ''.join(self.fragmentos(id_svg, titulo, valores))
+
+
+def escrever_fragmentos(caminho, fragmentos, buffer=1 << 16):
+    """Grava os fragmentos à medida que são gerados, sem montar o documento em memória
+
+    O documento vai para um temporário que substitui o arquivo só no fim (os.replace):
+    quem lê o SVG durante a geração vê a versão anterior inteira, nunca uma pela metade
+    """
+    total = 0
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        with open(temporario, 'w', encoding='utf-8', buffering=buffer) as arquivo:
+            for fragmento in fragmentos:
+                total += arquivo.write(fragmento)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    return total
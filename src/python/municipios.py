@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro de municípios - Mato Grosso do Sul
+Descrição: Índice único dos municípios construído a partir das propriedades do
+GeoJSON (CD_MUN, NM_MUN, CD_RGI, AREA_KM2, arquivo da região), que resolve em
+tempo constante o código IBGE de 7 dígitos, o de 6 dígitos (sem o dígito
+verificador, como nos relatórios SIAPS) ou o nome sem acentos
+"""
+
+import re
+import unicodedata
+
+
+def normalizar_nome(nome):
+    """'Amambaí' / 'AMAMBAI ' / 'amambai' -> 'AMAMBAI'"""
+    if not nome:
+        return ''
+    sem_acentos = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^A-Z0-9]+', ' ', sem_acentos.upper()).strip()
+
+
+def digito_verificador(codigo6):
+    """Dígito verificador do código IBGE de município (pesos 1-2 alternados, módulo 10)"""
+    soma = 0
+    for posicao, digito in enumerate(str(codigo6)):
+        produto = int(digito) * (1 if posicao % 2 == 0 else 2)
+        soma += produto // 10 + produto % 10
+    return (10 - soma % 10) % 10
+
+
+def codigo_completo(codigo):
+    """Código de 7 dígitos a partir do de 6 ou 7 dígitos; None se não for um código"""
+    codigo = str(codigo).strip() if codigo is not None else ''
+    if re.fullmatch(r'\d{7}', codigo):
+        return codigo
+    if re.fullmatch(r'\d{6}', codigo):
+        return f"{codigo}{digito_verificador(codigo)}"
+    return None
+
+
+class Municipio:
+    """Município do GeoJSON com os códigos e nomes usados nas junções"""
+
+    def __init__(self, codigo, nome, regiao, cd_rgi=None, nm_rgi=None, cd_rgint=None, nm_rgint=None,
+                 area_km2=None):
+        self.codigo = codigo
+        self.codigo6 = codigo[:6]
+        self.nome = nome
+        self.nome_normalizado = normalizar_nome(nome)
+        self.regiao = regiao
+        self.cd_rgi = cd_rgi
+        self.nm_rgi = nm_rgi
+        self.cd_rgint = cd_rgint
+        self.nm_rgint = nm_rgint
+        self.area_km2 = area_km2
+
+    def __repr__(self):
+        return f"Municipio({self.codigo}, {self.nome!r}, {self.regiao!r})"
+
+
+class RegistroMunicipios:
+    """Índices por código (7 e 6 dígitos) e por nome normalizado"""
+
+    def __init__(self, municipios):
+        self.municipios = list(municipios)
+        self.por_chave = {}
+
+        for municipio in self.municipios:
+            self.por_chave[municipio.codigo] = municipio
+            self.por_chave[municipio.codigo6] = municipio
+            self.por_chave.setdefault(municipio.nome_normalizado, municipio)
+
+    @classmethod
+    def de_feicoes(cls, feicoes):
+        """Constrói o registro a partir das feições da geometria (propriedades + região)"""
+        municipios = []
+        vistos = set()
+
+        for feicao in feicoes:
+            properties = feicao['propriedades']
+            codigo = codigo_completo(properties.get('CD_MUN'))
+            if not codigo or codigo in vistos:
+                continue
+            vistos.add(codigo)
+
+            municipios.append(Municipio(
+                codigo, properties.get('NM_MUN'), feicao['regiao'],
+                cd_rgi=properties.get('CD_RGI'), nm_rgi=properties.get('NM_RGI'),
+                cd_rgint=properties.get('CD_RGINT'), nm_rgint=properties.get('NM_RGINT'),
+                area_km2=properties.get('AREA_KM2')
+            ))
+
+        return cls(municipios)
+
+    def __len__(self):
+        return len(self.municipios)
+
+    def __iter__(self):
+        return iter(self.municipios)
+
+    def __contains__(self, chave):
+        return self.resolver(chave) is not None
+
+    def resolver(self, chave):
+        """Município pelo código de 7 ou 6 dígitos ou pelo nome (com ou sem acentos)"""
+        if chave is None:
+            return None
+
+        chave = str(chave).strip()
+        municipio = self.por_chave.get(chave)
+        if municipio is None and not chave.isdigit():
+            municipio = self.por_chave.get(normalizar_nome(chave))
+        return municipio
+
+    def codigo(self, chave):
+        """Código de 7 dígitos; para códigos fora do GeoJSON, calcula o dígito verificador"""
+        municipio = self.resolver(chave)
+        if municipio is not None:
+            return municipio.codigo
+        return codigo_completo(chave)
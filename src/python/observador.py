@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Observação das pastas de entrada
+Descrição: Varre periodicamente (polling, sem dependências externas) as
+pastas dos indicadores e o REGIAO/, comparando nome, tamanho e mtime dos
+arquivos. Rajadas de alterações são agrupadas: uma pasta só é entregue
+depois de passar `espera` segundos sem mudar, o que também evita ler um
+export ainda sendo copiado
+"""
+
+import time
+
+import leitura
+
+
+class Observador:
+    """Detecta alterações assentadas em um conjunto de pastas
+
+    pastas: dict chave -> (pasta, extensões observadas)
+    espera: segundos sem novas alterações antes de entregar a pasta (debounce)
+    intervalo: segundos entre as varreduras
+    """
+
+    def __init__(self, pastas, espera=2.0, intervalo=0.5, relogio=time.monotonic):
+        self.pastas = dict(pastas)
+        self.espera = espera
+        self.intervalo = intervalo
+        self.relogio = relogio
+        self.impressoes = {chave: self.impressao(chave) for chave in self.pastas}
+        # Chave -> momento da última alteração ainda não entregue
+        self.pendentes = {}
+
+    def impressao(self, chave):
+        """Impressão atual (nome, tamanho, mtime) dos arquivos observados da pasta"""
+        pasta, extensoes = self.pastas[chave]
+        return leitura.impressao_pasta(pasta, extensoes)
+
+    def verificar(self):
+        """Uma varredura: registra as pastas alteradas e devolve as que já ficaram `espera` segundos sem mudar"""
+        agora = self.relogio()
+        for chave in self.pastas:
+            impressao = self.impressao(chave)
+            if impressao != self.impressoes[chave]:
+                self.impressoes[chave] = impressao
+                self.pendentes[chave] = agora
+
+        prontas = [chave for chave, momento in self.pendentes.items() if agora - momento >= self.espera]
+        for chave in prontas:
+            del self.pendentes[chave]
+        return prontas
+
+    def aguardar(self):
+        """Bloqueia até haver alterações assentadas e devolve as chaves das pastas alteradas"""
+        while True:
+            prontas = self.verificar()
+            if prontas:
+                return prontas
+            time.sleep(self.intervalo)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitor de planilhas XLSX em streaming
+Descrição: Percorre as linhas de uma aba direto do XML compactado (zipfile +
+iterparse), descartando cada linha depois de lida; nunca monta o documento
+inteiro em memória nem depende de openpyxl. Aceita strings compartilhadas,
+inline e de fórmula, números e booleanos
+"""
+
+import re
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+
+NS_PLANILHA = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_RELACOES = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PACOTE = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+TAG_DADOS = f'{{{NS_PLANILHA}}}sheetData'
+TAG_LINHA = f'{{{NS_PLANILHA}}}row'
+TAG_CELULA = f'{{{NS_PLANILHA}}}c'
+TAG_VALOR = f'{{{NS_PLANILHA}}}v'
+TAG_TEXTO = f'{{{NS_PLANILHA}}}t'
+TAG_INLINE = f'{{{NS_PLANILHA}}}is'
+TAG_STRING = f'{{{NS_PLANILHA}}}si'
+TAG_TRECHO = f'{{{NS_PLANILHA}}}r'
+
+
+def indice_coluna(referencia):
+    """'C12' -> 2 (colunas a partir de zero); None se a referência não tiver letras"""
+    match = re.match(r'([A-Z]+)', referencia or '')
+    if not match:
+        return None
+    indice = 0
+    for letra in match.group(1):
+        indice = indice * 26 + ord(letra) - ord('A') + 1
+    return indice - 1
+
+
+def texto_rico(elemento):
+    """Texto de um <si>/<is>, juntando os trechos formatados (<r><t>) e ignorando a fonética"""
+    partes = []
+    for filho in elemento:
+        if filho.tag == TAG_TEXTO:
+            partes.append(filho.text or '')
+        elif filho.tag == TAG_TRECHO:
+            partes.extend(texto.text or '' for texto in filho.iter(TAG_TEXTO))
+    return ''.join(partes)
+
+
+def abas(arquivo_zip):
+    """Lista de (nome da aba, caminho do XML no pacote), na ordem do workbook"""
+    with arquivo_zip.open('xl/_rels/workbook.xml.rels') as f:
+        relacoes = {
+            relacao.get('Id'): relacao.get('Target')
+            for relacao in ET.parse(f).getroot().iter(f'{{{NS_PACOTE}}}Relationship')
+        }
+
+    resultado = []
+    with arquivo_zip.open('xl/workbook.xml') as f:
+        for aba in ET.parse(f).getroot().iter(f'{{{NS_PLANILHA}}}sheet'):
+            alvo = relacoes.get(aba.get(f'{{{NS_RELACOES}}}id'))
+            if not alvo:
+                continue
+            # Alvos absolutos ('/xl/worksheets/...') ou relativos a xl/
+            caminho = alvo.lstrip('/') if alvo.startswith('/') else posixpath.normpath(posixpath.join('xl', alvo))
+            resultado.append((aba.get('name'), caminho))
+    return resultado
+
+
+def strings_compartilhadas(arquivo_zip):
+    """Tabela de strings compartilhadas (vazia se a planilha só usa strings inline)"""
+    if 'xl/sharedStrings.xml' not in arquivo_zip.namelist():
+        return []
+
+    strings = []
+    with arquivo_zip.open('xl/sharedStrings.xml') as f:
+        for _, elemento in ET.iterparse(f):
+            if elemento.tag == TAG_STRING:
+                strings.append(texto_rico(elemento))
+                elemento.clear()
+    return strings
+
+
+def valor_celula(celula, strings):
+    """Valor Python de uma <c>: str, float, bool ou None"""
+    tipo = celula.get('t', 'n')
+    if tipo == 'inlineStr':
+        inline = celula.find(TAG_INLINE)
+        return texto_rico(inline) if inline is not None else None
+
+    valor = celula.find(TAG_VALOR)
+    if valor is None or valor.text is None:
+        return None
+
+    if tipo == 's':
+        return strings[int(valor.text)]
+    if tipo == 'str':
+        return valor.text
+    if tipo == 'b':
+        return valor.text == '1'
+    if tipo == 'e':
+        return None
+    try:
+        return float(valor.text)
+    except ValueError:
+        return valor.text
+
+
+def linhas_aba(arquivo_zip, caminho, strings):
+    """Gera as linhas de uma aba como listas (células vazias = None)"""
+    with arquivo_zip.open(caminho) as f:
+        pai = None
+        for evento, elemento in ET.iterparse(f, events=('start', 'end')):
+            if evento == 'start':
+                # <sheetData> é o pai das linhas: guardado para soltar cada linha já lida
+                if elemento.tag == TAG_DADOS:
+                    pai = elemento
+                continue
+            if elemento.tag != TAG_LINHA:
+                continue
+
+            linha = []
+            for celula in elemento.iter(TAG_CELULA):
+                indice = indice_coluna(celula.get('r'))
+                if indice is None:
+                    indice = len(linha)
+                if indice >= len(linha):
+                    linha.extend([None] * (indice - len(linha) + 1))
+                linha[indice] = valor_celula(celula, strings)
+
+            # Remove a linha já lida da árvore (a árvore nunca cresce além de uma linha)
+            elemento.clear()
+            if pai is not None:
+                pai.remove(elemento)
+            yield linha
+
+
+def ler_planilha(caminho):
+    """Gera (nome da aba, linhas) para cada aba; consumir as linhas antes de passar à próxima
+
+    Uso:
+        for nome, linhas in ler_planilha(arquivo):
+            for linha in linhas: ...
+    """
+    with zipfile.ZipFile(caminho) as arquivo_zip:
+        strings = strings_compartilhadas(arquivo_zip)
+        for nome, caminho_aba in abas(arquivo_zip):
+            yield nome, linhas_aba(arquivo_zip, caminho_aba, strings)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Séries temporais por competência
+Descrição: Agrega as equipes por (competência, município) e monta, por
+indicador, uma matriz densa competência x município com as tendências
+pré-calculadas (variação, média móvel e mudança de posição no ranking)
+"""
+
+import re
+import numpy as np
+import pandas as pd
+
+import siaps
+
+DIRECOES = ('maior', 'menor')
+
+MESES = {
+    'JAN': 1, 'FEV': 2, 'MAR': 3, 'ABR': 4, 'MAI': 5, 'JUN': 6,
+    'JUL': 7, 'AGO': 8, 'SET': 9, 'OUT': 10, 'NOV': 11, 'DEZ': 12
+}
+
+
+def chave_competencia(competencia):
+    """'AGO/25' -> (2025, 8); competências não reconhecidas vão para o início"""
+    match = re.match(r'^\s*([A-Za-zÇç]{3})\w*\s*/\s*(\d{2,4})\s*$', str(competencia or ''))
+    if not match or match.group(1).upper() not in MESES:
+        return (0, 0)
+
+    ano = int(match.group(2))
+    if ano < 100:
+        ano += 2000
+    return (ano, MESES[match.group(1).upper()])
+
+
+def agregar_por_competencia(equipes, metodo='ponderada'):
+    """Pontuação por (competência, município); índice em dois níveis"""
+    equipes = equipes.assign(competencia=equipes['competencia'].fillna(''))
+    partes = {
+        competencia: siaps.agregar_por_municipio(grupo, metodo)
+        for competencia, grupo in equipes.groupby('competencia', sort=False)
+    }
+    if not partes:
+        return siaps.agregar_por_municipio(equipes, metodo)
+
+    ordem = sorted(partes, key=chave_competencia)
+    return pd.concat([partes[c] for c in ordem], keys=ordem, names=['competencia_serie', 'codigo_ibge'])
+
+
+def mais_recente(agregado):
+    """Para cada município, a linha da competência mais recente em que ele tem dados"""
+    return agregado.groupby(level='codigo_ibge', sort=True).tail(1).droplevel('competencia_serie').sort_index()
+
+
+class SerieIndicador:
+    """Matriz densa (competências x municípios) de pontuações, NaN onde não há dados
+
+    competencias: lista ordenada cronologicamente
+    codigos: lista de códigos de município (colunas)
+    valores: array float64 (T, M)
+    direcao: 'maior' (quanto maior, melhor) ou 'menor' (ex.: taxa de exodontias); define o ranking
+    """
+
+    def __init__(self, competencias, codigos, valores, direcao='maior'):
+        if direcao not in DIRECOES:
+            raise ValueError(f"Direção inválida: {direcao}")
+        self.competencias = competencias
+        self.codigos = codigos
+        self.valores = valores
+        self.direcao = direcao
+
+    @classmethod
+    def de_agregado(cls, agregado, direcao='maior'):
+        """Constrói a matriz a partir de agregar_por_competencia"""
+        tabela = agregado['pontuacao'].unstack('codigo_ibge')
+        competencias = sorted(tabela.index, key=chave_competencia)
+        tabela = tabela.reindex(index=competencias).sort_index(axis=1)
+        return cls(list(competencias), list(tabela.columns), tabela.to_numpy(dtype=np.float64), direcao)
+
+    def variacao(self):
+        """Diferença para a competência anterior (NaN na primeira ou sem dado em uma das duas)"""
+        delta = np.full_like(self.valores, np.nan)
+        delta[1:] = self.valores[1:] - self.valores[:-1]
+        return delta
+
+    def media_movel(self, janela=3):
+        """Média das últimas `janela` competências com dados de cada município (as lacunas são puladas;
+        NaN nas competências sem dado)"""
+        tabela = pd.DataFrame(self.valores)
+        medias = tabela.apply(lambda coluna: coluna.dropna().rolling(janela, min_periods=1).mean())
+        return medias.reindex(index=tabela.index, columns=tabela.columns).to_numpy(dtype=np.float64)
+
+    def ranking(self):
+        """Posição de cada município em cada competência (1 = melhor: maior pontuação, ou menor se direcao='menor')"""
+        ascendente = self.direcao == 'menor'
+        return pd.DataFrame(self.valores).rank(axis=1, ascending=ascendente, method='min').to_numpy()
+
+    def variacao_ranking(self):
+        """Posições ganhas em relação à competência anterior (positivo = subiu, isto é, melhorou)"""
+        ranking = self.ranking()
+        variacao = np.full_like(ranking, np.nan)
+        variacao[1:] = ranking[:-1] - ranking[1:]
+        return variacao
+
+    def para_payload(self, casas=2):
+        """Séries por município em listas alinhadas com 'competencias' (null onde não há dados)"""
+        def lista(coluna, inteiro=False):
+            if inteiro:
+                return [None if np.isnan(v) else int(v) for v in coluna]
+            return [None if np.isnan(v) else round(float(v), casas) for v in coluna]
+
+        metricas = {
+            'valores': self.valores,
+            'variacao': self.variacao(),
+            'media_movel': self.media_movel(),
+            'ranking': self.ranking(),
+            'variacao_ranking': self.variacao_ranking()
+        }
+
+        return {
+            'competencias': self.competencias,
+            'direcao': self.direcao,
+            'municipios': {
+                codigo: {nome: lista(matriz[:, j], nome.endswith('ranking')) for nome, matriz in metricas.items()}
+                for j, codigo in enumerate(self.codigos)
+            }
+        }
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor HTTP local - API de mapas sob demanda
+Descrição: Serviço asyncio em torno do GeradorSVGWeb. Regiões, geometria
+projetada e indicadores processados ficam em memória; cada indicador é
+regerado só quando os CSV da sua pasta mudam. As respostas têm ETag,
+Last-Modified e compressão gzip (brotli, se instalado). Também serve os
+arquivos estáticos do projeto, substituindo o `python -m http.server`
+
+Rotas:
+    GET /api/indicadores              lista dos indicadores
+    GET /api/indicador/<codigo>       payload JSON (pontuações, estatísticas, série);
+                                      'composto' combina todos os indicadores
+    GET /api/indicador/<codigo>.svg   mapa SVG; recorte opcional com ?regiao=norte,
+                                      ?rgi=Dourados e/ou ?municipios=5003207,Terenos
+    GET /api/equipes/<codigo>/<CD_MUN> equipes de um município (detalhamento do clique)
+    GET /api/topologia                topologia dos municípios; nível de detalhe opcional
+                                      com ?nivel=regiao ou ?zoom=6
+    GET /<caminho>                    arquivos estáticos (index.html e src/{html,js,css,svg,data})
+
+Uso: python src/python/servidor.py [--host 127.0.0.1] [--porta 8080]
+"""
+
+import sys
+import json
+import gzip
+import asyncio
+import argparse
+import hashlib
+from collections import OrderedDict
+import mimetypes
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import urlsplit, unquote, parse_qs
+
+import leitura
+from mapa import GeradorSVGWeb
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Respostas menores que isso não compensam a compressão
+TAMANHO_MINIMO_COMPRESSAO = 1024
+
+TIPOS_COMPRIMIVEIS = ('application/json', 'image/svg+xml', 'text/', 'application/javascript')
+
+# Arquivos estáticos servidos: só a página e as pastas do frontend (nunca src/cache, CSV, .git...)
+ARQUIVOS_ESTATICOS = {('index.html',)}
+PASTAS_ESTATICAS = {('src', 'html'), ('src', 'js'), ('src', 'css'), ('src', 'svg'), ('src', 'data')}
+
+# Indicadores e recortes mantidos em memória (os menos usados recentemente saem primeiro)
+MAXIMO_RECURSOS = 48
+
+STATUS = {
+    200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 500: 'Internal Server Error'
+}
+
+
+class Recurso:
+    """Corpo de uma resposta com validadores HTTP e versões comprimidas sob demanda"""
+
+    def __init__(self, corpo, tipo, modificado):
+        self.corpo = corpo
+        self.tipo = tipo
+        self.modificado = int(modificado)
+        self.etag = '"' + hashlib.sha256(corpo).hexdigest()[:20] + '"'
+        self.comprimidos = {}
+
+    def codificado(self, codificacao):
+        """Corpo na codificação pedida ('br', 'gzip' ou None), comprimido uma única vez"""
+        if codificacao is None:
+            return self.corpo
+
+        if codificacao not in self.comprimidos:
+            if codificacao == 'br':
+                self.comprimidos[codificacao] = brotli.compress(self.corpo)
+            else:
+                self.comprimidos[codificacao] = gzip.compress(self.corpo, compresslevel=6, mtime=0)
+        return self.comprimidos[codificacao]
+
+
+def escolher_codificacao(accept_encoding, recurso):
+    """Codificação a usar conforme o Accept-Encoding do cliente"""
+    if len(recurso.corpo) < TAMANHO_MINIMO_COMPRESSAO or not recurso.tipo.startswith(TIPOS_COMPRIMIVEIS):
+        return None
+
+    aceitas = {parte.split(';')[0].strip().lower() for parte in accept_encoding.split(',')}
+    if brotli is not None and 'br' in aceitas:
+        return 'br'
+    if 'gzip' in aceitas:
+        return 'gzip'
+    return None
+
+
+def caminho_publico(partes):
+    """True se o caminho (partes relativas à raiz do projeto) pode ser servido como arquivo estático"""
+    if not partes or any(parte.startswith('.') for parte in partes):
+        return False
+    return tuple(partes) in ARQUIVOS_ESTATICOS or (len(partes) > 2 and tuple(partes[:2]) in PASTAS_ESTATICAS)
+
+
+class ServidorMapas:
+    """Rotas da API e cache em memória dos indicadores"""
+
+    def __init__(self, gerador, maximo_recursos=MAXIMO_RECURSOS):
+        self.gerador = gerador
+        # Indicadores e recortes gerados (LRU limitado a maximo_recursos entradas)
+        self.recursos = OrderedDict()
+        self.maximo_recursos = maximo_recursos
+        self.impressoes = {}
+        self.impressao_regioes = None
+        # Arquivos estáticos (limitados às pastas públicas) com cache por mtime
+        self.arquivos = {}
+        self.lock_geracao = asyncio.Lock()
+
+    def preparar(self):
+        """Carrega uma única vez o que todos os indicadores compartilham"""
+        self.impressao_regioes = self.impressao_pasta_regioes()
+        return self.gerador.preparar()
+
+    def impressao_pasta_regioes(self):
+        """Impressão dos GeoJSON do REGIAO/ (muda quando a geometria precisa ser recarregada)"""
+        return leitura.impressao_pasta(self.gerador.regioes_path, ('.json',))
+
+    def guardar(self, chave, recursos):
+        """Guarda os recursos gerados, descartando os menos usados acima do limite"""
+        self.recursos[chave] = recursos
+        self.recursos.move_to_end(chave)
+        while len(self.recursos) > self.maximo_recursos:
+            antiga, _ = self.recursos.popitem(last=False)
+            self.impressoes.pop(antiga, None)
+
+    async def verificar_regioes(self):
+        """Recarrega a geometria e descarta tudo o que foi gerado quando o REGIAO/ muda (chamar com o lock)"""
+        impressao = self.impressao_pasta_regioes()
+        if impressao == self.impressao_regioes:
+            return
+
+        self.gerador.log("REGIAO/ alterado: recarregando a geometria")
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, self.gerador.recarregar_regioes):
+            raise RuntimeError("Erro ao recarregar as regiões")
+        self.recursos.clear()
+        self.impressoes.clear()
+        self.impressao_regioes = impressao
+
+    def gerar_indicador(self, codigo, indices=None):
+        """Processa o indicador em memória: (payload JSON, SVG do estado ou do recorte, equipes por CD_MUN)
+
+        O detalhamento por equipe só é montado para o estado inteiro.
+        """
+        dados_csv = self.gerador.carregar_dados_csv_indicador(codigo)
+        if not dados_csv:
+            return None
+
+        classes = self.gerador.classificar_indicador(codigo, dados_csv)
+        payload = self.gerador.payload_web(codigo, dados_csv, classes)
+        svg = self.gerador.renderizar_svg_modelo(codigo, dados_csv, indices, classes)
+        equipes = self.gerador.indice_equipes(codigo, dados_csv) if indices is None else {}
+        self.gerador.equipes_detalhe.pop(codigo, None)
+        return (json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+                svg.encode('utf-8'),
+                {municipio: json.dumps(fragmento, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                 for municipio, fragmento in equipes.items()})
+
+    async def recursos_indicador(self, codigo, indices=None):
+        """Payload e SVG do indicador, regerados só se os CSV ou o REGIAO/ mudaram desde a última geração"""
+        config = self.gerador.indicadores_mapeamento[codigo]
+        pasta = self.gerador.base_path / config['pasta']
+        chave = codigo if indices is None else (codigo, tuple(indices))
+
+        async with self.lock_geracao:
+            await self.verificar_regioes()
+            impressao = (leitura.impressao_pasta(pasta), self.impressao_regioes)
+            if self.impressoes.get(chave) != impressao or chave not in self.recursos:
+                loop = asyncio.get_running_loop()
+                gerado = await loop.run_in_executor(None, self.gerar_indicador, codigo, indices)
+                if gerado is None:
+                    return None
+
+                modificado = max((mtime for arquivos in impressao for _, _, mtime in arquivos), default=0) / 1e9
+                corpo_json, corpo_svg, corpos_equipes = gerado
+                self.guardar(chave, {
+                    'json': Recurso(corpo_json, 'application/json; charset=utf-8', modificado),
+                    'svg': Recurso(corpo_svg, 'image/svg+xml; charset=utf-8', modificado),
+                    'equipes': {
+                        municipio: Recurso(corpo, 'application/json; charset=utf-8', modificado)
+                        for municipio, corpo in corpos_equipes.items()
+                    }
+                })
+                self.impressoes[chave] = impressao
+            else:
+                self.recursos.move_to_end(chave)
+
+            return self.recursos[chave]
+
+    async def recursos_composto(self):
+        """Payload e SVG do composto, montados dos payloads em memória de todos os indicadores
+        (refeitos só quando algum deles muda)"""
+        payloads = {}
+        for codigo in self.gerador.indicadores_mapeamento:
+            recursos = await self.recursos_indicador(codigo)
+            if recursos:
+                payloads[codigo] = recursos['json']
+        if not payloads:
+            return None
+
+        chave = self.gerador.composto['codigo']
+        async with self.lock_geracao:
+            impressao = tuple((codigo, recurso.etag) for codigo, recurso in payloads.items())
+            if self.impressoes.get(chave) != impressao or chave not in self.recursos:
+                loop = asyncio.get_running_loop()
+                payload, svg = await loop.run_in_executor(
+                    None, self.gerador.composto_em_memoria,
+                    {codigo: json.loads(recurso.corpo) for codigo, recurso in payloads.items()}
+                )
+                modificado = max(recurso.modificado for recurso in payloads.values())
+                self.guardar(chave, {
+                    'json': Recurso(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+                                    'application/json; charset=utf-8', modificado),
+                    'svg': Recurso(svg.encode('utf-8'), 'image/svg+xml; charset=utf-8', modificado)
+                })
+                self.impressoes[chave] = impressao
+            else:
+                self.recursos.move_to_end(chave)
+
+            return self.recursos[chave]
+
+    def recurso_arquivo(self, caminho):
+        """Arquivo estático das pastas públicas (com cache por mtime); None fora delas"""
+        base = self.gerador.base_path.resolve()
+        arquivo = (base / caminho.lstrip('/')).resolve()
+        if arquivo.is_dir():
+            arquivo = arquivo / 'index.html'
+        try:
+            partes = arquivo.relative_to(base).parts
+        except ValueError:
+            return None
+        if not caminho_publico(partes) or not arquivo.is_file():
+            return None
+
+        stat = arquivo.stat()
+        em_cache = self.arquivos.get(partes)
+        if em_cache is not None and em_cache.modificado == int(stat.st_mtime):
+            return em_cache
+
+        tipo = mimetypes.guess_type(arquivo.name)[0] or 'application/octet-stream'
+        if tipo.startswith('text/') or tipo in ('application/json', 'application/javascript', 'image/svg+xml'):
+            tipo += '; charset=utf-8'
+        recurso = Recurso(arquivo.read_bytes(), tipo, stat.st_mtime)
+        self.arquivos[partes] = recurso
+        return recurso
+
+    def indices_recorte(self, consulta):
+        """Índices das feições pedidas na query string; None para o estado inteiro"""
+        parametros = parse_qs(consulta)
+        regiao = parametros.get('regiao', [None])[0]
+        rgi = parametros.get('rgi', [None])[0]
+        municipios = [m.strip() for valor in parametros.get('municipios', []) for m in valor.split(',') if m.strip()]
+
+        if not (regiao or rgi or municipios):
+            return None
+        return self.gerador.selecionar_feicoes(regiao, rgi, municipios or None)
+
+    def nivel_topologia(self, consulta):
+        """Nível de detalhe pedido por ?nivel= ou ?zoom= (ampliação sobre o estado inteiro)"""
+        parametros = parse_qs(consulta)
+        nivel = parametros.get('nivel', [None])[0]
+        zoom = parametros.get('zoom', [None])[0]
+
+        if nivel:
+            self.gerador.parametros_nivel(nivel)
+            return nivel
+        if zoom:
+            zoom = float(zoom)
+            if not zoom > 0:
+                raise ValueError(f"Zoom inválido: {zoom}")
+            return self.gerador.nivel_para_zoom(zoom)
+        return 'estado'
+
+    async def resolver(self, caminho, consulta=''):
+        """Recurso correspondente à rota; None se não existir (ValueError para recorte inválido)"""
+        if caminho == '/api/indicadores':
+            corpo = json.dumps([
+                {'codigo': codigo, 'nome': config['nome']}
+                for codigo, config in self.gerador.indicadores_mapeamento.items()
+            ], ensure_ascii=False).encode('utf-8')
+            return Recurso(corpo, 'application/json; charset=utf-8', 0)
+
+        if caminho == '/api/topologia':
+            caminho_topologia = self.gerador.topologia_nivel_path(self.nivel_topologia(consulta))
+            return self.recurso_arquivo(str(caminho_topologia.relative_to(self.gerador.base_path)))
+
+        if caminho.startswith('/api/equipes/'):
+            codigo, _, municipio = caminho[len('/api/equipes/'):].partition('/')
+            if municipio.endswith('.json'):
+                municipio = municipio[:-5]
+            if codigo not in self.gerador.indicadores_mapeamento or not municipio:
+                return None
+
+            # Aceita o código de 6 dígitos dos relatórios ou o nome do município
+            resolvido = self.gerador.municipios.resolver(municipio) if self.gerador.municipios else None
+            recursos = await self.recursos_indicador(codigo)
+            if not recursos:
+                return None
+            return recursos['equipes'].get(resolvido.codigo if resolvido else municipio)
+
+        if caminho.startswith('/api/indicador/'):
+            codigo = caminho[len('/api/indicador/'):]
+            formato = 'json'
+            if codigo.endswith('.svg'):
+                codigo, formato = codigo[:-4], 'svg'
+            elif codigo.endswith('.json'):
+                codigo = codigo[:-5]
+
+            if codigo == self.gerador.composto['codigo']:
+                recursos = await self.recursos_composto()
+                return recursos[formato] if recursos else None
+            if codigo not in self.gerador.indicadores_mapeamento:
+                return None
+            indices = self.indices_recorte(consulta) if formato == 'svg' else None
+            recursos = await self.recursos_indicador(codigo, indices)
+            return recursos[formato] if recursos else None
+
+        return self.recurso_arquivo(caminho)
+
+    async def atender(self, reader, writer):
+        """Atende uma requisição HTTP/1.1 (uma por conexão)"""
+        try:
+            cabecalho = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+
+        linhas = cabecalho.decode('latin-1').split('\r\n')
+        try:
+            metodo, alvo, _ = linhas[0].split(' ', 2)
+        except ValueError:
+            await self.responder(writer, 400)
+            return
+
+        headers = {}
+        for linha in linhas[1:]:
+            nome, _, valor = linha.partition(':')
+            if nome:
+                headers[nome.strip().lower()] = valor.strip()
+
+        if metodo not in ('GET', 'HEAD'):
+            await self.responder(writer, 405, extras={'Allow': 'GET, HEAD'})
+            return
+
+        url = urlsplit(alvo)
+        caminho = unquote(url.path)
+        try:
+            recurso = await self.resolver(caminho, url.query)
+        except ValueError as e:
+            await self.responder(writer, 400, str(e).encode('utf-8'),
+                                 {'Content-Type': 'text/plain; charset=utf-8'})
+            return
+        except Exception as e:
+            self.gerador.log(f"Erro atendendo {caminho}: {e}", "ERROR")
+            await self.responder(writer, 500)
+            return
+
+        if recurso is None:
+            await self.responder(writer, 404)
+            return
+
+        validadores = {
+            'ETag': recurso.etag,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding'
+        }
+        if recurso.modificado:
+            validadores['Last-Modified'] = formatdate(recurso.modificado, usegmt=True)
+
+        if self.nao_modificado(headers, recurso):
+            await self.responder(writer, 304, extras=validadores)
+            return
+
+        codificacao = escolher_codificacao(headers.get('accept-encoding', ''), recurso)
+        corpo = recurso.codificado(codificacao)
+        extras = {**validadores, 'Content-Type': recurso.tipo}
+        if codificacao:
+            extras['Content-Encoding'] = codificacao
+
+        await self.responder(writer, 200, corpo if metodo == 'GET' else b'', extras, tamanho=len(corpo))
+
+    @staticmethod
+    def nao_modificado(headers, recurso):
+        """Avalia If-None-Match (prioritário) e If-Modified-Since"""
+        if 'if-none-match' in headers:
+            etags = [etag.strip() for etag in headers['if-none-match'].split(',')]
+            return recurso.etag in etags or '*' in etags
+
+        if 'if-modified-since' in headers and recurso.modificado:
+            try:
+                return recurso.modificado <= parsedate_to_datetime(headers['if-modified-since']).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def responder(self, writer, status, corpo=b'', extras=None, tamanho=None):
+        """Envia status, cabeçalhos e corpo e fecha a conexão"""
+        if status >= 400 and not corpo:
+            corpo = STATUS[status].encode('utf-8')
+            extras = {**(extras or {}), 'Content-Type': 'text/plain; charset=utf-8'}
+
+        cabecalhos = {
+            'Date': formatdate(usegmt=True),
+            'Connection': 'close',
+            'Content-Length': str(len(corpo) if tamanho is None else tamanho),
+            **(extras or {})
+        }
+        if status == 304:
+            del cabecalhos['Content-Length']
+
+        resposta = f"HTTP/1.1 {status} {STATUS[status]}\r\n"
+        resposta += ''.join(f"{nome}: {valor}\r\n" for nome, valor in cabecalhos.items())
+        writer.write(resposta.encode('latin-1') + b'\r\n' + corpo)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+def criar_parser():
+    """Argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(description="Servidor HTTP com a API de mapas sob demanda")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="Endereço de escuta (padrão: 127.0.0.1)")
+    parser.add_argument('--porta', type=int, default=8080,
+                        help="Porta de escuta (padrão: 8080)")
+    return parser
+
+
+async def executar(host, porta):
+    """Prepara o gerador e atende até ser interrompido"""
+    servidor_mapas = ServidorMapas(GeradorSVGWeb())
+    if not servidor_mapas.preparar():
+        print("❌ Erro ao carregar dados das regiões")
+        return False
+
+    servidor = await asyncio.start_server(servidor_mapas.atender, host, porta)
+    print(f"🌐 Servidor em http://{host}:{porta} (Ctrl+C para encerrar)")
+    async with servidor:
+        await servidor.serve_forever()
+    return True
+
+
+def main(argv=None):
+    """Função principal"""
+    args = criar_parser().parse_args(argv)
+    try:
+        return asyncio.run(executar(args.host, args.porta))
+    except KeyboardInterrupt:
+        print("\n⏸️  Servidor encerrado.")
+        return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
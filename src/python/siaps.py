@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitor de relatórios SIAPS - Relatório Qualidade / Visão por Competência
+Descrição: Lê o preâmbulo de metadados (UF, município, indicador, competência,
+tipo de equipe), localiza a linha de cabeçalho da tabela de equipes e agrega as
+pontuações das equipes por código IBGE
+"""
+
+import re
+import pandas as pd
+
+import planilha
+from municipios import normalizar_nome
+
+# Rótulos do preâmbulo -> chave nos metadados
+CAMPOS_PREAMBULO = {
+    'Dado gerado em': 'gerado_em',
+    'UF': 'uf',
+    'Município': 'municipio',
+    'Indicador': 'indicador',
+    'Competência selecionada': 'competencia',
+    'Tipo de Equipe': 'tipo_equipe'
+}
+
+# Colunas de identificação das equipes (texto, preserva zeros à esquerda)
+COLUNAS_TEXTO = {
+    'CNES': str,
+    'ESTABELECIMENTO': str,
+    'TIPO DO ESTABELECIMENTO': str,
+    'INE': str,
+    'NOME DA EQUIPE': str,
+    'SIGLA DA EQUIPE': str
+}
+
+METODOS_AGREGACAO = ('media', 'ponderada', 'maximo')
+
+# Cabeçalhos (normalizados) que identificam o município em planilhas consolidadas
+COLUNAS_CODIGO_MUNICIPIO = ('IBGE', 'CODIGO IBGE', 'COD IBGE', 'CODIGO DO MUNICIPIO', 'CODIGO MUNICIPIO', 'CO MUNICIPIO')
+COLUNAS_NOME_MUNICIPIO = ('MUNICIPIO', 'NOME DO MUNICIPIO', 'NOME MUNICIPIO')
+COLUNAS_COMPETENCIA = ('COMPETENCIA', 'COMPETENCIA SELECIONADA')
+
+# Planilhas de controle do download (RELATORIO_MS_*.xlsx): renomeações e municípios faltantes
+COLUNAS_CONTROLE = ('ARQUIVO ORIGINAL', 'ARQUIVO NOVO')
+ABA_FALTANTES = 'FALTANTES'
+
+
+class RelatorioSIAPS:
+    """Relatório SIAPS: metadados do preâmbulo e tabela de equipes"""
+
+    def __init__(self, arquivo, metadados, equipes):
+        self.arquivo = arquivo
+        self.metadados = metadados
+        self.equipes = equipes
+
+    @property
+    def codigo_ibge(self):
+        return self.metadados.get('codigo_ibge')
+
+    @property
+    def nome_municipio(self):
+        return self.metadados.get('nome_municipio')
+
+    @property
+    def competencia(self):
+        return self.metadados.get('competencia')
+
+
+def separar_municipio(info_municipio):
+    """Separa '500025 / ALCINÓPOLIS' em código IBGE e nome"""
+    info_str = str(info_municipio).strip()
+
+    match_codigo = re.match(r'^(\d{6,7})', info_str)
+    codigo = match_codigo.group(1) if match_codigo else None
+
+    match_nome = re.search(r'/\s*(.+)$', info_str)
+    nome = match_nome.group(1).strip() if match_nome else None
+
+    return codigo, nome
+
+
+def registrar_preambulo(metadados, linha):
+    """Interpreta uma linha 'Rótulo: valor' do preâmbulo, acrescentando-a aos metadados"""
+    rotulo, _, valor = linha.partition(':')
+    chave = CAMPOS_PREAMBULO.get(rotulo.strip())
+    if chave and valor.strip():
+        metadados[chave] = valor.strip()
+
+    if chave == 'municipio':
+        metadados['codigo_ibge'], metadados['nome_municipio'] = separar_municipio(valor)
+
+
+def ler_preambulo(arquivo, sep=';'):
+    """Lê o preâmbulo linha a linha até o cabeçalho; o arquivo fica posicionado nos dados"""
+    metadados = {}
+
+    while True:
+        linha = arquivo.readline()
+        if not linha:
+            return metadados, None
+
+        linha = linha.strip().lstrip('\ufeff')
+
+        # Primeira linha com separador é o cabeçalho da tabela de equipes
+        if sep in linha:
+            cabecalho = [coluna.strip().strip('"') for coluna in linha.split(sep)]
+            return metadados, cabecalho
+
+        registrar_preambulo(metadados, linha)
+
+
+def converter_numero(serie):
+    """Converte uma coluna para float, aceitando vírgula decimal"""
+    if serie.dtype == object or pd.api.types.is_string_dtype(serie):
+        serie = serie.astype('string').str.replace(',', '.', regex=False)
+    return pd.to_numeric(serie, errors='coerce')
+
+
+def ler_relatorio_siaps(caminho, encoding='utf-8', sep=';'):
+    """Lê um relatório SIAPS em uma única passada (preâmbulo + tabela de equipes)"""
+    with open(caminho, 'r', encoding=encoding, newline='') as arquivo:
+        metadados, cabecalho = ler_preambulo(arquivo, sep)
+
+        if not cabecalho:
+            return RelatorioSIAPS(caminho, metadados, pd.DataFrame())
+
+        dtypes = {coluna: tipo for coluna, tipo in COLUNAS_TEXTO.items() if coluna in cabecalho}
+        equipes = pd.read_csv(
+            arquivo, sep=sep, header=None, names=cabecalho,
+            decimal=',', dtype=dtypes, skip_blank_lines=True
+        )
+
+    # Rodapé ("Fonte: ...", "Dado preliminar") não tem pontuação
+    coluna_pontuacao = cabecalho[-1]
+    equipes[coluna_pontuacao] = converter_numero(equipes[coluna_pontuacao])
+    equipes = equipes[equipes[coluna_pontuacao].notna()].reset_index(drop=True)
+
+    return RelatorioSIAPS(caminho, metadados, equipes)
+
+
+def texto_celula(valor):
+    """Célula de planilha como texto: números inteiros sem '.0' (códigos, CNES, INE)"""
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor).strip()
+
+
+def tabela_consolidada(cabecalho, linhas):
+    """Equipes de uma aba consolidada (um município por linha); None se a aba não identifica o município
+
+    As colunas de identificação viram 'codigo_ibge', 'nome_municipio' e
+    'competencia' por linha; as demais seguem como no CSV (pontuação na última).
+    """
+    normalizados = [normalizar_nome(coluna) for coluna in cabecalho]
+    coluna_codigo = next((i for i, nome in enumerate(normalizados)
+                          if nome in COLUNAS_CODIGO_MUNICIPIO or nome.endswith(' IBGE')), None)
+    coluna_nome = next((i for i, nome in enumerate(normalizados) if nome in COLUNAS_NOME_MUNICIPIO), None)
+    coluna_competencia = next((i for i, nome in enumerate(normalizados) if nome in COLUNAS_COMPETENCIA), None)
+    if coluna_codigo is None and coluna_nome is None:
+        return None
+
+    identificacao = {coluna_codigo, coluna_nome, coluna_competencia} - {None}
+    equipe = [i for i in range(len(cabecalho)) if i not in identificacao]
+    if not equipe:
+        return None
+
+    registros = []
+    for linha in linhas:
+        linha = list(linha) + [None] * (len(cabecalho) - len(linha))
+        codigo, nome = None, None
+        if coluna_nome is not None:
+            codigo, nome = separar_municipio(texto_celula(linha[coluna_nome]) or '')
+            # Só o nome, sem o '500025 / ' do relatório
+            if nome is None and not codigo:
+                nome = texto_celula(linha[coluna_nome])
+        if coluna_codigo is not None:
+            codigo = separar_municipio(texto_celula(linha[coluna_codigo]) or '')[0] or codigo
+
+        registros.append([codigo, nome, texto_celula(linha[coluna_competencia]) if coluna_competencia is not None
+                          else None] + [linha[i] for i in equipe])
+
+    colunas_equipe = [cabecalho[i] for i in equipe]
+    equipes = pd.DataFrame(registros, columns=['codigo_ibge', 'nome_municipio', 'competencia'] + colunas_equipe,
+                           dtype=object)
+    for coluna in colunas_equipe:
+        if coluna in COLUNAS_TEXTO:
+            equipes[coluna] = equipes[coluna].map(texto_celula)
+
+    # Rodapé e linhas sem município não têm pontuação/código
+    equipes[colunas_equipe[-1]] = converter_numero(equipes[colunas_equipe[-1]])
+    equipes = equipes[equipes[colunas_equipe[-1]].notna() & equipes['codigo_ibge'].notna()]
+    if coluna_competencia is None:
+        equipes = equipes.drop(columns='competencia')
+    return equipes.reset_index(drop=True)
+
+
+def ler_planilha_siaps(caminho):
+    """Lê uma planilha XLSX da pasta do indicador, em streaming
+
+    Planilha consolidada (uma linha por equipe, com o município em uma coluna):
+    metadados['consolidado'] = True e equipes com 'codigo_ibge' por linha.
+    Planilha de controle do download (abas 'Renomeados'/'Faltantes'):
+    metadados['controle'] = True e a lista metadados['faltantes'], sem equipes.
+    """
+    metadados = {'planilha': True}
+    partes = []
+
+    for nome_aba, linhas in planilha.ler_planilha(caminho):
+        if normalizar_nome(nome_aba) == ABA_FALTANTES:
+            valores = [texto_celula(linha[0]) for linha in linhas if linha and linha[0] is not None]
+            metadados['controle'] = True
+            metadados['faltantes'] = [v for v in valores if normalizar_nome(v) != ABA_FALTANTES]
+            continue
+
+        preambulo = {}
+        for linha in linhas:
+            celulas = [texto_celula(valor) for valor in linha if valor not in (None, '')]
+            if not celulas:
+                continue
+            if len(celulas) == 1:
+                registrar_preambulo(preambulo, celulas[0])
+                continue
+
+            # Primeira linha com várias células é o cabeçalho (como a linha com separador no CSV)
+            cabecalho = [texto_celula(valor) or '' for valor in linha]
+            if any(normalizar_nome(coluna) in COLUNAS_CONTROLE for coluna in cabecalho):
+                metadados['controle'] = True
+                metadados['renomeados'] = sum(1 for _ in linhas)
+                break
+
+            equipes = tabela_consolidada(cabecalho, linhas)
+            if equipes is not None and not equipes.empty:
+                if 'competencia' not in equipes.columns:
+                    equipes.insert(2, 'competencia', preambulo.get('competencia'))
+                partes.append(equipes)
+            break
+
+        for chave in ('uf', 'indicador', 'competencia', 'gerado_em', 'tipo_equipe'):
+            if chave in preambulo:
+                metadados.setdefault(chave, preambulo[chave])
+
+    if partes:
+        metadados['consolidado'] = True
+        return RelatorioSIAPS(caminho, metadados, pd.concat(partes, ignore_index=True))
+    return RelatorioSIAPS(caminho, metadados, pd.DataFrame())
+
+
+def agregar_por_municipio(equipes, metodo='ponderada'):
+    """Agrega as pontuações das equipes por código IBGE em uma única passada
+
+    metodo: 'media' (média simples), 'ponderada' (média ponderada pelo
+    denominador, com média simples quando o peso total é zero) ou 'maximo'.
+    """
+    if metodo not in METODOS_AGREGACAO:
+        raise ValueError(f"Método de agregação inválido: {metodo}")
+
+    equipes = equipes.dropna(subset=['codigo_ibge', 'pontuacao'])
+    peso = equipes['peso'].fillna(0).clip(lower=0)
+
+    agregado = equipes.assign(
+        peso=peso,
+        pontuacao_peso=equipes['pontuacao'] * peso
+    ).groupby('codigo_ibge', sort=True).agg(
+        nome=('nome_municipio', 'last'),
+        competencia=('competencia', 'last'),
+        arquivo_origem=('arquivo_origem', 'last'),
+        equipes=('pontuacao', 'size'),
+        media=('pontuacao', 'mean'),
+        maximo=('pontuacao', 'max'),
+        soma_peso=('peso', 'sum'),
+        soma_pontuacao_peso=('pontuacao_peso', 'sum')
+    )
+
+    if metodo == 'media':
+        agregado['pontuacao'] = agregado['media']
+    elif metodo == 'maximo':
+        agregado['pontuacao'] = agregado['maximo']
+    else:
+        ponderada = agregado['soma_pontuacao_peso'] / agregado['soma_peso'].where(agregado['soma_peso'] > 0)
+        agregado['pontuacao'] = ponderada.fillna(agregado['media'])
+
+    return agregado[['nome', 'competencia', 'arquivo_origem', 'equipes', 'pontuacao']]
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Topologia compacta dos municípios para o navegador
+Descrição: Quantiza os anéis projetados numa grade inteira fina, corta-os
+nas junções entre municípios vizinhos e guarda cada fronteira uma única vez
+(arcos compartilhados no formato TopoJSON). Cada nível de detalhe leva os
+arcos já compartilhados para a sua grade e os simplifica uma única vez, então
+os dois lados de uma fronteira continuam usando o mesmo arco; as coordenadas
+saem delta-codificadas
+"""
+
+import numpy as np
+
+from geometria import _douglas_peucker, simplificar_anel
+
+# Grade (pixels do viewBox) em que as fronteiras são identificadas: fina o bastante
+# para que vértices distintos da origem não se fundam e criem junções espúrias
+GRADE_BASE = 0.005
+
+
+def quantizar_anel(pontos, escala):
+    """Arredonda o anel para a grade e remove pontos consecutivos repetidos e o fechamento"""
+    grade = np.rint(np.asarray(pontos, dtype=np.float64) / escala).astype(np.int64)
+    if len(grade) == 0:
+        return []
+
+    repetido = np.zeros(len(grade), dtype=bool)
+    repetido[1:] = (grade[1:] == grade[:-1]).all(axis=1)
+    grade = grade[~repetido]
+
+    if len(grade) > 1 and (grade[0] == grade[-1]).all():
+        grade = grade[:-1]
+
+    return [tuple(p) for p in grade.tolist()]
+
+
+def encontrar_juncoes(aneis):
+    """Pontos em que dois anéis deixam de seguir o mesmo caminho"""
+    vizinhos = {}
+    juncoes = set()
+
+    for anel in aneis:
+        n = len(anel)
+        for i, ponto in enumerate(anel):
+            anterior, seguinte = anel[i - 1], anel[(i + 1) % n]
+            visto = vizinhos.get(ponto)
+
+            if visto is None:
+                vizinhos[ponto] = (anterior, seguinte)
+            elif visto != (anterior, seguinte) and visto != (seguinte, anterior):
+                juncoes.add(ponto)
+
+    return juncoes
+
+
+def cortar_anel(anel, juncoes):
+    """Divide um anel em arcos que começam e terminam em junções"""
+    cortes = [i for i, ponto in enumerate(anel) if ponto in juncoes]
+
+    if not cortes:
+        # Anel sem vizinhos: arco fechado começando no menor ponto (forma canônica)
+        inicio = anel.index(min(anel))
+        girado = anel[inicio:] + anel[:inicio]
+        return [girado + girado[:1]]
+
+    girado = anel[cortes[0]:] + anel[:cortes[0]]
+    cortes = [i - cortes[0] for i in cortes] + [len(anel)]
+    girado = girado + girado[:1]
+
+    return [girado[a:b + 1] for a, b in zip(cortes, cortes[1:])]
+
+
+class Topologia:
+    """Acumula arcos únicos; o índice ~i indica o arco i percorrido ao contrário"""
+
+    def __init__(self):
+        self.arcos = []
+        self.indices = {}
+
+    def indice_arco(self, arco):
+        """Índice do arco, reaproveitando um arco igual ou o mesmo percorrido ao contrário"""
+        chave = tuple(arco)
+        if chave in self.indices:
+            return self.indices[chave]
+
+        reverso = chave[::-1]
+        if reverso in self.indices:
+            return ~self.indices[reverso]
+
+        self.indices[chave] = len(self.arcos)
+        self.arcos.append(arco)
+        return self.indices[chave]
+
+
+def requantizar_arco(arco, fator):
+    """Leva um arco da grade base para uma grade `fator` vezes mais grossa, sem pontos repetidos em sequência"""
+    grade = np.rint(np.asarray(arco, dtype=np.float64) / fator).astype(np.int64)
+    repetido = np.zeros(len(grade), dtype=bool)
+    repetido[1:] = (grade[1:] == grade[:-1]).all(axis=1)
+    grade = grade[~repetido]
+
+    if len(grade) == 1:
+        # Fronteira menor que a célula da grade: o arco vira um ponto, mas continua válido
+        grade = np.repeat(grade, 2, axis=0)
+    return grade
+
+
+def simplificar_arco(arco, tolerancia):
+    """Simplifica um arco preservando as extremidades (as junções ficam intactas)"""
+    pontos = np.asarray(arco, dtype=np.float64)
+    if tolerancia <= 0 or len(pontos) <= 2:
+        return pontos.astype(np.int64)
+
+    if (pontos[0] == pontos[-1]).all():
+        return simplificar_anel(pontos, tolerancia).astype(np.int64)
+
+    return pontos[_douglas_peucker(pontos, tolerancia)].astype(np.int64)
+
+
+def codificar_delta(pontos):
+    """Primeiro ponto absoluto, demais como diferença do anterior"""
+    pontos = np.asarray(pontos, dtype=np.int64)
+    delta = pontos.copy()
+    delta[1:] -= pontos[:-1]
+    return delta.tolist()
+
+
+def montar_arcos(feicoes, grade=GRADE_BASE):
+    """Arcos compartilhados na grade base: (grade, arcos, geometrias com os índices dos arcos)
+
+    feicoes: lista de dicts com 'id', 'propriedades' e 'poligonos' (lista de
+    polígonos, cada um uma lista de anéis N x 2 em coordenadas SVG; o
+    primeiro anel é o exterior). O resultado serve a todos os níveis de
+    detalhe (construir_topologia(..., base=...)).
+    """
+    quantizadas = []
+    for feicao in feicoes:
+        poligonos = []
+        for poligono in feicao['poligonos']:
+            aneis = [quantizar_anel(anel, grade) for anel in poligono]
+            aneis = [anel for anel in aneis if len(anel) >= 3]
+            if aneis:
+                poligonos.append(aneis)
+        quantizadas.append(poligonos)
+
+    juncoes = encontrar_juncoes(anel for poligonos in quantizadas for aneis in poligonos for anel in aneis)
+
+    topologia = Topologia()
+    geometrias = []
+    for feicao, poligonos in zip(feicoes, quantizadas):
+        if not poligonos:
+            continue
+
+        arcos = [
+            [[topologia.indice_arco(arco) for arco in cortar_anel(anel, juncoes)] for anel in aneis]
+            for aneis in poligonos
+        ]
+
+        geometria = {'id': feicao['id'], 'properties': feicao['propriedades']}
+        if len(arcos) == 1:
+            geometria.update({'type': 'Polygon', 'arcs': arcos[0]})
+        else:
+            geometria.update({'type': 'MultiPolygon', 'arcs': arcos})
+        geometrias.append(geometria)
+
+    return grade, topologia.arcos, geometrias
+
+
+def construir_topologia(feicoes, escala=0.1, tolerancia=0.25, bbox=None, base=None):
+    """Monta o objeto TopoJSON de um nível de detalhe (grade `escala`, simplificação `tolerancia`)
+
+    As fronteiras são identificadas na grade base (montar_arcos; passe `base`
+    para reaproveitá-la entre níveis) e só depois cada arco compartilhado é
+    levado à grade do nível e simplificado, uma vez para os dois vizinhos.
+    """
+    if base is None:
+        base = montar_arcos(feicoes, min(escala, GRADE_BASE))
+    grade, arcos_base, geometrias = base
+
+    fator = escala / grade
+    tolerancia_grade = tolerancia / escala
+    arcos = [
+        codificar_delta(simplificar_arco(requantizar_arco(arco, fator), tolerancia_grade))
+        for arco in arcos_base
+    ]
+
+    resultado = {
+        'type': 'Topology',
+        'transform': {'scale': [escala, escala], 'translate': [0, 0]},
+        'arcs': arcos,
+        'objects': {
+            'municipios': {'type': 'GeometryCollection', 'geometries': geometrias}
+        }
+    }
+    if bbox is not None:
+        resultado['bbox'] = bbox
+
+    return resultado
@@ -0,0 +1,6 @@
+"""Os módulos do gerador ficam em src/python e são importados sem pacote (como em gerar_todos_svgs.py)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'python'))
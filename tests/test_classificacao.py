@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+import classificacao
+from classificacao import Classificacao
+
+CORES = ['#c1', '#c2', '#c3', '#c4', '#c5']
+
+
+def test_jenks_separa_grupos_naturais():
+    valores = np.array([1, 2, 3, 50, 51, 52, 100, 101], dtype=float)
+    assert classificacao.quebras_jenks(valores, 3).tolist() == [50, 100]
+
+
+def test_jenks_com_poucos_valores_distintos():
+    # Menos valores distintos que classes: cada valor distinto (exceto o menor) vira um limite
+    valores = np.array([10, 10, 20, 20, 30], dtype=float)
+    assert classificacao.quebras_jenks(valores, 5).tolist() == [20, 30]
+
+
+def test_quantil_divide_em_partes_iguais():
+    quebras = classificacao.calcular_quebras(np.arange(100, dtype=float), {'metodo': 'quantil'}, 4)
+    assert quebras.tolist() == [24.75, 49.5, 74.25]
+
+
+def test_quantis_repetidos_viram_uma_classe_so():
+    valores = np.array([0] * 8 + [5, 10], dtype=float)
+    quebras = classificacao.calcular_quebras(valores, {'metodo': 'quantil'}, 5)
+    assert quebras.tolist() == [0.0, 1.0]
+
+    classes = Classificacao(quebras, CORES, '#sem')
+    # Três classes com as cores dos extremos e do meio
+    assert classes.cores.tolist() == ['#c1', '#c3', '#c5']
+
+
+def test_metodo_invalido():
+    with pytest.raises(ValueError):
+        classificacao.calcular_quebras(np.arange(3.0), {'metodo': 'desvio'}, 5)
+
+
+def test_digitize_nos_limites():
+    classes = Classificacao.de_esquema(classificacao.ESQUEMA_PADRAO, [], CORES, '#sem')
+    valores = [-5, 0, 19.99, 19.996, 20, 79.99, 80, 100, 150, np.nan]
+
+    # Valor igual ao limite sobe de classe; o arredondamento a CASAS vale antes da busca
+    assert classes.classes(valores).tolist() == [0, 0, 0, 1, 1, 3, 4, 4, 4, -1]
+    assert classes.cores_de([np.nan, 80])[0] == '#sem'
+    assert classes.rotulos_de([10, 80, np.nan]).tolist() == ['Muito Baixo', 'Muito Alto', 'Sem dados']
+
+
+def test_direcao_menor_inverte_as_cores():
+    esquema = {**classificacao.ESQUEMA_PADRAO, 'direcao': 'menor'}
+    classes = Classificacao.de_esquema(esquema, [], CORES, '#sem')
+    assert classes.cores_de([10, 90]).tolist() == ['#c5', '#c1']
+    # Os rótulos seguem o valor, não o desempenho
+    assert classes.rotulos_de([10]).tolist() == ['Muito Baixo']
+
+
+def test_faixas_da_legenda():
+    classes = Classificacao.de_esquema({'metodo': 'jenks'}, [1, 2, 3, 50, 51, 52, 100, 101], CORES[:3], '#sem')
+    assert classes.faixas() == [
+        [100.0, '#c3', 'Classe 3', 101.0],
+        [50.0, '#c2', 'Classe 2', 100.0],
+        [1.0, '#c1', 'Classe 1', 50.0],
+    ]
+
+
+def test_cache_de_quebras(tmp_path):
+    esquema = {'metodo': 'jenks'}
+    valores = [3.0, 1.0, np.nan, 2.0]
+    chave = classificacao.chave_quebras(esquema, valores, 5)
+    # A ordem dos valores e os NaN não mudam a chave
+    assert chave == classificacao.chave_quebras(esquema, [1.0, 2.0, 3.0], 5)
+    assert chave != classificacao.chave_quebras({'metodo': 'quantil'}, valores, 5)
+
+    arquivo = tmp_path / 'quebras.json'
+    classificacao.gravar_quebras(arquivo, chave, Classificacao([2.0], CORES[:2], '#sem'))
+    assert classificacao.ler_quebras(arquivo, chave).tolist() == [2.0]
+    assert classificacao.ler_quebras(arquivo, 'outra') is None
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+import hierarquia
+
+
+def test_fator_razao_percentual_e_unitario():
+    numerador, denominador = [1, 3, 5], [4, 4, 10]
+    assert hierarquia.fator_razao(numerador, denominador, [25, 75, 50]) == 100.0
+    assert hierarquia.fator_razao(numerador, denominador, [0.25, 0.75, 0.5]) == 1.0
+
+
+def test_fator_razao_none():
+    # Colunas que não reproduzem a pontuação (par final é só um componente)
+    assert hierarquia.fator_razao([1, 3, 5], [4, 4, 10], [90, 10, 33]) is None
+    # Nenhuma linha válida: denominadores zerados ou numeradores ausentes
+    assert hierarquia.fator_razao([1, np.nan], [0, 5], [25, 10]) is None
+
+
+def equipes():
+    # Município A: duas equipes pequenas com 100%; B: uma equipe grande com 10%
+    return pd.DataFrame({
+        'codigo_ibge': ['A', 'A', 'B'],
+        'pontuacao': [100.0, 100.0, 10.0],
+        'numerador': [1.0, 1.0, 10.0],
+        'denominador': [1.0, 1.0, 100.0],
+    })
+
+
+CHAVES = {
+    'A': {'rgi': ('R1', 'Norte'), 'rgint': ('I1', 'Inter'), 'regiao': ('norte', 'norte'), 'area_km2': 10.0},
+    'B': {'rgi': ('R1', 'Norte'), 'rgint': ('I1', 'Inter'), 'regiao': ('norte', 'norte'), 'area_km2': 30.0},
+    'C': {'rgi': ('R2', 'Sul'), 'rgint': ('I1', 'Inter'), 'regiao': ('sul', 'sul'), 'area_km2': 5.0},
+}
+
+
+def test_niveis_sobem_razao_de_somas():
+    niveis = hierarquia.cubo(equipes(), CHAVES, 'ponderada', fator=100.0)
+
+    codigos, municipio = niveis['municipio']
+    assert codigos == ['A', 'B']
+    assert municipio['razao'].tolist() == [100.0, 10.0]
+
+    rotulos, rgi = niveis['rgi']
+    assert rotulos == ['R1']
+    # Razão de somas (12 / 102), não a média dos percentuais municipais (55)
+    assert rgi['razao'][0] == 100.0 * 12 / 102
+    assert rgi['pontuacao'][0] == (100 + 100 + 1000) / 102
+    assert rgi['media'][0] == 55.0
+    assert rgi['municipios'][0] == 2
+    # A área soma todos os municípios do grupo, com ou sem dados
+    assert rgi['area_km2'][0] == 40.0
+
+    _, estado = niveis['estado']
+    assert estado['equipes'][0] == 3
+    assert estado['area_km2'][0] == 45.0
+
+
+def test_sem_fator_nao_publica_razao():
+    niveis = hierarquia.cubo(equipes(), CHAVES, 'media')
+    _, rgi = niveis['rgi']
+    assert 'razao' not in rgi
+    # Média simples das três equipes
+    assert rgi['pontuacao'][0] == 70.0
+
+
+def test_payload():
+    payload = hierarquia.para_payload(hierarquia.cubo(equipes(), CHAVES, 'ponderada', fator=100.0))
+    assert payload['estado']['equipes'] == 3
+    assert payload['rgi']['R1']['razao'] == 11.76
+    assert payload['rgint']['I1']['nome'] == 'Inter'
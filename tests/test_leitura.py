@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+
+import leitura
+
+
+def relatorio(pasta, nome, mtime):
+    caminho = pasta / nome
+    caminho.write_text('')
+    os.utime(caminho, ns=(mtime, mtime))
+    return caminho
+
+
+def colunas(*codigos, competencia='AGO/25'):
+    return {
+        'codigo_ibge': np.array(codigos, dtype=object),
+        'competencia': np.full(len(codigos), competencia, dtype=object),
+        'pontuacao': np.arange(len(codigos), dtype=float)
+    }
+
+
+def test_planilha_substitui_por_municipio(tmp_path):
+    planilha = relatorio(tmp_path, 'consolidada.xlsx', 2_000)
+    antigo = relatorio(tmp_path, 'a.csv', 1_000)
+    novo = relatorio(tmp_path, 'b.csv', 3_000)
+    fora = relatorio(tmp_path, 'c.csv', 1_000)
+
+    lidos = leitura.LeituraPasta()
+    lidos.registros = [
+        (planilha, {'consolidado': True}, colunas('5000252', '5000500', '5000500')),
+        (antigo, {'codigo_ibge': '500025'}, colunas('500025')),
+        (novo, {'codigo_ibge': '500050'}, colunas('500050')),
+        (fora, {'codigo_ibge': '500060'}, colunas('500060')),
+    ]
+    lidos.consolidadas = [planilha]
+    leitura.substituir_por_planilha(lidos)
+
+    # A: coberto pela planilha e mais antigo; B: mais novo que a planilha; C: fora da planilha
+    assert lidos.substituidos == [antigo]
+    assert lidos.prevalecem == [novo]
+    assert [caminho for caminho, _, _ in lidos.registros] == [planilha, novo, fora]
+    assert lidos.registros[0][2]['codigo_ibge'].tolist() == ['5000252']
+    assert lidos.registros[0][2]['pontuacao'].tolist() == [0.0]
+    assert lidos.resumo()['substituidos'] == ['a.csv']
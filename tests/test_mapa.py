@@ -0,0 +1,41 @@
+import pytest
+
+from mapa import GeradorSVGWeb
+
+
+@pytest.fixture(scope='module')
+def gerador():
+    gerador = GeradorSVGWeb()
+    gerador.log = lambda mensagem, tipo="INFO": None
+    if not gerador.preparar():
+        pytest.skip("REGIAO/ indisponível")
+    return gerador
+
+
+def test_modelos_de_recorte_limitados(gerador):
+    gerador.maximo_modelos_recorte = 2
+    gerador.modelos_recorte.clear()
+
+    primeiro = gerador.modelo_recorte([0, 1])
+    gerador.modelo_recorte([2, 3])
+    # Usar de novo o primeiro recorte o torna o mais recente: o despejado é [2, 3]
+    assert gerador.modelo_recorte([0, 1]) is primeiro
+    gerador.modelo_recorte([4, 5])
+
+    assert list(gerador.modelos_recorte) == [(0, 1), (4, 5)]
+
+
+def test_indicador_classificado_uma_vez(gerador, monkeypatch):
+    from servidor import ServidorMapas
+
+    codigo = next(iter(gerador.indicadores_mapeamento))
+    chamadas = []
+    classificar = gerador.classificar_indicador
+    monkeypatch.setattr(gerador, 'classificar_indicador',
+                        lambda *args: chamadas.append(args[0]) or classificar(*args))
+
+    gerado = ServidorMapas(gerador).gerar_indicador(codigo)
+    if gerado is None:
+        pytest.skip("Sem CSV do indicador")
+
+    assert chamadas == [codigo]
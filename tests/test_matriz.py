@@ -0,0 +1,71 @@
+import numpy as np
+
+from matriz import MatrizIndicadores
+
+
+def matriz():
+    return MatrizIndicadores.de_pontuacoes({
+        'a': {'1': 10.0, '2': 20.0, '3': 20.0, '4': 40.0},
+        'b': {'1': 5.0, '2': None},
+        'c': {'3': 7.0},
+    })
+
+
+def test_de_pontuacoes():
+    m = matriz()
+    assert m.codigos == ['1', '2', '3', '4']
+    assert m.mascara.sum(axis=0).tolist() == [4, 1, 1]
+
+
+def test_percentis_com_empates():
+    percentis = matriz().percentis()
+    # 20 e 20 dividem os postos 2 e 3: percentil médio (2.5 - 1) / 3 * 100
+    assert percentis[:, 0].tolist() == [0.0, 50.0, 50.0, 100.0]
+
+
+def test_percentis_de_um_unico_municipio():
+    percentis = matriz().percentis()
+    assert percentis[0, 1] == 100.0
+    assert np.isnan(percentis[1:, 1]).all()
+    assert percentis[2, 2] == 100.0
+
+
+def test_percentis_menor_e_melhor():
+    percentis = matriz().percentis({'a': 'menor'})
+    assert percentis[:, 0].tolist() == [100.0, 50.0, 50.0, 0.0]
+    # A direção de um indicador não altera os outros
+    assert percentis[0, 1] == 100.0
+
+
+def test_composto_e_cobertura():
+    m = MatrizIndicadores(['1', '2', '3'], ['a', 'b', 'c'], np.zeros((3, 3)))
+    percentis = np.array([
+        [100.0, 50.0, np.nan],
+        [80.0, np.nan, np.nan],
+        [np.nan, np.nan, np.nan],
+    ])
+    composto, cobertura = m.composto(percentis, {'a': 2.0}, cobertura_minima=0.5)
+
+    # Município 1: (2 * 100 + 50) / 3; cobertura 3 / 4
+    assert composto[0] == 250.0 / 3
+    assert cobertura.tolist() == [0.75, 0.5, 0.0]
+    # Cobertura exatamente no mínimo ainda pontua; sem nenhum indicador, não
+    assert composto[1] == 80.0
+    assert np.isnan(composto[2])
+
+
+def test_composto_abaixo_da_cobertura_minima():
+    m = MatrizIndicadores(['1'], ['a', 'b', 'c'], np.zeros((1, 3)))
+    composto, cobertura = m.composto(np.array([[90.0, np.nan, np.nan]]), cobertura_minima=0.5)
+    assert np.isnan(composto[0])
+    assert cobertura[0] == 1 / 3
+
+
+def test_ranking_e_resumo_por_grupo():
+    assert MatrizIndicadores.ranking([10.0, np.nan, 30.0, 10.0]).tolist()[::2] == [2.0, 1.0]
+
+    rotulos, resumo = MatrizIndicadores.resumo_por_grupo(['n', 'n', 's', None], [1.0, 3.0, np.nan, 9.0])
+    assert rotulos == ['n', 's']
+    assert resumo['media'][:, 0].tolist()[0] == 2.0
+    assert resumo['municipios'][:, 0].tolist() == [2.0, 0.0]
+    assert np.isnan(resumo['minimo'][1, 0])
@@ -0,0 +1,58 @@
+import pytest
+
+import municipios
+from municipios import RegistroMunicipios
+
+
+def feicao(codigo, nome, regiao='sudoeste', **propriedades):
+    return {'regiao': regiao, 'propriedades': {'CD_MUN': codigo, 'NM_MUN': nome, **propriedades}}
+
+
+@pytest.fixture
+def registro():
+    return RegistroMunicipios.de_feicoes([
+        feicao('5005806', 'Nioaque', CD_RGI='500011', NM_RGI='Jardim', AREA_KM2=3909.738),
+        feicao('5006903', 'Porto Murtinho'),
+        feicao('5001003', 'Amambaí', regiao='sulfronteira'),
+        # Feição repetida (município em dois arquivos) e código inválido ficam fora
+        feicao('5005806', 'Nioaque'),
+        feicao(None, 'Sem código'),
+    ])
+
+
+@pytest.mark.parametrize('codigo6, codigo7', [
+    ('500580', '5005806'), ('500690', '5006903'), ('500500', '5005004'), ('500280', '5002803')
+])
+def test_digito_verificador(codigo6, codigo7):
+    assert municipios.codigo_completo(codigo6) == codigo7
+
+
+def test_codigo_completo_invalido():
+    assert municipios.codigo_completo('5005806') == '5005806'
+    assert municipios.codigo_completo(' 500580 ') == '5005806'
+    assert municipios.codigo_completo('50058') is None
+    assert municipios.codigo_completo(None) is None
+
+
+def test_normalizar_nome():
+    assert municipios.normalizar_nome('Amambaí ') == 'AMAMBAI'
+    assert municipios.normalizar_nome("Figueirão / D'Oeste") == 'FIGUEIRAO D OESTE'
+    assert municipios.normalizar_nome(None) == ''
+
+
+def test_registro_resolve_codigos_e_nomes(registro):
+    assert len(registro) == 3
+    nioaque = registro.resolver('5005806')
+    assert registro.resolver('500580') is nioaque
+    assert registro.resolver('NIOAQUE') is nioaque
+    assert registro.resolver('amambai').codigo == '5001003'
+    assert nioaque.cd_rgi == '500011' and nioaque.area_km2 == 3909.738
+    assert '500690' in registro
+    assert registro.resolver('999999') is None
+
+
+def test_codigo_fora_do_geojson(registro):
+    # Códigos fora do GeoJSON ainda ganham o dígito verificador; nomes desconhecidos não viram código
+    assert registro.codigo('Porto Murtinho') == '5006903'
+    assert registro.codigo('500500') == '5005004'
+    assert registro.codigo('Cidade Inexistente') is None
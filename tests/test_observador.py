@@ -0,0 +1,86 @@
+import pytest
+
+from observador import Observador
+
+
+class Relogio:
+    """Relógio manual para o debounce"""
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def pastas(tmp_path):
+    for nome in ('ind1', 'ind2'):
+        (tmp_path / nome).mkdir()
+    return {'ind1': (tmp_path / 'ind1', ('.csv',)), 'ind2': (tmp_path / 'ind2', ('.csv',))}
+
+
+@pytest.fixture
+def relogio():
+    return Relogio()
+
+
+def escrever(pasta, nome, conteudo):
+    (pasta / nome).write_text(conteudo, encoding='utf-8')
+
+
+def test_sem_alteracoes_nada_e_entregue(pastas, relogio):
+    observador = Observador(pastas, espera=2.0, relogio=relogio)
+    relogio.agora = 10.0
+
+    assert observador.verificar() == []
+
+
+def test_alteracao_so_e_entregue_depois_da_espera(pastas, relogio):
+    observador = Observador(pastas, espera=2.0, relogio=relogio)
+    escrever(pastas['ind1'][0], 'a.csv', 'x')
+
+    assert observador.verificar() == []
+    relogio.agora = 1.9
+    assert observador.verificar() == []
+    relogio.agora = 2.0
+    assert observador.verificar() == ['ind1']
+    # Entregue uma vez só
+    relogio.agora = 5.0
+    assert observador.verificar() == []
+
+
+def test_rajada_reinicia_a_espera(pastas, relogio):
+    observador = Observador(pastas, espera=2.0, relogio=relogio)
+    escrever(pastas['ind1'][0], 'a.csv', 'x')
+    assert observador.verificar() == []
+
+    relogio.agora = 1.5
+    escrever(pastas['ind1'][0], 'a.csv', 'xy')
+    assert observador.verificar() == []
+
+    relogio.agora = 3.0
+    assert observador.verificar() == []
+    relogio.agora = 3.5
+    assert observador.verificar() == ['ind1']
+
+
+def test_extensoes_nao_observadas_sao_ignoradas(pastas, relogio):
+    observador = Observador(pastas, espera=0.0, relogio=relogio)
+    escrever(pastas['ind1'][0], 'anotacao.txt', 'x')
+
+    assert observador.verificar() == []
+
+
+def test_pastas_assentam_independentemente(pastas, relogio):
+    observador = Observador(pastas, espera=2.0, relogio=relogio)
+    escrever(pastas['ind1'][0], 'a.csv', 'x')
+    observador.verificar()
+    relogio.agora = 1.0
+    escrever(pastas['ind2'][0], 'b.csv', 'x')
+    observador.verificar()
+
+    relogio.agora = 2.0
+    assert observador.verificar() == ['ind1']
+    relogio.agora = 3.0
+    assert observador.verificar() == ['ind2']
@@ -0,0 +1,77 @@
+import io
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+import leitura
+import planilha
+
+ABA = (
+    f'<worksheet xmlns="{planilha.NS_PLANILHA}"><sheetData>'
+    '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="C1"><v>2.5</v></c></row>'
+    '<row r="2"><c r="B2"><v>7</v></c></row>'
+    '</sheetData></worksheet>'
+)
+
+
+def test_linhas_aba_solta_as_linhas_lidas(monkeypatch):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as arquivo_zip:
+        arquivo_zip.writestr('xl/worksheets/sheet1.xml', ABA)
+
+    abertos = []
+    iterparse = ET.iterparse
+
+    def espiao(fonte, events=None):
+        for evento, elemento in iterparse(fonte, events=events):
+            if evento == 'start' and elemento.tag == planilha.TAG_DADOS:
+                abertos.append(elemento)
+            yield evento, elemento
+
+    monkeypatch.setattr(planilha.ET, 'iterparse', espiao)
+    with zipfile.ZipFile(buffer) as arquivo_zip:
+        linhas = list(planilha.linhas_aba(arquivo_zip, 'xl/worksheets/sheet1.xml', ['MUNICIPIO']))
+
+    # As linhas lidas saem da árvore: <sheetData> não acumula uma linha vazia por linha da aba
+    assert len(abertos[0]) == 0
+    assert linhas == [['MUNICIPIO', None, 2.5], [None, 7.0]]
+
+
+def registro(pasta, nome, mtime, linhas, **metadados):
+    caminho = pasta / nome
+    caminho.write_text('')
+    os.utime(caminho, ns=(mtime, mtime))
+    codigos, competencias = zip(*linhas)
+    colunas = {
+        'codigo_ibge': np.array(codigos, dtype=object),
+        'competencia': np.array(competencias, dtype=object),
+        'pontuacao': np.arange(len(linhas), dtype=float)
+    }
+    return caminho, metadados, colunas
+
+
+def test_planilha_substitui_so_as_competencias_que_traz(tmp_path):
+    # A planilha (mais nova) só traz AGO/25; o CSV de JUL/25 do mesmo município continua valendo
+    planilha_ago = registro(tmp_path, 'consolidada.xlsx', 3_000,
+                            [('5000252', 'AGOSTO/2025'), ('5000500', 'AGO/25')], consolidado=True)
+    julho = registro(tmp_path, 'a_jul.csv', 1_000, [('500025', 'JUL/25')], codigo_ibge='500025')
+    agosto = registro(tmp_path, 'a_ago.csv', 1_000, [('500025', 'AGO/25')], codigo_ibge='500025')
+    # CSV com duas competências: só a coberta pela planilha sai; a mais nova que ela prevalece
+    misto = registro(tmp_path, 'b.csv', 2_000, [('500050', 'JUL/25'), ('500050', 'AGO/25')], codigo_ibge='500050')
+    novo = registro(tmp_path, 'b_novo.csv', 4_000, [('500050', 'AGO/25')], codigo_ibge='500050')
+
+    lidos = leitura.LeituraPasta()
+    lidos.registros = [planilha_ago, julho, agosto, misto, novo]
+    lidos.consolidadas = [planilha_ago[0]]
+    leitura.substituir_por_planilha(lidos)
+
+    por_arquivo = {caminho.name: colunas for caminho, _, colunas in lidos.registros}
+    assert sorted(por_arquivo) == ['a_jul.csv', 'b.csv', 'b_novo.csv', 'consolidada.xlsx']
+    assert por_arquivo['a_jul.csv']['competencia'].tolist() == ['JUL/25']
+    assert por_arquivo['b.csv']['competencia'].tolist() == ['JUL/25']
+    # AGO/25 de 500050 vem do CSV mais novo; a planilha fica só com 500025
+    assert por_arquivo['consolidada.xlsx']['codigo_ibge'].tolist() == ['5000252']
+    assert [caminho.name for caminho in lidos.substituidos] == ['a_ago.csv', 'b.csv']
+    assert [caminho.name for caminho in lidos.prevalecem] == ['b_novo.csv']
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from series import SerieIndicador
+
+
+def serie(direcao):
+    # Três municípios em duas competências; o município B troca de lugar com o A
+    valores = np.array([
+        [10.0, 20.0, 30.0],
+        [25.0, 15.0, np.nan],
+    ])
+    return SerieIndicador(['JUL/25', 'AGO/25'], ['A', 'B', 'C'], valores, direcao)
+
+
+def test_ranking_maior_e_melhor():
+    ranking = serie('maior').ranking()
+    assert ranking[0].tolist() == [3, 2, 1]
+    assert ranking[1, :2].tolist() == [1, 2]
+
+
+def test_ranking_menor_e_melhor():
+    ranking = serie('menor').ranking()
+    # Taxa de exodontias: o menor valor é o 1º lugar
+    assert ranking[0].tolist() == [1, 2, 3]
+    assert ranking[1, :2].tolist() == [2, 1]
+    assert np.isnan(ranking[1, 2])
+
+
+def test_variacao_ranking_menor_e_melhor():
+    variacao = serie('menor').variacao_ranking()
+    # A piorou (1º -> 2º) e B melhorou (2º -> 1º)
+    assert variacao[1, :2].tolist() == [-1, 1]
+    assert np.isnan(variacao[0]).all()
+
+
+def test_payload_exporta_direcao():
+    payload = serie('menor').para_payload()
+    assert payload['direcao'] == 'menor'
+    assert payload['municipios']['B']['ranking'] == [2, 1]
+
+
+def test_direcao_invalida():
+    with pytest.raises(ValueError):
+        serie('crescente')
+
+
+def test_media_movel_pula_lacunas():
+    valores = np.array([
+        [10.0, np.nan],
+        [np.nan, np.nan],
+        [20.0, np.nan],
+        [30.0, 5.0],
+        [60.0, np.nan],
+    ])
+    media = SerieIndicador(['JUN/25', 'JUL/25', 'AGO/25', 'SET/25', 'OUT/25'], ['A', 'B'], valores).media_movel(3)
+
+    # A: a lacuna de JUL/25 não conta na janela; SET/25 usa JUN, AGO e SET
+    assert media[[0, 2, 3, 4], 0].tolist() == [10.0, 15.0, 20.0, pytest.approx(110 / 3)]
+    assert np.isnan(media[1, 0])
+    # B: só uma competência com dados
+    assert media[3, 1] == 5.0
+    assert np.isnan(media[[0, 1, 2, 4], 1]).all()
@@ -0,0 +1,89 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from servidor import Recurso, ServidorMapas, caminho_publico
+
+
+@pytest.fixture
+def servidor(tmp_path):
+    (tmp_path / 'index.html').write_text('<html></html>', encoding='utf-8')
+    (tmp_path / 'src' / 'js').mkdir(parents=True)
+    (tmp_path / 'src' / 'js' / 'mapa.js').write_text('var x = 1;', encoding='utf-8')
+    (tmp_path / 'src' / 'python').mkdir()
+    (tmp_path / 'src' / 'python' / 'mapa.py').write_text('segredo', encoding='utf-8')
+    (tmp_path / 'requests.jsonl').write_text('segredo', encoding='utf-8')
+    gerador = SimpleNamespace(base_path=tmp_path, indicadores_mapeamento={},
+                              log=lambda mensagem, tipo="INFO": None)
+    return ServidorMapas(gerador)
+
+
+def requisitar(servidor, alvo, cabecalhos=''):
+    """Envia uma requisição GET ao atender() por um socket local e devolve (status, cabeçalhos, corpo)"""
+    async def executar():
+        tcp = await asyncio.start_server(servidor.atender, '127.0.0.1', 0)
+        porta = tcp.sockets[0].getsockname()[1]
+        async with tcp:
+            reader, writer = await asyncio.open_connection('127.0.0.1', porta)
+            writer.write(f"GET {alvo} HTTP/1.1\r\nHost: teste\r\n{cabecalhos}\r\n".encode('latin-1'))
+            await writer.drain()
+            resposta = await reader.read()
+            writer.close()
+        return resposta
+
+    cabecalho, _, corpo = asyncio.run(executar()).partition(b'\r\n\r\n')
+    linhas = cabecalho.decode('latin-1').split('\r\n')
+    headers = {nome.lower(): valor.strip() for nome, _, valor in (linha.partition(':') for linha in linhas[1:])}
+    return int(linhas[0].split(' ')[1]), headers, corpo
+
+
+@pytest.mark.parametrize('caminho', ['index.html', 'src/js/mapa.js', 'src/data/indicador_1_dados.json',
+                                     'src/svg/indicador_1.svg'])
+def test_caminho_publico_permite_pastas_publicas(caminho):
+    assert caminho_publico(tuple(caminho.split('/')))
+
+
+@pytest.mark.parametrize('caminho', ['', 'src/cache/topologia.json', '.git/HEAD', 'src/js/.segredo',
+                                     'src/python/mapa.py', 'requests.jsonl', 'REGIAO/MS.json', 'src/js'])
+def test_caminho_publico_recusa_o_resto(caminho):
+    assert not caminho_publico(tuple(caminho.split('/')) if caminho else ())
+
+
+def test_recurso_arquivo_serve_so_a_lista_branca(servidor):
+    assert servidor.recurso_arquivo('/index.html').corpo == b'<html></html>'
+    assert servidor.recurso_arquivo('/').corpo == b'<html></html>'
+    assert servidor.recurso_arquivo('/src/js/mapa.js').tipo.endswith('; charset=utf-8')
+    assert servidor.recurso_arquivo('/src/python/mapa.py') is None
+    assert servidor.recurso_arquivo('/requests.jsonl') is None
+
+
+@pytest.mark.parametrize('alvo', ['/src/js/../../requests.jsonl', '/src/js/%2e%2e/%2e%2e/requests.jsonl',
+                                  '/src/js/../python/mapa.py', '/../' * 4 + 'etc/passwd',
+                                  '/src/js/%2e%2e%2f%2e%2e%2frequests.jsonl'])
+def test_recusa_subir_de_pasta(servidor, alvo):
+    status, _, corpo = requisitar(servidor, alvo)
+
+    assert status == 404
+    assert b'segredo' not in corpo
+
+
+def test_etag_estavel_e_dependente_do_corpo():
+    assert Recurso(b'abc', 'text/plain', 0).etag == Recurso(b'abc', 'text/plain', 1).etag
+    assert Recurso(b'abc', 'text/plain', 0).etag != Recurso(b'abd', 'text/plain', 0).etag
+
+
+def test_if_none_match_responde_304(servidor):
+    status, headers, corpo = requisitar(servidor, '/src/js/mapa.js')
+    assert status == 200
+    assert corpo == b'var x = 1;'
+    etag = headers['etag']
+
+    status, headers, corpo = requisitar(servidor, '/src/js/mapa.js', f"If-None-Match: W/\"x\", {etag}\r\n")
+    assert status == 304
+    assert headers['etag'] == etag
+    assert 'content-length' not in headers
+    assert corpo == b''
+
+    status, _, _ = requisitar(servidor, '/src/js/mapa.js', 'If-None-Match: "outra"\r\n')
+    assert status == 200
@@ -0,0 +1,89 @@
+import io
+
+import pandas as pd
+import pytest
+
+import siaps
+
+RELATORIO = (
+    '﻿Dado gerado em: 14/10/2025\n'
+    'UF: MS\n'
+    'Município: 500025 / ALCINÓPOLIS\n'
+    'Indicador: Cuidado da pessoa idosa\n'
+    'Competência selecionada: AGO/25\n'
+    'Rótulo desconhecido: ignorado\n'
+    '\n'
+    'CNES;INE;NOME DA EQUIPE;NUMERADOR;DENOMINADOR;PONTUAÇÃO\n'
+    '0012345;0000123;ESF CENTRO;3;4;75,5\n'
+    '0012345;0000456;ESF RURAL;1,5;2;"75,0"\n'
+    '\n'
+    'Fonte: SIAPS;;;;;\n'
+)
+
+
+def test_separar_municipio():
+    assert siaps.separar_municipio('500025 / ALCINÓPOLIS') == ('500025', 'ALCINÓPOLIS')
+    assert siaps.separar_municipio('5000252/CAMPO GRANDE') == ('5000252', 'CAMPO GRANDE')
+    assert siaps.separar_municipio('sem código') == (None, None)
+
+
+def test_preambulo_para_no_cabecalho():
+    arquivo = io.StringIO(RELATORIO)
+    metadados, cabecalho = siaps.ler_preambulo(arquivo)
+
+    assert metadados == {
+        'gerado_em': '14/10/2025',
+        'uf': 'MS',
+        'municipio': '500025 / ALCINÓPOLIS',
+        'codigo_ibge': '500025',
+        'nome_municipio': 'ALCINÓPOLIS',
+        'indicador': 'Cuidado da pessoa idosa',
+        'competencia': 'AGO/25',
+    }
+    assert cabecalho[-1] == 'PONTUAÇÃO'
+    # O arquivo fica posicionado na primeira linha de dados
+    assert arquivo.readline().startswith('0012345;0000123')
+
+
+def test_preambulo_sem_tabela():
+    assert siaps.ler_preambulo(io.StringIO('UF: MS\n')) == ({'uf': 'MS'}, None)
+
+
+def test_converter_numero_virgula_decimal():
+    serie = pd.Series(['75,5', '10', None, 'n/d'], dtype=object)
+    convertidos = siaps.converter_numero(serie)
+    assert convertidos.iloc[:2].tolist() == [75.5, 10.0]
+    assert convertidos.iloc[2:].isna().all()
+
+
+def test_ler_relatorio(tmp_path):
+    caminho = tmp_path / 'relatorio.csv'
+    caminho.write_text(RELATORIO, encoding='utf-8')
+    relatorio = siaps.ler_relatorio_siaps(caminho)
+
+    assert relatorio.codigo_ibge == '500025'
+    assert relatorio.competencia == 'AGO/25'
+    # Zeros à esquerda preservados; rodapé e linhas em branco descartados
+    assert relatorio.equipes['CNES'].tolist() == ['0012345', '0012345']
+    assert relatorio.equipes['PONTUAÇÃO'].tolist() == [75.5, 75.0]
+    assert relatorio.equipes['NUMERADOR'].tolist() == [3.0, 1.5]
+
+
+def agregar(metodo):
+    equipes = pd.DataFrame({
+        'codigo_ibge': ['1', '1', '2', None],
+        'nome_municipio': ['A', 'A', 'B', 'X'],
+        'competencia': ['AGO/25'] * 4,
+        'arquivo_origem': ['a.csv', 'a.csv', 'b.csv', 'x.csv'],
+        'pontuacao': [100.0, 40.0, 50.0, 90.0],
+        'peso': [1.0, 3.0, 0.0, 1.0],
+    })
+    return siaps.agregar_por_municipio(equipes, metodo)['pontuacao'].tolist()
+
+
+def test_agregacao_por_municipio():
+    assert agregar('ponderada') == [55.0, 50.0]
+    assert agregar('media') == [70.0, 50.0]
+    assert agregar('maximo') == [100.0, 50.0]
+    with pytest.raises(ValueError):
+        agregar('mediana')
@@ -0,0 +1,44 @@
+import numpy as np
+
+import topologia
+
+
+def vizinhos():
+    # Dois quadrados lado a lado; na fronteira x = 10 há um dente que, na grade de 0.1, vira um
+    # vai-e-volta (10, 5) -> (10.3, 5) -> (10, 5) e antes partia a fronteira em vários arcos
+    fronteira = [(10.0, 0.0), (10.0, 5.0), (10.3, 5.02), (10.0, 5.04), (10.0, 10.0)]
+    oeste = [(0.0, 0.0)] + fronteira + [(0.0, 10.0)]
+    leste = fronteira[::-1] + [(20.0, 0.0), (20.0, 10.0)][::-1]
+    return [
+        {'id': 'oeste', 'propriedades': {}, 'poligonos': [[np.array(oeste)]]},
+        {'id': 'leste', 'propriedades': {}, 'poligonos': [[np.array(leste)]]},
+    ]
+
+
+def arcos_usados(geometria):
+    return [indice for anel in geometria['arcs'] for indice in anel]
+
+
+def test_vizinhos_usam_o_mesmo_arco():
+    for escala, tolerancia in ((0.005, 0.01), (0.1, 0.25)):
+        resultado = topologia.construir_topologia(vizinhos(), escala, tolerancia)
+        oeste, leste = resultado['objects']['municipios']['geometries']
+
+        # A fronteira é um único arco, percorrido em sentidos opostos pelos dois vizinhos
+        compartilhados = {i if i >= 0 else ~i for i in arcos_usados(oeste)} & \
+                         {i if i >= 0 else ~i for i in arcos_usados(leste)}
+        assert len(compartilhados) == 1
+        assert len(resultado['arcs']) == 3
+        arco = compartilhados.pop()
+        assert (arco in arcos_usados(oeste)) != (arco in arcos_usados(leste))
+
+
+def test_base_reaproveitada_entre_niveis():
+    base = topologia.montar_arcos(vizinhos())
+    fino = topologia.construir_topologia(vizinhos(), 0.005, 0.01, base=base)
+    grosso = topologia.construir_topologia(vizinhos(), 0.1, 0.25, base=base)
+
+    # Mesmos arcos (só a grade muda): os níveis referenciam os arcos pelos mesmos índices
+    assert fino['objects'] == grosso['objects']
+    assert len(fino['arcs']) == len(grosso['arcs']) == 3
+    assert grosso['arcs'][0][0] == [100, 0] and fino['arcs'][0][0] == [2000, 0]